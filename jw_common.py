@@ -0,0 +1,970 @@
+# jw_common.py
+# fixed9 / fixed10 共通の基盤（出力先・Edge WebDriver プール・記事本文キャッシュ）
+# - アプリごとに違う設定（ファイル名・チャレンジ判定・Edge の起動方法）は各アプリから渡す
+# - それ以外の既定値は下の設定にまとめる
+
+import io
+import os
+import sys
+import csv
+import gzip
+import atexit
+import zlib
+import lzma
+import json
+import time
+import queue
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from collections import OrderedDict
+from datetime import datetime
+
+from selenium.common.exceptions import WebDriverException
+
+from jw_urls import BASE_DOMAIN, canonicalize_url, extract_docid_from_url
+
+# Optional Excel support
+try:
+    import openpyxl
+    from openpyxl import Workbook
+    from openpyxl.cell.cell import ILLEGAL_CHARACTERS_RE
+except Exception:
+    openpyxl = None
+
+# ----------------------------
+# Configuration（共通の既定値）
+# ----------------------------
+EXCEL_FLUSH_ROWS = 200        # 未保存の行がこれだけ溜まったら保存
+EXCEL_FLUSH_SECONDS = 5.0     # 最初の未保存行からこの秒数で保存
+EXCEL_MAX_ROWS = 10000        # 1 ファイル（一括出力は 1 シート）あたりの行数。超えたら _2, _3 ... へ
+# 収集した記事を 1 件ずつ追記する逐次出力（下流は tail で読める）
+EXPORT_STREAM_FORMATS = ("jsonl",)            # "jsonl" / "csv" の組み合わせ。空なら逐次出力しない
+EXPORT_GZIP = False           # True なら .jsonl.gz / .csv.gz に gzip で書く
+EXPORT_FSYNC = False          # True なら 1 件ごとに fsync（安全だが遅い）
+# Edge WebDriver プール
+DRIVER_POOL_SIZE = 2         # 同時に起動しておく Edge の上限
+DRIVER_POOL_PREWARM = 1      # アプリ起動時に先に立ち上げておく台数
+DRIVER_LEASE_TIMEOUT = 120   # 貸し出し待ちの上限（秒）
+# ブラウザ上でチャレンジページを見分ける CSS セレクタ（アプリ側で EdgeDriverPool.challenge_selector を上書きする）
+CHALLENGE_SELECTOR = "iframe[src*='recaptcha'], .g-recaptcha, #challenge-form"
+# 記事本文の永続キャッシュ（SQLite）
+ARTICLE_CACHE_TTL = 7 * 24 * 3600            # 秒（0 で無期限）
+ARTICLE_CACHE_MAX_BYTES = 256 * 1024 * 1024  # 超えたら LRU で削除
+ARTICLE_CACHE_TOUCH_FLUSH_SECONDS = 30.0     # ヒット時の accessed_at 更新をまとめて書く間隔
+ARTICLE_CACHE_TOUCH_FLUSH_ROWS = 256         # 溜まった更新がこの件数に達したら間隔を待たずに書く
+# 記事本文のメモリキャッシュ（上限はバイト数。追い出した本文は永続キャッシュへ）
+ARTICLE_MEMORY_CACHE_BYTES = 64 * 1024 * 1024
+ARTICLE_MEMORY_COMPRESSION = "zlib"   # 本文を圧縮して保持: "zlib"（速い）/ "lzma"（よく縮む）/ None（圧縮しない）
+
+# ----------------------------
+# Excel writer (thread-safe) / 出力先の共通インターフェース
+# ----------------------------
+class RecordSink(ABC):
+    """
+    収集した記事レコード (timestamp, url, title, summary, body) の出力先の共通インターフェース。
+    ExcelWriter と逐次出力（JsonlSink / CsvSink）が append / flush / close / stats を実装する。
+    """
+    FIELDS = ("timestamp", "url", "title", "summary", "body")
+
+    @abstractmethod
+    def append(self, row):
+        """1 レコード（FIELDS の順の列）を書く"""
+
+    def flush(self, timeout=None) -> bool:
+        return True
+
+    def close(self):
+        pass
+
+    def stats(self) -> dict:
+        return {}
+
+class ExcelWriter(RecordSink):
+    """
+    Excel への追記をバッファし、専用スレッドで書き込む（append は Tk スレッドから呼んでもすぐ戻る）。
+    - ブックは最初に 1 回だけ開き、以後はメモリ上のブックに追記する。未保存の行が
+      EXCEL_FLUSH_ROWS 行（ファイルが大きければその行数の半分）溜まるか、EXCEL_FLUSH_SECONDS 秒経ったら保存する。
+      close() / プロセス終了時にも保存する
+    - 1 ファイル EXCEL_MAX_ROWS 行を超えたら xxx_2.xlsx, xxx_3.xlsx ... に切り替える
+    - export() は write_only モードでの一括書き出し（大量の行向け）
+    """
+    HEADER = list(RecordSink.FIELDS)
+
+    def __init__(self, path, flush_rows=EXCEL_FLUSH_ROWS, flush_seconds=EXCEL_FLUSH_SECONDS,
+                 max_rows=EXCEL_MAX_ROWS):
+        self.path = path
+        self.flush_rows = flush_rows
+        self.flush_seconds = flush_seconds
+        self.max_rows = max_rows
+        self._q = queue.Queue()
+        self._wb = None
+        self._ws = None
+        self._part = 0            # 書き込み中のファイル番号（1 = path そのもの）
+        self._rows_in_file = 0    # 書き込み中のファイルのデータ行数
+        self._pending = 0         # 未保存の行数
+        self._since_try = 0       # 最後に保存を試みてから追記した行数
+        self._written = 0
+        self._saves = 0
+        self._save_s = 0.0
+        self._closed = False
+        self._thread = None
+        if openpyxl is None:
+            return
+        self._thread = threading.Thread(target=self._run, name="excel-writer", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    # ---- 呼び出し側 API ----
+    def append(self, row):
+        if openpyxl is None:
+            print("openpyxl not installed: skipping excel save")
+            return
+        if self._closed:
+            print("Excel writer is closed: row dropped")
+            return
+        self._q.put(("row", list(row)))
+
+    def flush(self, timeout=None) -> bool:
+        """溜まっている行を今すぐ保存する（保存が終わるまで最大 timeout 秒待つ）"""
+        if self._thread is None or self._closed:
+            return False
+        done = threading.Event()
+        self._q.put(("flush", done))
+        return done.wait(timeout)
+
+    def close(self, timeout=30.0):
+        """残りを保存して書き込みスレッドを止める（何度呼んでもよい）"""
+        if self._thread is None or self._closed:
+            return
+        self._closed = True
+        done = threading.Event()
+        self._q.put(("close", done))
+        done.wait(timeout)
+
+    def stats(self) -> dict:
+        return {
+            "file": self._part_path(max(self._part, 1)),
+            "rows": self._written,
+            "rows_in_file": self._rows_in_file,
+            "pending": self._pending,
+            "saves": self._saves,
+            "save_ms_avg": round(self._save_s * 1000 / self._saves, 1) if self._saves else 0.0,
+        }
+
+    @classmethod
+    def export(cls, rows, path, max_rows=EXCEL_MAX_ROWS) -> int:
+        """
+        rows を write_only モードで path に一括書き出す（セルを溜めずに順に書くので大量でも速い）。
+        max_rows 行毎に data, data_2, ... とシートを分ける。書いた行数を返す。
+        """
+        wb = Workbook(write_only=True)
+        ws = None
+        n = 0
+        for row in rows:
+            if n % max_rows == 0:
+                ws = wb.create_sheet("data" if n == 0 else f"data_{n // max_rows + 1}")
+                ws.append(cls.HEADER)
+            ws.append(_excel_cells(row))
+            n += 1
+        if ws is None:
+            wb.create_sheet("data").append(cls.HEADER)
+        wb.save(path)
+        return n
+
+    # ---- 書き込みスレッド ----
+    def _run(self):
+        deadline = None
+        while True:
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                kind, item = self._q.get(timeout=timeout)
+            except queue.Empty:
+                kind, item = "timer", None
+            try:
+                if kind == "row":
+                    self._write_row(item)
+                    # ファイルが大きいほど保存 1 回が重いので、保存間隔も行数に比例して広げる
+                    if self._since_try >= max(self.flush_rows, self._rows_in_file // 2):
+                        self._save()
+                        deadline = None
+                    elif deadline is None:
+                        deadline = time.monotonic() + self.flush_seconds
+                else:
+                    self._save()
+                    deadline = None
+            except Exception as e:
+                # 想定外のエラーでもスレッドは止めない（書けなかった行はブックに残り、次の保存で書く）
+                print("Excel writer error:", e)
+            if kind in ("flush", "close"):
+                item.set()
+                if kind == "close":
+                    return
+
+    def _part_path(self, part: int) -> str:
+        if part <= 1:
+            return self.path
+        root, ext = os.path.splitext(self.path)
+        return f"{root}_{part}{ext}"
+
+    def _open(self, part: int):
+        """part 番目のファイルを開く（満杯なら次の番号へ進む）。無ければヘッダだけのブックを作る"""
+        while True:
+            path = self._part_path(part)
+            if not os.path.exists(path):
+                wb = Workbook()
+                ws = wb.active
+                ws.title = "data"
+                ws.append(self.HEADER)
+                self._wb, self._ws, self._part, self._rows_in_file = wb, ws, part, 0
+                return
+            try:
+                # 行数だけなら read_only で速く分かる（満杯のファイルは丸ごと読み込まない）
+                ro = openpyxl.load_workbook(path, read_only=True)
+                rows = max((ro["data"] if "data" in ro.sheetnames else ro.active).max_row - 1, 0)
+                ro.close()
+                if rows < self.max_rows:
+                    wb = openpyxl.load_workbook(path)
+                    ws = wb["data"] if "data" in wb.sheetnames else wb.active
+                    self._wb, self._ws, self._part, self._rows_in_file = wb, ws, part, rows
+                    return
+            except Exception as e:
+                print("Excel open error:", path, e)
+            part += 1
+
+    def _write_row(self, row):
+        if self._wb is None:
+            self._open(1)
+        elif self._rows_in_file >= self.max_rows and self._save():
+            # 保存できたときだけ次のファイルへ。失敗したら今のブックに追記を続け、次の保存で書く
+            self._open(self._part + 1)
+        self._ws.append(_excel_cells(row))
+        self._rows_in_file += 1
+        self._pending += 1
+        self._since_try += 1
+        self._written += 1
+
+    def _save(self) -> bool:
+        """未保存の行を書く。保存済み（または書くものが無い）なら True、失敗したら False"""
+        if self._wb is None or not self._pending:
+            return True
+        self._since_try = 0
+        t0 = time.perf_counter()
+        try:
+            self._wb.save(self._part_path(self._part))
+            self._pending = 0
+        except Exception as e:
+            # Excel でファイルを開いている等。行はメモリに残し、次の保存で書く
+            print("Excel write error:", e)
+            return False
+        self._saves += 1
+        self._save_s += time.perf_counter() - t0
+        return True
+
+def _excel_cells(row) -> list:
+    """セルに書けない制御文字を落とす（1 行のせいでまとめて保存に失敗しないように）"""
+    return [ILLEGAL_CHARACTERS_RE.sub("", v) if isinstance(v, str) else v for v in row]
+
+def benchmark_excel(n=10000, directory=".") -> dict:
+    """
+    n 件の要約行を書き出す時間（秒）。"append" は ExcelWriter.append → close、"export" は write_only の一括出力。
+    例: python jw_search_app_v12_edge_fixed10.py --bench-excel 10000（fixed9 も同じ）
+    """
+    body = "\n".join(["これはベンチマーク用の本文です。神の王国について学びます。"] * 40)
+    rows = [[datetime.now().isoformat(), f"{BASE_DOMAIN}/ja/d/{i:09d}/", f"記事 {i}", body[:120], body]
+            for i in range(n)]
+    results = {}
+    t0 = time.perf_counter()
+    w = ExcelWriter(os.path.join(directory, "bench_append.xlsx"))
+    for row in rows:
+        w.append(row)
+    w.close(timeout=None)
+    results["append_s"] = round(time.perf_counter() - t0, 2)
+    results["append"] = w.stats()
+    t0 = time.perf_counter()
+    ExcelWriter.export(rows, os.path.join(directory, "bench_export.xlsx"))
+    results["export_s"] = round(time.perf_counter() - t0, 2)
+    return results
+
+# ----------------------------
+# 逐次エクスポート（JSONL / CSV）
+# ----------------------------
+class StreamSink(RecordSink):
+    """
+    追記専用のテキストファイルへ 1 レコード = 1 回の write で書く（1 件 O(1)、書き直しは無い）。
+    append の度に flush するので、下流は tail -f（gzip なら zcat）で届いた順に読める。
+    fsync=True なら 1 件ごとに fsync する（電源断でも書いた行が残る代わりに遅い）。
+    truncate=True なら既存の内容を捨てて書き始める（一括出力用）。
+    path が .gz で終わる（または gzip=True）なら gzip で圧縮する（追記ごとに gzip メンバーが増える）。
+    複数スレッドから append してよい。
+    """
+    def __init__(self, path, fsync=EXPORT_FSYNC, gzip_output=None, truncate=False):
+        self.path = path
+        self.fsync = fsync
+        self.gzip = path.endswith(".gz") if gzip_output is None else gzip_output
+        self._lock = threading.Lock()
+        self._records = 0
+        self._bytes = 0
+        is_new = truncate or not os.path.exists(path) or os.path.getsize(path) == 0
+        self._raw = open(path, "wb" if truncate else "ab")
+        self._f = gzip.GzipFile(fileobj=self._raw, mode="ab") if self.gzip else self._raw
+        if is_new:
+            self._write(self.header())
+
+    def header(self) -> str:
+        """新しいファイルの先頭に書く文字列（無ければ空）"""
+        return ""
+
+    @abstractmethod
+    def encode(self, row) -> str:
+        """1 レコードをファイルに書く文字列（改行込み）にする"""
+
+    def _write(self, text: str):
+        if not text:
+            return
+        data = text.encode("utf-8")
+        self._f.write(data)
+        self._f.flush()          # gzip は Z_SYNC_FLUSH（ここまでで展開できる）
+        if self._f is not self._raw:
+            self._raw.flush()
+        if self.fsync:
+            os.fsync(self._raw.fileno())
+        self._bytes += len(data)
+
+    def append(self, row):
+        text = self.encode(row)
+        with self._lock:
+            if self._f is None:
+                print(f"{self.path} is closed: record dropped")
+                return
+            try:
+                self._write(text)
+                self._records += 1
+            except Exception as e:
+                print("export write error:", self.path, e)
+
+    def close(self):
+        with self._lock:
+            f, self._f = self._f, None
+            if f is None:
+                return
+            try:
+                f.close()
+                if f is not self._raw:
+                    self._raw.close()
+            except Exception as e:
+                print("export close error:", self.path, e)
+
+    def stats(self) -> dict:
+        return {"file": self.path, "records": self._records, "bytes": self._bytes}
+
+
+class JsonlSink(StreamSink):
+    """1 行 1 レコードの JSON（JSON Lines）"""
+    def encode(self, row) -> str:
+        return json.dumps(dict(zip(self.FIELDS, row)), ensure_ascii=False) + "\n"
+
+
+class CsvSink(StreamSink):
+    """ヘッダ付き CSV（本文の改行はクォートされるので、1 レコードが複数行になることがある）"""
+    def header(self) -> str:
+        return self.encode(self.FIELDS)
+
+    def encode(self, row) -> str:
+        buf = io.StringIO()
+        csv.writer(buf).writerow(row)
+        return buf.getvalue()
+
+
+class MultiSink(RecordSink):
+    """複数の出力先へ同じレコードを書く"""
+    def __init__(self, sinks):
+        self.sinks = list(sinks)
+
+    def append(self, row):
+        for sink in self.sinks:
+            sink.append(row)
+
+    def flush(self, timeout=None) -> bool:
+        return all([sink.flush(timeout) for sink in self.sinks])
+
+    def close(self):
+        for sink in self.sinks:
+            sink.close()
+
+    def stats(self) -> dict:
+        return {type(sink).__name__: sink.stats() for sink in self.sinks}
+
+STREAM_SINKS = {"jsonl": JsonlSink, "csv": CsvSink}
+
+def open_record_sink(base, formats=EXPORT_STREAM_FORMATS, gzip_output=EXPORT_GZIP,
+                     fsync=EXPORT_FSYNC) -> MultiSink:
+    """formats（"jsonl" / "csv"）毎に base + 拡張子（gzip なら .gz 付き）の逐次出力先を開く"""
+    sinks = []
+    for fmt in formats:
+        path = f"{base}.{fmt}" + (".gz" if gzip_output else "")
+        try:
+            sinks.append(STREAM_SINKS[fmt](path, fsync=fsync, gzip_output=gzip_output))
+        except Exception as e:
+            print("export sink open failed:", path, e)
+    return MultiSink(sinks)
+
+# 一括出力のファイル種別（filedialog 用）
+EXPORT_FILETYPES = [("Excel", "*.xlsx"), ("JSON Lines", "*.jsonl *.jsonl.gz"), ("CSV", "*.csv *.csv.gz")]
+
+def export_records(rows, path) -> int:
+    """rows をファイル形式（拡張子: .xlsx / .jsonl / .csv、各 .gz 可）に合わせて一括出力し、件数を返す"""
+    name = path[:-3] if path.endswith(".gz") else path
+    ext = os.path.splitext(name)[1].lower().lstrip(".")
+    if ext not in STREAM_SINKS:
+        return ExcelWriter.export(rows, path)
+    sink = STREAM_SINKS[ext](path, fsync=False, truncate=True)
+    n = 0
+    try:
+        for row in rows:
+            sink.append(row)
+            n += 1
+    finally:
+        sink.close()
+    return n
+
+# ----------------------------
+# Edge WebDriver プール — 事前起動 / 貸し出し / ヘルスチェック
+# ----------------------------
+class EdgeDriverPool:
+    """
+    起動済みの Edge を最大 size 台まで保持し、検索・フォールバック取得に貸し出す。
+    - prewarm() で N 台を先に起動しておく（起動コストはプロセスで 1 回）
+    - 貸し出し時にヘルスチェックし、死んだ / チャレンジページで止まった driver は作り直す
+    - metrics() で台数と貸し出し待ち時間を返す
+    Edge の起動方法はアプリごとに違うので、factory(slot) を渡すか、サブクラスで _default_factory を実装する。
+    チャレンジページの判定はサブクラスで challenge_selector を上書きする。
+    """
+    challenge_selector = CHALLENGE_SELECTOR
+
+    def __init__(self, size=DRIVER_POOL_SIZE, headed=True, factory=None, profile="default"):
+        self.size = size
+        self.headed = headed
+        self.profile = profile
+        self.factory = factory or self._default_factory
+        self._idle = []
+        self._slots = {}                       # driver → slot
+        self._free_slots = list(range(size))
+        self._cond = threading.Condition()
+        self._closed = False
+        self.created = 0
+        self.replaced = 0
+        self.leases = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def _default_factory(self, slot):
+        raise NotImplementedError("EdgeDriverPool: factory を渡すか _default_factory を実装する")
+
+    def _create(self, slot):
+        driver = self.factory(slot)
+        with self._cond:
+            if not self._closed:
+                self._slots[driver] = slot
+                self.created += 1
+                return driver
+        # close() が起動中に呼ばれた: プールに入れずに終了する
+        try:
+            driver.quit()
+        except Exception:
+            pass
+        raise RuntimeError("EdgeDriverPool: closed")
+
+    def _discard(self, driver):
+        try:
+            driver.quit()
+        except Exception:
+            pass
+        with self._cond:
+            slot = self._slots.pop(driver, None)
+            if slot is not None:
+                self._free_slots.append(slot)
+            self._cond.notify()
+
+    def is_healthy(self, driver) -> bool:
+        """セッションが生きていて、チャレンジページで止まっていなければ True"""
+        try:
+            stuck = driver.execute_script("return !!document.querySelector(arguments[0])", self.challenge_selector)
+            return not stuck
+        except Exception:
+            return False
+
+    def prewarm(self, n=DRIVER_POOL_PREWARM):
+        """n 台をバックグラウンドで起動してプールに入れておく"""
+        def run():
+            for _ in range(n):
+                with self._cond:
+                    if self._closed or not self._free_slots:
+                        return
+                    slot = self._free_slots.pop(0)
+                try:
+                    driver = self._create(slot)
+                except Exception as e:
+                    print("driver prewarm failed:", e)
+                    with self._cond:
+                        self._free_slots.append(slot)
+                        self._cond.notify()
+                    return
+                with self._cond:
+                    self._idle.append(driver)
+                    self._cond.notify()
+        threading.Thread(target=run, name="driver-prewarm", daemon=True).start()
+
+    def acquire(self, timeout=DRIVER_LEASE_TIMEOUT):
+        """空いている driver を借りる。無ければ size 台まで新規起動し、それも無理なら timeout 秒待つ"""
+        t0 = time.monotonic()
+        deadline = t0 + timeout
+        while True:
+            driver = slot = None
+            with self._cond:
+                while not self._closed and not self._idle and not self._free_slots:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise TimeoutError("EdgeDriverPool: lease timeout")
+                    self._cond.wait(remaining)
+                if self._closed:
+                    raise RuntimeError("EdgeDriverPool: closed")
+                if self._idle:
+                    driver = self._idle.pop()
+                else:
+                    slot = self._free_slots.pop(0)
+            if driver is None:
+                try:
+                    driver = self._create(slot)
+                except Exception:
+                    with self._cond:
+                        self._free_slots.append(slot)
+                        self._cond.notify()
+                    raise
+            elif not self.is_healthy(driver):
+                print("EdgeDriverPool: unhealthy driver replaced")
+                with self._cond:
+                    self.replaced += 1
+                self._discard(driver)
+                continue
+            waited = time.monotonic() - t0
+            with self._cond:
+                self.leases += 1
+                self.wait_total += waited
+                self.wait_max = max(self.wait_max, waited)
+            return driver
+
+    def release(self, driver, broken=False):
+        with self._cond:
+            if not broken and not self._closed:
+                self._idle.append(driver)
+                self._cond.notify()
+                return
+        self._discard(driver)
+
+    @contextmanager
+    def lease(self, timeout=DRIVER_LEASE_TIMEOUT):
+        """with pool.lease() as driver: ...  （WebDriver 例外で壊れていれば返却時に破棄）"""
+        driver = self.acquire(timeout)
+        broken = False
+        try:
+            yield driver
+        except WebDriverException:
+            broken = not self.is_healthy(driver)
+            raise
+        finally:
+            self.release(driver, broken=broken)
+
+    def metrics(self) -> dict:
+        with self._cond:
+            started = len(self._slots)
+            return {
+                "size": self.size,
+                "started": started,
+                "idle": len(self._idle),
+                "in_use": started - len(self._idle),
+                "created": self.created,
+                "replaced": self.replaced,
+                "leases": self.leases,
+                "avg_lease_wait": round(self.wait_total / self.leases, 3) if self.leases else 0.0,
+                "max_lease_wait": round(self.wait_max, 3),
+            }
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._cond.notify_all()
+        for driver in idle:
+            self._discard(driver)
+
+# ----------------------------
+# 記事本文の永続キャッシュ（SQLite） — セッション跨ぎ / TTL / LRU サイズ上限
+# ----------------------------
+class ArticleDiskCache:
+    """
+    記事本文の永続キャッシュ。正規化 URL（jw_urls.canonicalize_url）と docid（extract_docid_from_url）の両方で引ける。
+    - ttl 秒を過ぎたエントリはミス扱い
+    - 合計サイズが max_bytes を超えたら最終アクセスの古い順（LRU）に削除
+    - hits / misses / evictions を数える
+    - ヒット時の accessed_at はメモリに溜め、一定間隔・件数ごと、または put / mark_fresh / close で
+      まとめて書く（読むたびに UPDATE しない）
+    sqlite3 接続は 1 本をロックで共有する（check_same_thread=False）
+    """
+    def __init__(self, path, ttl=ARTICLE_CACHE_TTL, max_bytes=ARTICLE_CACHE_MAX_BYTES,
+                 touch_flush_seconds=ARTICLE_CACHE_TOUCH_FLUSH_SECONDS, touch_flush_rows=ARTICLE_CACHE_TOUCH_FLUSH_ROWS):
+        self.path = path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.touch_flush_seconds = touch_flush_seconds
+        self.touch_flush_rows = touch_flush_rows
+        self._touched = {}       # url -> accessed_at (not yet written)
+        self._touch_flushed = time.monotonic()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.revalidated = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS articles ("
+            " url TEXT PRIMARY KEY, docid INTEGER, title TEXT, body TEXT,"
+            " size INTEGER, fetched_at REAL, accessed_at REAL, etag TEXT, last_modified TEXT)"
+        )
+        cols = {r[1] for r in self._conn.execute("PRAGMA table_info(articles)")}
+        for col in ("etag", "last_modified"):
+            if col not in cols:
+                self._conn.execute(f"ALTER TABLE articles ADD COLUMN {col} TEXT")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_articles_docid ON articles(docid)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_articles_accessed ON articles(accessed_at)")
+        if self._conn.execute("PRAGMA user_version").fetchone()[0] < 2:
+            self._migrate_keys()
+        self._total_bytes = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM articles").fetchone()[0]
+
+    def _migrate_keys(self):
+        """
+        古いキー（version 1 までの独自の正規化: 末尾スラッシュを落とす・計測用クエリを残す）と docid
+        （version 0 はパス途中の長い数字も docid にしていた）を canonicalize_url / extract_docid_from_url で
+        付け直す。同じキーになった行は fetched_at の新しいものを残す。
+        """
+        rows = self._conn.execute("SELECT url, docid FROM articles ORDER BY fetched_at DESC").fetchall()
+        keep = {}         # 新しいキー -> 残す行の url
+        drop = []
+        for url, docid in rows:
+            key = canonicalize_url(url)
+            if key in keep:
+                drop.append((url,))
+            else:
+                keep[key] = (url, docid)
+        self._conn.execute("BEGIN")
+        self._conn.executemany("DELETE FROM articles WHERE url=?", drop)
+        # canonicalize_url は冪等なので、付け直し先のキーを持つ行は同じグループで既に消えている
+        self._conn.executemany(
+            "UPDATE articles SET url=?, docid=? WHERE url=?",
+            [(key, extract_docid_from_url(key), url) for key, (url, docid) in keep.items()
+             if key != url or extract_docid_from_url(key) != docid])
+        self._conn.execute("PRAGMA user_version=2")
+        self._conn.execute("COMMIT")
+
+    def _lookup(self, url):
+        key = canonicalize_url(url)
+        row = self._conn.execute(
+            "SELECT url, title, body, fetched_at FROM articles WHERE url=?", (key,)
+        ).fetchone()
+        if row is None:
+            docid = extract_docid_from_url(key)
+            if docid is not None:
+                row = self._conn.execute(
+                    "SELECT url, title, body, fetched_at FROM articles WHERE docid=?"
+                    " ORDER BY fetched_at DESC LIMIT 1", (docid,)
+                ).fetchone()
+        return row
+
+    def get(self, url: str):
+        """(title, body) を返す。無い / 期限切れなら None"""
+        with self._lock:
+            row = self._lookup(url)
+            if row is None or (self.ttl and time.time() - row[3] > self.ttl):
+                self.misses += 1
+                return None
+            # accessed_at は LRU の順序にしか使わないので、書き込みはまとめて遅らせてよい
+            self._touched[row[0]] = time.time()
+            if (len(self._touched) >= self.touch_flush_rows
+                    or time.monotonic() - self._touch_flushed >= self.touch_flush_seconds):
+                self._flush_touches()
+            self.hits += 1
+            return row[1], row[2]
+
+    def _flush_touches(self):
+        """溜まった accessed_at の更新を 1 トランザクションで書く（self._lock を持って呼ぶ）"""
+        self._touch_flushed = time.monotonic()
+        if not self._touched:
+            return
+        touched, self._touched = self._touched, {}
+        self._conn.execute("BEGIN")
+        self._conn.executemany("UPDATE articles SET accessed_at=? WHERE url=?",
+                               [(at, url) for url, at in touched.items()])
+        self._conn.execute("COMMIT")
+
+    def get_entry(self, url: str):
+        """期限切れでも行を返す（再検証用）: {url, title, body, etag, last_modified} / 無ければ None"""
+        with self._lock:
+            key = canonicalize_url(url)
+            row = self._conn.execute(
+                "SELECT url, title, body, etag, last_modified FROM articles WHERE url=?", (key,)
+            ).fetchone()
+            if row is None:
+                docid = extract_docid_from_url(key)
+                if docid is not None:
+                    row = self._conn.execute(
+                        "SELECT url, title, body, etag, last_modified FROM articles WHERE docid=?"
+                        " ORDER BY fetched_at DESC LIMIT 1", (docid,)
+                    ).fetchone()
+            if row is None:
+                return None
+            return {"url": row[0], "title": row[1], "body": row[2], "etag": row[3], "last_modified": row[4]}
+
+    def mark_fresh(self, url: str):
+        """304 Not Modified を受けたエントリの鮮度を更新する"""
+        now = time.time()
+        with self._lock:
+            self._flush_touches()
+            self._conn.execute("UPDATE articles SET fetched_at=?, accessed_at=? WHERE url=?",
+                               (now, now, canonicalize_url(url)))
+            self.revalidated += 1
+
+    def put(self, url: str, title: str, body: str, etag=None, last_modified=None):
+        if not body:
+            return
+        key = canonicalize_url(url)
+        size = len((title or "").encode("utf-8")) + len(body.encode("utf-8"))
+        now = time.time()
+        with self._lock:
+            # 下の削除は accessed_at 順なので、溜まっている更新を先に書く
+            self._flush_touches()
+            old = self._conn.execute("SELECT size FROM articles WHERE url=?", (key,)).fetchone()
+            # etag / last_modified を渡さない put は既存の値を残す
+            self._conn.execute(
+                "INSERT INTO articles (url, docid, title, body, size, fetched_at, accessed_at, etag, last_modified)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)"
+                " ON CONFLICT(url) DO UPDATE SET docid=excluded.docid, title=excluded.title,"
+                " body=excluded.body, size=excluded.size, fetched_at=excluded.fetched_at,"
+                " accessed_at=excluded.accessed_at,"
+                " etag=COALESCE(excluded.etag, articles.etag),"
+                " last_modified=COALESCE(excluded.last_modified, articles.last_modified)",
+                (key, extract_docid_from_url(key), title or "", body, size, now, now, etag, last_modified)
+            )
+            self._total_bytes += size - (old[0] if old else 0)
+            self._evict()
+
+    def _evict(self):
+        # LRU: accessed_at の古い順に max_bytes を下回るまで削除
+        while self.max_bytes and self._total_bytes > self.max_bytes:
+            rows = self._conn.execute(
+                "SELECT url, size FROM articles ORDER BY accessed_at LIMIT 64"
+            ).fetchall()
+            if not rows:
+                self._total_bytes = 0
+                break
+            for url, size in rows:
+                self._conn.execute("DELETE FROM articles WHERE url=?", (url,))
+                self._total_bytes -= size
+                self.evictions += 1
+                if self._total_bytes <= self.max_bytes:
+                    break
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM articles").fetchone()[0]
+            total = self.hits + self.misses
+            return {
+                "entries": entries,
+                "bytes": self._total_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits / total) if total else 0.0,
+                "evictions": self.evictions,
+                "revalidated": self.revalidated,
+            }
+
+    def close(self):
+        with self._lock:
+            try:
+                self._flush_touches()
+                self._conn.close()
+            except Exception:
+                pass
+
+def conditional_headers(entry):
+    """永続キャッシュの行（get_entry）から条件付き GET のヘッダを作る。行も検証子も無ければ None"""
+    if not entry:
+        return None
+    headers = {}
+    if entry["etag"]:
+        headers["If-None-Match"] = entry["etag"]
+    if entry["last_modified"]:
+        headers["If-Modified-Since"] = entry["last_modified"]
+    return headers or None
+
+# ----------------------------
+# 記事本文のメモリキャッシュ — バイト数上限 / LRU / 追い出し分は永続キャッシュへ退避
+# ----------------------------
+# 本文の圧縮方式（標準ライブラリのみ）: 名前 -> (compress, decompress)
+BODY_CODECS = {
+    "zlib": (lambda data: zlib.compress(data, 6), zlib.decompress),
+    "lzma": (lzma.compress, lzma.decompress),
+}
+
+class ArticleMemoryCache:
+    """
+    URL → (title, body) のスレッドセーフなメモリキャッシュ。
+    - 上限は件数ではなくバイト数（sys.getsizeof による str の実サイズ）で max_bytes まで
+    - 超えたら最後に使ってから最も古いもの（LRU）から追い出す
+    - spill（ArticleDiskCache）があれば、追い出した本文がまだ無い場合は書き出し、
+      メモリで外れたときもそこから引き直す
+    - compression を指定すると本文は圧縮 bytes で保持し、get() された時だけ展開する
+      （圧縮率と展開時間は stats() に出る）
+    - hits / misses / evictions / spilled / spill_hits を数える
+    """
+    def __init__(self, max_bytes=ARTICLE_MEMORY_CACHE_BYTES, spill=None, compression=ARTICLE_MEMORY_COMPRESSION):
+        if compression is not None and compression not in BODY_CODECS:
+            raise ValueError(f"unknown compression: {compression}")
+        self.max_bytes = max_bytes
+        self.spill = spill
+        self.compression = compression
+        self.raw_bytes = 0          # 保持中の本文を str のまま持った場合のサイズ
+        self.compress_seconds = 0.0
+        self.decompressions = 0
+        self.decompress_seconds = 0.0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.spilled = 0
+        self.spill_hits = 0
+        self._data = OrderedDict()   # url -> (title, stored_body, size, raw_size)
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def _pack(self, body):
+        """本文 → 保持する形（compression があれば圧縮 bytes）"""
+        body = body or ""
+        if self.compression is None:
+            return body
+        t0 = time.perf_counter()
+        blob = BODY_CODECS[self.compression][0](body.encode("utf-8"))
+        elapsed = time.perf_counter() - t0
+        with self._lock:
+            self.compress_seconds += elapsed
+        return blob
+
+    def _unpack(self, stored):
+        """保持している形 → 本文。参照された時にだけ展開する"""
+        if isinstance(stored, str):
+            return stored
+        t0 = time.perf_counter()
+        body = BODY_CODECS[self.compression][1](stored).decode("utf-8")
+        elapsed = time.perf_counter() - t0
+        with self._lock:
+            self.decompressions += 1
+            self.decompress_seconds += elapsed
+        return body
+
+    def get(self, url: str):
+        """(title, body) を返す。無ければ None"""
+        with self._lock:
+            entry = self._data.get(url)
+            if entry is not None:
+                self._data.move_to_end(url)
+                self.hits += 1
+            else:
+                self.misses += 1
+        if entry is not None:
+            return entry[0], self._unpack(entry[1])
+        if self.spill is not None:
+            hit = self.spill.get(url)
+            if hit is not None:
+                with self._lock:
+                    self.spill_hits += 1
+                self._store(url, hit[0], hit[1])
+                return hit
+        return None
+
+    def __contains__(self, url) -> bool:
+        with self._lock:
+            return url in self._data
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._data)
+
+    def put(self, url: str, title: str, body: str, persist=False):
+        """persist=True なら追い出しを待たずに spill にも書く"""
+        self._store(url, title, body)
+        if persist and body and self.spill is not None:
+            self.spill.put(url, title, body)
+
+    def _store(self, url, title, body):
+        # 圧縮は CPU 処理なのでロックの外で行う
+        stored = self._pack(body)
+        raw_size = sys.getsizeof(body or "")
+        size = sys.getsizeof(url) + sys.getsizeof(title or "") + sys.getsizeof(stored)
+        evicted = []
+        with self._lock:
+            old = self._data.pop(url, None)
+            if old is not None:
+                self._bytes -= old[2]
+                self.raw_bytes -= old[3]
+            self._data[url] = (title, stored, size, raw_size)
+            self._bytes += size
+            self.raw_bytes += raw_size
+            while self._bytes > self.max_bytes and len(self._data) > 1:
+                old_url, (old_title, old_stored, old_size, old_raw) = self._data.popitem(last=False)
+                self._bytes -= old_size
+                self.raw_bytes -= old_raw
+                self.evictions += 1
+                evicted.append((old_url, old_title, old_stored))
+        # 退避は SQLite 書き込みなのでロックの外で行う
+        for old_url, old_title, old_stored in evicted:
+            self._spill(old_url, old_title, old_stored)
+
+    def _spill(self, url, title, stored):
+        if self.spill is None or not stored:
+            return
+        try:
+            if self.spill.get_entry(url) is None:
+                self.spill.put(url, title, self._unpack(stored))
+                with self._lock:
+                    self.spilled += 1
+        except Exception as e:
+            print("article spill failed:", e)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+            self.raw_bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._data),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits / total) if total else 0.0,
+                "evictions": self.evictions,
+                "spilled": self.spilled,
+                "spill_hits": self.spill_hits,
+                "compression": self.compression,
+                "raw_bytes": self.raw_bytes,
+                "ratio": round(self.raw_bytes / self._bytes, 2) if self._bytes else 0.0,
+                "compress_ms_total": round(self.compress_seconds * 1000, 1),
+                "decompressions": self.decompressions,
+                "decompress_ms_avg": round(self.decompress_seconds * 1000 / self.decompressions, 3)
+                                     if self.decompressions else 0.0,
+            }
@@ -8,21 +8,43 @@ class JWOrgSearcher:
     """
     JW.org の公式検索ページ（/ja/search/?q=...）を直接開いて
     rel/date の各モードで URL を収集するシンプルなクラス。
-    make_edge_driver を使って Edge を起動します。
+    まず requests だけで結果ページを取得し（http_search_collect）、
+    チャレンジページ等で取れないときだけ Edge にフォールバックします。
+    Edge は EdgeDriverPool（get_driver_pool）から収集の間だけ借ります。
+    profile="fast" なら画像等を遮断した headless の軽量 Edge を使います（make_edge_driver 参照）。
+    headless ではチャレンジを解けないので、headed=True のときはチャレンジに当たった時点で
+    表示ありの通常 Edge（profile="default"）で開き直します（_edge_batches）。
     """
-    def __init__(self, headed=True):
-        # make_edge_driver は fixed10 の Part1 にある関数です
-        try:
-            self.driver = make_edge_driver(headed=headed)
-        except Exception:
-            # 最低限の起動方法（フォールバック）
-            service = Service(EDGE_DRIVER_PATH)
-            opts = Options()
-            opts.use_chromium = True
-            self.driver = webdriver.Edge(service=service, options=opts)
-        # 少し余裕を持たせる
-        self.driver.set_window_size(1200, 900)
-        print("JWOrgSearcher: Edge 起動完了")
+    def __init__(self, headed=True, use_http=True, parallel=True, profile=None):
+        self.headed = headed
+        self.use_http = use_http
+        self.parallel = parallel
+        self.profile = profile or SEARCHER_DRIVER_PROFILE
+        self.pool = get_driver_pool(headed, self.profile)
+
+    def _edge_batches(self, keyword, mode, max_items, cancel=None):
+        """
+        Edge で mode の検索結果を jw_search_iter のバッチのまま yield する。
+        fast（headless）でチャレンジに当たり headed=True なら、表示ありの Edge で最初から開き直す
+        （取れたページは SearchPageCache から返るので開き直さない。重複は呼び出し側で除く）。
+        """
+        pools = [self.pool]
+        if self.headed and self.pool.profile != "default":
+            pools.append(get_driver_pool(True, "default"))
+        for i, pool in enumerate(pools):
+            wait = SEARCH_CHALLENGE_SOLVE_TIMEOUT if i else 0
+            with pool.lease() as driver:
+                state = yield from jw_search_iter(driver, keyword, mode, max_items, cancel, challenge_wait=wait)
+            print("[driver pool]", pool.metrics())
+            if state != "challenge" or i + 1 == len(pools):
+                return
+            print(f"[JW.org] {mode}: headless の Edge でチャレンジ → 表示ありの Edge で開き直します（手動で解いてください）")
+
+    def _selenium_collect(self, keyword, mode, max_items):
+        seen = ArticleUrlSet()
+        urls = [href for batch in self._edge_batches(keyword, mode, max_items) for href in seen.merge(batch)]
+        print("[waits]", wait_timings.summary())
+        return urls
 
     def collect(self, keyword: str, mode: str, max_items: int):
         """
@@ -31,13 +53,127 @@ class JWOrgSearcher:
         """
         if mode not in ("relevance", "date"):
             mode = "relevance"
-        return jw_search_collect(self.driver, keyword, mode, max_items=max_items)
+        if self.use_http:
+            urls = http_search_collect(keyword, mode, max_items=max_items)
+            if urls is not None:
+                return urls
+            print("[JW.org] HTTP で結果を取得できません（チャレンジ/JS描画）→ Edge にフォールバック")
+        return self._selenium_collect(keyword, mode, max_items)
+
+    def collect_all(self, keyword: str, plan: dict):
+        """
+        plan = {"relevance": n, "date": m} をまとめて収集し {mode: [url, ...]} を返す。
+        parallel=True なら両モードの全ページを同時に取得する。
+        """
+        if not (self.use_http and self.parallel):
+            return {mode: self.collect(keyword, mode, n) for mode, n in plan.items()}
+        results = http_search_collect_parallel(keyword, plan)
+        for mode, n in plan.items():
+            if results.get(mode) is None:
+                print(f"[JW.org] {mode}: HTTP で結果を取得できません → Edge にフォールバック")
+                results[mode] = self._selenium_collect(keyword, mode, n)
+        return results
+
+    def _http_page_events(self, keyword: str, plan: dict, stopped: set, cancel=None):
+        """
+        HTTP で取った検索結果ページを (mode, state, links) で yield する（モード内はページ順）。
+        parallel=True なら全ページを先に投げておき、届いた順に返す。
+        stopped に入ったモードは以後のページを取り消す / 取りに行かない。
+        cancel（threading.Event）がセットされたら取得中のページもすべて取り消して終わる。
+        """
+        cancelled = lambda: cancel is not None and cancel.is_set()
+        cache = get_search_page_cache()
+        pages = {mode: max(1, (n + PAGE_STEP - 1) // PAGE_STEP) for mode, n in plan.items()}
+        if not self.parallel:
+            for mode in plan:
+                for i in range(pages[mode]):
+                    if mode in stopped or cancelled():
+                        break
+                    start = i * PAGE_STEP
+                    yield (mode,) + tuple(cache.get_or_load(keyword, mode, start,
+                                                            lambda: http_search_page(keyword, mode, start)))
+            return
 
-    def close(self):
+        fetcher = get_async_fetcher()
+        futs = {mode: [fetcher.submit(fetcher.cached_search_page(keyword, mode, i * PAGE_STEP))
+                       for i in range(pages[mode])] for mode in plan}
+        nxt = {mode: 0 for mode in plan}
         try:
-            self.driver.quit()
-        except:
-            pass
+            while not cancelled():
+                for mode in stopped:
+                    for f in futs.get(mode, [])[nxt.get(mode, 0):]:
+                        f.cancel()
+                live = [m for m in plan if m not in stopped and nxt[m] < len(futs[m])]
+                if not live:
+                    return
+                # 取り消しに素早く気付けるよう短い timeout で待つ
+                concurrent.futures.wait([futs[m][nxt[m]] for m in live], timeout=0.2,
+                                        return_when=concurrent.futures.FIRST_COMPLETED)
+                for m in live:
+                    while m not in stopped and nxt[m] < len(futs[m]) and futs[m][nxt[m]].done():
+                        f = futs[m][nxt[m]]
+                        nxt[m] += 1
+                        try:
+                            state, links = f.result()
+                        except (Exception, concurrent.futures.CancelledError):
+                            state, links = "error", []
+                        yield m, state, links
+        finally:
+            for fs in futs.values():
+                for f in fs:
+                    f.cancel()
+
+    def stream_all(self, keyword: str, plan: dict, cancel=None):
+        """
+        collect_all のストリーミング版。plan = {"relevance": n, "date": m} の結果を
+        ページが届く毎に (mode, [新しい url, ...]) で yield する（モード内の順位順は保つ）。
+        HTTP で取れないモードは Edge（jw_search_iter）にフォールバックする。
+        ジェネレータを閉じるか cancel（threading.Event）をセットすれば、
+        未取得ページは取り消され、Edge もプールに返る。
+        """
+        seen = {mode: ArticleUrlSet() for mode in plan}
+        counts = {mode: 0 for mode in plan}
+        fallback = []
+        if self.use_http:
+            stopped = set()
+            for mode, state, links in self._http_page_events(keyword, plan, stopped, cancel):
+                if state == "fallback":
+                    stopped.add(mode)
+                    fallback.append(mode)
+                    continue
+                if state != "ok":
+                    stopped.add(mode)
+                    continue
+                batch = []
+                for href in links:
+                    if counts[mode] + len(batch) >= plan[mode]:
+                        break
+                    rep, new = seen[mode].add(href)
+                    if new:
+                        batch.append(rep)
+                counts[mode] += len(batch)
+                if batch:
+                    yield mode, batch
+                if counts[mode] >= plan[mode]:
+                    stopped.add(mode)
+        else:
+            fallback = list(plan)
+
+        for mode in fallback:
+            if cancel is not None and cancel.is_set():
+                return
+            if self.use_http:
+                print(f"[JW.org] {mode}: HTTP で結果を取得できません → Edge にフォールバック")
+            # HTTP で取れたページは SearchPageCache に載っているので Edge では開き直さない
+            for urls in self._edge_batches(keyword, mode, plan[mode], cancel):
+                batch = seen[mode].merge(urls)
+                if batch:
+                    yield mode, batch
+            print("[waits]", wait_timings.summary())
+
+    def close(self):
+        # driver はプールの所有。終了時に close_driver_pools() でまとめて閉じる
+        pass
 
 # jw_search_app_v12_edge_fixed10.py — Part 1/4
 # JW.org 自動検索・抽出・要約アプリ v12 fixed10
@@ -49,15 +185,29 @@ class JWOrgSearcher:
 
 import os
 import re
+import sys
+import zlib
+import json
 import time
+import queue
 import random
+import asyncio
+import sqlite3
+import tempfile
 import threading
+import concurrent.futures
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from urllib.parse import urlparse, urljoin, quote
+from html.parser import HTMLParser
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
 
 import requests
-from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from bs4 import BeautifulSoup, SoupStrainer
 
 from selenium import webdriver
 from selenium.webdriver.edge.service import Service
@@ -65,13 +215,26 @@ from selenium.webdriver.edge.options import Options
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import WebDriverException, TimeoutException
+
+from jw_urls import ArticleUrlSet, article_urls, benchmark_url_classifier, classify_url
+import jw_common
+from jw_common import (ArticleDiskCache, ArticleMemoryCache, ExcelWriter, EXPORT_FILETYPES, benchmark_excel,
+                       conditional_headers, export_records, open_record_sink)
 
-# Optional Excel support
+# Optional C-backed HTML parser (無ければ html.parser を使う)
 try:
-    import openpyxl
-    from openpyxl import Workbook
+    import lxml
+    from lxml import etree as lxml_etree
 except Exception:
-    openpyxl = None
+    lxml = None
+    lxml_etree = None
+
+# Optional asyncio HTTP client (無ければ FetchClient をスレッドで使う)
+try:
+    import aiohttp
+except Exception:
+    aiohttp = None
 
 # ----------------------------
 # Configuration
@@ -85,8 +248,74 @@ HEADERS = {"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/
 MAX_PER_MODE = 50
 PAGE_STEP = 10
 SELENIUM_PAGE_TIMEOUT = 22
+# 出力・Edge プール・本文キャッシュの共通設定（行数・TTL・上限など）は jw_common.py
 EXCEL_PATH = "jw_extracted_fixed10.xlsx"
+# 収集した記事を 1 件ずつ追記する逐次出力（形式・gzip は jw_common.EXPORT_STREAM_FORMATS / EXPORT_GZIP）
+EXPORT_STREAM_BASE = "jw_extracted_fixed10"   # ファイル名（拡張子は形式ごとに付く）
 BACKGROUND_SLEEP = 0.12
+# HTTP 接続プール（keep-alive）設定
+HTTP_POOL_SIZE = 16          # ホスト毎に保持する接続数
+HTTP_RETRIES = 2             # 接続エラー / 5xx の再試行回数
+HTTP_RETRY_BACKOFF = 0.4     # 再試行の待機係数（0.4, 0.8, ...秒）
+# 本文の並列先読み設定（収集 → 取得 → 解析 のパイプライン）
+BODY_FETCH_WORKERS = 8       # 取得ステージの同時取得数の上限（AsyncFetcher のループ上のコルーチン数）
+BODY_PARSE_WORKERS = 2       # 解析ステージのワーカー数
+BODY_URL_QUEUE_SIZE = 64     # 収集 → 取得 のキュー上限（満杯なら収集側が待つ）
+BODY_PARSE_QUEUE_SIZE = 16   # 取得 → 解析 のキュー上限（満杯なら取得側が待つ）
+# 本文取得の優先度（小さいほど先）
+BODY_PRIORITY_INTERACTIVE = 0   # ダブルクリックで開いた行
+BODY_PRIORITY_VISIBLE = 1       # 表示中 / 選択中の行
+BODY_PRIORITY_BACKGROUND = 2    # 裏の先読み
+# "fast" ドライバプロファイル（検索結果・本文フォールバック用の軽量ブラウザ）
+FAST_PAGE_LOAD_TIMEOUT = 20
+# "none": driver.get は遷移を始めてすぐ戻る。DOMContentLoaded までの待ちは rate_limited_get が
+# cancel を見ながら行うので、取り消された検索の読み込みを途中で止められる
+FAST_PAGE_LOAD_STRATEGY = "none"
+FAST_BLOCKED_URL_PATTERNS = [
+    # images / media
+    "*.jpg", "*.jpeg", "*.png", "*.gif", "*.webp", "*.svg", "*.ico", "*.avif",
+    "*.mp4", "*.m4v", "*.webm", "*.mp3", "*.m4a",
+    # fonts
+    "*.woff", "*.woff2", "*.ttf", "*.otf",
+    # third-party trackers / scripts
+    "*googletagmanager.com*", "*google-analytics.com*", "*doubleclick.net*",
+    "*facebook.net*", "*hotjar.com*", "*newrelic.com*", "*nr-data.net*",
+]
+SEARCHER_DRIVER_PROFILE = "fast"   # JWOrgSearcher のフォールバックで使うプロファイル（チャレンジ時は headed の default で開き直す）
+SEARCH_CHALLENGE_SOLVE_TIMEOUT = 180   # 表示ありの Edge でチャレンジを手動で解くのを待つ上限（秒）
+# 適応レート制御（トークンバケット + AIMD、ホスト毎）
+RATE_INITIAL_RPS = 4.0       # 開始時のリクエスト数/秒
+RATE_MIN_RPS = 0.3           # 後退時の下限
+RATE_MAX_RPS = 10.0          # 上限（jw.org への politeness budget）
+RATE_INCREASE = 0.5          # 正常応答ごとの加算量
+RATE_DECREASE = 0.5          # 429/5xx/低速/チャレンジ時の乗数
+RATE_SLOW_SECONDS = 6.0      # これより遅い応答は「混雑」とみなす
+RATE_BURST = 4               # バケット容量（連続で投げてよい件数）
+# ホスト毎の上限（rps）の上書き。None のホストはレート制御しない
+# （ループバックは serve_article_pages などの代替サーバなので、AsyncFetcher の同時数だけで試験できるようにする）
+RATE_HOST_LIMITS = {"127.0.0.1": None, "localhost": None, "::1": None}
+NO_RESULTS_MARKERS = ("該当する結果は見つかりません", "お探しのページが見つかりません")
+# 検索結果リストのコンテナ候補（先に見つかったものに絞ってリンクを集める）
+SEARCH_RESULTS_CONTAINER_SELECTORS = (".searchResults", "#searchResults", ".results", ".resultItems")
+# 結果コンテナが見つからないページの readiness 判定だけに使う汎用コンテナ（リンク抽出には使わない）
+SEARCH_READY_FALLBACK_SELECTORS = ("[role='main']", "main")
+# ブラウザ上でチャレンジページを見分ける CSS セレクタ
+CHALLENGE_SELECTOR = "iframe[src*='recaptcha'], .g-recaptcha, #challenge-form, #challenge-running"
+ARTICLE_READY_MIN_CHARS = 200    # 本文コンテナに最低これだけテキストがあれば「読み込み完了」
+CHALLENGE_MARKERS = ("g-recaptcha", "recaptcha/api", "challenge-platform", "cf-chl",
+                     "Just a moment...", "Access Denied")
+# asyncio 取得コア設定
+ASYNC_FETCH_CONCURRENCY = 200  # 同時 in-flight 数の上限（semaphore）
+ASYNC_FETCH_TIMEOUT = 15       # 1リクエストあたりのタイムアウト（秒）
+# 記事本文の永続キャッシュ（SQLite）
+# HTML パーサ: "auto"（lxml があれば lxml、無ければ html.parser）/ "lxml" / "html.parser"
+HTML_PARSER = "auto"
+# 本文抽出: "density"（1 パスのテキスト / リンク密度採点）/ "soup"（BeautifulSoup の木から find で探す）
+ARTICLE_EXTRACTOR = "density"
+ARTICLE_CACHE_PATH = "jw_article_cache_fixed10.sqlite3"
+# 検索結果ページのキャッシュ（(keyword, mode, start) → 記事 URL リスト）
+SEARCH_PAGE_CACHE_TTL = 30 * 60                      # 秒（0 で無期限）
+SEARCH_PAGE_CACHE_PATH = "jw_search_cache_fixed10.sqlite3"  # None ならメモリのみ
 
 # ----------------------------
 # Utilities
@@ -96,67 +325,72 @@ def safe_filename(s: str) -> str:
         return "untitled"
     return re.sub(r'[\\/*?:"<>|]', "_", s)[:120]
 
+JP_CHAR_RE = re.compile(r'[ぁ-んァ-ヴ一-龠々]')
+
 def jp_char_count(s: str) -> int:
-    return len(re.findall(r'[ぁ-んァ-ヴ一-龠々]', s or ''))
+    return len(JP_CHAR_RE.findall(s or ''))
 
-def extract_docid_from_url(url: str):
-    if not url:
-        return None
-    m = re.search(r'/d/(\d{6,})', url)
-    if m:
-        try:
-            return int(m.group(1))
-        except:
-            return None
-    m2 = re.search(r'/(\d{6,})/?$', url)
-    if m2:
-        try:
-            return int(m2.group(1))
-        except:
-            return None
-    m3 = re.search(r'(\d{7,})', url)
-    if m3:
-        try:
-            return int(m3.group(1))
-        except:
-            return None
-    return None
+def html_parser_name() -> str:
+    """BeautifulSoup に渡すパーサ名（HTML_PARSER と lxml の有無から決める）"""
+    if HTML_PARSER == "auto" or (HTML_PARSER == "lxml" and lxml is None):
+        return "lxml" if lxml is not None else "html.parser"
+    return HTML_PARSER
 
-# ----------------------------
-# Excel writer (thread-safe)
-# ----------------------------
-class ExcelWriter:
-    def __init__(self, path=EXCEL_PATH):
-        self.path = path
-        self._lock = threading.Lock()
-        if openpyxl is None:
-            return
-        if not os.path.exists(self.path):
-            wb = Workbook()
-            ws = wb.active
-            ws.title = "data"
-            ws.append(["timestamp", "url", "title", "summary", "body"])
-            wb.save(self.path)
-
-    def append(self, row):
-        if openpyxl is None:
-            print("openpyxl not installed: skipping excel save")
-            return
-        with self._lock:
-            try:
-                wb = openpyxl.load_workbook(self.path)
-                ws = wb["data"]
-                ws.append(row)
-                wb.save(self.path)
-            except Exception as e:
-                print("Excel write error:", e)
+def make_soup(html: str, parse_only=None, parser=None):
+    """選択中のパーサで BeautifulSoup を作る。parse_only（SoupStrainer）を渡すと該当タグだけを木にする"""
+    return BeautifulSoup(html, parser or html_parser_name(), parse_only=parse_only)
+
+# 記事ページの部分解析: タイトルと <article> まわりだけ木にする（nav / footer / script は作らない）
+ARTICLE_STRAINER = SoupStrainer(["h1", "article", "section", "p"])
+
+def is_challenge_html(html: str) -> bool:
+    """reCAPTCHA / bot チャレンジページらしければ True"""
+    if not html:
+        return False
+    return any(m in html for m in CHALLENGE_MARKERS)
 
 # ----------------------------
 # Edge driver factory — anti-detection & stable profile
 # ----------------------------
-def make_edge_driver(headed=True, driver_path=EDGE_DRIVER_PATH, user_data_dir=EDGE_USER_DATA_DIR):
+def _apply_fast_profile(driver):
+    """CDP で画像・メディア・フォント・第三者スクリプトを遮断し、短いタイムアウトを設定する"""
+    try:
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": FAST_BLOCKED_URL_PATTERNS})
+    except Exception as e:
+        print("fast profile: CDP blocking failed:", e)
+    driver.set_page_load_timeout(FAST_PAGE_LOAD_TIMEOUT)
+
+def page_transfer_stats(driver) -> dict:
+    """直近のページ遷移の読み込み時間（DOMContentLoaded まで）と転送バイト数"""
+    try:
+        return driver.execute_script(
+            "const n = performance.getEntriesByType('navigation')[0];"
+            "const r = performance.getEntriesByType('resource');"
+            "let bytes = n ? n.transferSize : 0;"
+            "for (const e of r) bytes += e.transferSize || 0;"
+            "return {load_ms: n ? Math.round(n.domContentLoadedEventEnd - n.startTime) : null,"
+            " bytes: bytes, resources: r.length};"
+        )
+    except Exception:
+        return {}
+
+def make_edge_driver(headed=True, driver_path=EDGE_DRIVER_PATH, user_data_dir=EDGE_USER_DATA_DIR,
+                     profile="default"):
+    """
+    profile="default": 通常の Edge（全リソースを読み込む）
+    profile="fast": 検索ページ / 本文フォールバック用の軽量プロファイル
+      - page_load_strategy=FAST_PAGE_LOAD_STRATEGY（読み込み待ちは rate_limited_get 側）
+      - headless + 描画系機能を無効化、ディスクキャッシュ有効
+      - 画像・メディア・フォント・第三者スクリプトを CDP Network.setBlockedURLs で遮断
+    """
+    fast = profile == "fast"
+    if fast:
+        headed = False
     opts = Options()
     opts.use_chromium = True
+    if fast:
+        opts.page_load_strategy = FAST_PAGE_LOAD_STRATEGY
 
     # Anti-detection experimental options
     try:
@@ -166,9 +400,10 @@ def make_edge_driver(headed=True, driver_path=EDGE_DRIVER_PATH, user_data_dir=ED
         pass
     opts.add_argument("--disable-blink-features=AutomationControlled")
 
-    # Reduce cache / profile issues
-    opts.add_argument("--disable-application-cache")
-    opts.add_argument("--disk-cache-size=0")
+    # Reduce cache / profile issues (fast profile keeps the disk cache for repeat assets)
+    if not fast:
+        opts.add_argument("--disable-application-cache")
+        opts.add_argument("--disk-cache-size=0")
     opts.add_argument("--disable-gpu-shader-disk-cache")
     opts.add_argument("--disable-dev-shm-usage")
     opts.add_argument("--no-sandbox")
@@ -197,6 +432,14 @@ def make_edge_driver(headed=True, driver_path=EDGE_DRIVER_PATH, user_data_dir=ED
     else:
         opts.add_argument("--start-maximized")
 
+    if fast:
+        # rendering features off
+        opts.add_argument("--blink-settings=imagesEnabled=false")
+        opts.add_argument("--disable-remote-fonts")
+        opts.add_argument("--mute-audio")
+        opts.add_argument("--disable-software-rasterizer")
+        opts.add_argument("--disable-smooth-scrolling")
+
     opts.add_argument(f'--user-agent={HEADERS["User-Agent"]}')
 
     service = Service(driver_path)
@@ -210,6 +453,8 @@ def make_edge_driver(headed=True, driver_path=EDGE_DRIVER_PATH, user_data_dir=ED
         except Exception:
             pass
         driver.set_page_load_timeout(40)
+        if fast:
+            _apply_fast_profile(driver)
         return driver
     except Exception as e:
         print("Edge driver start failed:", e)
@@ -217,8 +462,12 @@ def make_edge_driver(headed=True, driver_path=EDGE_DRIVER_PATH, user_data_dir=ED
         try:
             opts2 = Options()
             opts2.use_chromium = True
-            opts2.add_argument("--disable-application-cache")
-            opts2.add_argument("--disk-cache-size=0")
+            if fast:
+                opts2.page_load_strategy = FAST_PAGE_LOAD_STRATEGY
+                opts2.add_argument("--blink-settings=imagesEnabled=false")
+            else:
+                opts2.add_argument("--disable-application-cache")
+                opts2.add_argument("--disk-cache-size=0")
             opts2.add_argument("--disable-gpu-shader-disk-cache")
             opts2.add_argument("--no-sandbox")
             opts2.add_argument("--lang=ja-JP")
@@ -235,35 +484,614 @@ def make_edge_driver(headed=True, driver_path=EDGE_DRIVER_PATH, user_data_dir=ED
             except Exception:
                 pass
             driver2.set_page_load_timeout(40)
+            if fast:
+                _apply_fast_profile(driver2)
             return driver2
         except Exception as e2:
             print("Fallback driver start failed:", e2)
             raise
 
+# ----------------------------
+# Edge WebDriver プール（貸し出し・ヘルスチェックは jw_common.EdgeDriverPool）
+# ----------------------------
+class EdgeDriverPool(jw_common.EdgeDriverPool):
+    """fixed10 の Edge 起動方法（make_edge_driver）とチャレンジ判定を付けたプール"""
+    challenge_selector = CHALLENGE_SELECTOR
+
+    def _default_factory(self, slot):
+        # 同じ user-data-dir を複数の Edge で共有できないのでプロファイル・slot 毎に分ける
+        user_data_dir = EDGE_USER_DATA_DIR if self.profile == "default" else f"{EDGE_USER_DATA_DIR}_{self.profile}"
+        if slot:
+            user_data_dir = f"{user_data_dir}_{slot}"
+        try:
+            driver = make_edge_driver(headed=self.headed, user_data_dir=user_data_dir, profile=self.profile)
+        except Exception as e:
+            # 最低限の起動方法（フォールバック）。headless / fast の設定はここでも引き継ぐ
+            print(f"EdgeDriverPool: make_edge_driver failed ({self.profile}, slot {slot}): {e} → 最低限の設定で起動")
+            service = Service(EDGE_DRIVER_PATH)
+            opts = Options()
+            opts.use_chromium = True
+            if not self.headed or self.profile == "fast":
+                opts.add_argument("--headless=new")
+            if self.profile == "fast":
+                opts.page_load_strategy = FAST_PAGE_LOAD_STRATEGY
+            driver = webdriver.Edge(service=service, options=opts)
+            if self.profile == "fast":
+                _apply_fast_profile(driver)
+        # 少し余裕を持たせる
+        try:
+            driver.set_window_size(1200, 900)
+        except Exception:
+            pass
+        print(f"EdgeDriverPool: Edge 起動完了 ({self.profile}, slot {slot})")
+        return driver
+
+_driver_pools = {}
+_driver_pool_lock = threading.Lock()
+
+def get_driver_pool(headed=True, profile="default") -> EdgeDriverPool:
+    """プロファイル・headed / headless 別のプロセス共通プールを返す（fast は常に headless）"""
+    if profile == "fast":
+        headed = False
+    key = (headed, profile)
+    with _driver_pool_lock:
+        pool = _driver_pools.get(key)
+        if pool is None:
+            pool = _driver_pools[key] = EdgeDriverPool(headed=headed, profile=profile)
+        return pool
+
+def close_driver_pools():
+    with _driver_pool_lock:
+        pools = list(_driver_pools.values())
+    for pool in pools:
+        pool.close()
+
+# ----------------------------
+# 適応レート制御 — token bucket + AIMD（全ネットワーク経路で共有）
+# ----------------------------
+class AdaptiveRateController:
+    """
+    ホスト毎のトークンバケット。rate（件/秒）は AIMD で調整する：
+    - 正常応答なら rate += increase（max_rps まで）
+    - 429 / 5xx / 接続失敗 / slow_seconds 超の応答 / チャレンジページなら rate *= decrease（min_rps まで）
+    requests・asyncio・Selenium のどの経路も取得前に acquire し、応答後に feedback する。
+    host_limits（ホスト名 → max_rps）でホスト毎に上限を変えられる。None のホストは待たせない（件数だけ数える）。
+    """
+    def __init__(self, initial_rps=RATE_INITIAL_RPS, min_rps=RATE_MIN_RPS, max_rps=RATE_MAX_RPS,
+                 increase=RATE_INCREASE, decrease=RATE_DECREASE, slow_seconds=RATE_SLOW_SECONDS,
+                 burst=RATE_BURST, host_limits=RATE_HOST_LIMITS):
+        self.host_limits = dict(host_limits or {})
+        self.initial_rps = initial_rps
+        self.min_rps = min_rps
+        self.max_rps = max_rps
+        self.increase = increase
+        self.decrease = decrease
+        self.slow_seconds = slow_seconds
+        self.burst = burst
+        self._hosts = {}
+        self._lock = threading.Lock()
+
+    def _state(self, url):
+        p = urlparse(url)
+        host = p.netloc or url
+        st = self._hosts.get(host)
+        if st is None:
+            max_rps = self.host_limits.get(p.hostname, self.max_rps)
+            st = {"rate": None if max_rps is None else min(self.initial_rps, max_rps), "max": max_rps,
+                  "tokens": 1.0, "last": time.monotonic(), "requests": 0, "backoffs": 0}
+            self._hosts[host] = st
+        return st
+
+    def reserve(self, url: str) -> float:
+        """トークンを 1 つ予約し、送信まで待つべき秒数を返す"""
+        with self._lock:
+            st = self._state(url)
+            st["requests"] += 1
+            if st["max"] is None:
+                return 0.0
+            now = time.monotonic()
+            st["tokens"] = min(self.burst, st["tokens"] + (now - st["last"]) * st["rate"])
+            st["last"] = now
+            st["tokens"] -= 1.0
+            return 0.0 if st["tokens"] >= 0 else -st["tokens"] / st["rate"]
+
+    def acquire(self, url: str):
+        wait = self.reserve(url)
+        if wait > 0:
+            time.sleep(wait)
+
+    async def acquire_async(self, url: str):
+        wait = self.reserve(url)
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def feedback(self, url: str, status=200, elapsed=0.0, challenge=False):
+        with self._lock:
+            st = self._state(url)
+            if st["max"] is None:
+                return
+            if challenge or status == 429 or status == 0 or status >= 500 or elapsed > self.slow_seconds:
+                st["rate"] = max(self.min_rps, st["rate"] * self.decrease)
+                st["backoffs"] += 1
+            elif 200 <= status < 400:
+                st["rate"] = min(st["max"], st["rate"] + self.increase)
+
+    def current_rate(self, url=BASE_DOMAIN):
+        """url のホストの現在の rate（件/秒）。制限しないホストは None"""
+        with self._lock:
+            return self._state(url)["rate"]
+
+    def metrics(self) -> dict:
+        with self._lock:
+            return {h: {"rate": None if st["rate"] is None else round(st["rate"], 2),
+                        "requests": st["requests"], "backoffs": st["backoffs"]}
+                    for h, st in self._hosts.items()}
+
+_rate_controller = None
+_rate_controller_lock = threading.Lock()
+
+def get_rate_controller() -> AdaptiveRateController:
+    """プロセス共通の AdaptiveRateController を返す"""
+    global _rate_controller
+    with _rate_controller_lock:
+        if _rate_controller is None:
+            _rate_controller = AdaptiveRateController()
+        return _rate_controller
+
+# ----------------------------
+# HTTP fetch client — keep-alive / per-host pool / retry
+# ----------------------------
+class FetchClient:
+    """
+    requests.Session を共有して TCP/TLS 接続を使い回す取得クライアント。
+    ホスト毎に pool_size 本までの keep-alive 接続を保持し、
+    接続エラーと 5xx は Retry アダプタで自動再試行する。
+    urllib3 のコネクションプールはスレッドセーフなので複数スレッドから get してよい。
+    """
+    def __init__(self, pool_size=HTTP_POOL_SIZE, retries=HTTP_RETRIES, backoff=HTTP_RETRY_BACKOFF):
+        self.pool_size = pool_size
+        self.session = requests.Session()
+        self.session.headers.update(HEADERS)
+        retry = Retry(
+            total=retries,
+            connect=retries,
+            read=retries,
+            backoff_factor=backoff,
+            status_forcelist=(500, 502, 503, 504),
+            allowed_methods=frozenset(["GET", "HEAD"]),
+            raise_on_status=False,
+        )
+        # pool_block=True: 上限を超える同時接続は空きを待つ（jw.org への接続数を抑える）
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size,
+                              max_retries=retry, pool_block=True)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def get(self, url, timeout=12, rate_limit=True, **kwargs):
+        """rate_limit=False は呼び出し側で既にレート制御している場合（AsyncFetcher）"""
+        rate = get_rate_controller() if rate_limit else None
+        if rate is not None:
+            rate.acquire(url)
+        t0 = time.monotonic()
+        try:
+            r = self.session.get(url, timeout=timeout, **kwargs)
+        except Exception:
+            if rate is not None:
+                rate.feedback(url, 0, time.monotonic() - t0)
+            raise
+        if rate is not None:
+            rate.feedback(url, r.status_code, time.monotonic() - t0,
+                          challenge=r.status_code == 200 and is_challenge_html(r.text))
+        return r
+
+    def close(self):
+        try:
+            self.session.close()
+        except Exception:
+            pass
+
+_fetch_client = None
+_fetch_client_lock = threading.Lock()
+
+def get_fetch_client() -> FetchClient:
+    """プロセス共通の FetchClient を返す（初回呼び出し時に生成）"""
+    global _fetch_client
+    with _fetch_client_lock:
+        if _fetch_client is None:
+            _fetch_client = FetchClient()
+        return _fetch_client
+
+# ----------------------------
+# 記事本文の永続キャッシュ（本体は jw_common.ArticleDiskCache）
+# ----------------------------
+_article_disk_cache = None
+_article_disk_cache_lock = threading.Lock()
+
+def get_article_disk_cache():
+    """プロセス共通の ArticleDiskCache を返す。開けなければ None（キャッシュ無しで動く）"""
+    global _article_disk_cache
+    with _article_disk_cache_lock:
+        if _article_disk_cache is None:
+            try:
+                _article_disk_cache = ArticleDiskCache(ARTICLE_CACHE_PATH)
+            except Exception as e:
+                print("article cache open failed:", e)
+                return None
+        return _article_disk_cache
+
+# ----------------------------
+# 検索結果ページのキャッシュ — (keyword, mode, start) 単位 / TTL / 同時取得の合流 / 永続化
+# ----------------------------
+class SearchPageCache:
+    """
+    検索結果 1 ページ分の (state, links) を (keyword, mode, start) をキーに保持する。
+    - state が "ok" / "empty" の結果だけ保存（チャレンジ・通信エラーは保存しない）
+    - ttl 秒を過ぎたエントリはミス扱い
+    - 同じキーを取得中なら新たに取りに行かず、その結果を待つ（in-flight の合流）
+    - path を指定すると SQLite にも書き、次回起動時も使う
+    HTTP / asyncio / Selenium の各経路で同じキーを使うので、どの経路で取ったページも共有される。
+    """
+    CACHEABLE_STATES = ("ok", "empty")
+
+    def __init__(self, ttl=SEARCH_PAGE_CACHE_TTL, path=SEARCH_PAGE_CACHE_PATH):
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.joined = 0
+        self._mem = {}        # key -> (state, links, fetched_at)
+        self._inflight = {}   # key -> concurrent.futures.Future
+        self._lock = threading.Lock()
+        self._conn = None
+        if path:
+            try:
+                self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+                self._conn.execute("PRAGMA journal_mode=WAL")
+                self._conn.execute(
+                    "CREATE TABLE IF NOT EXISTS search_pages ("
+                    " keyword TEXT, mode TEXT, start INTEGER, state TEXT, links TEXT, fetched_at REAL,"
+                    " PRIMARY KEY (keyword, mode, start))"
+                )
+            except Exception as e:
+                print("search page cache open failed (memory only):", e)
+                self._conn = None
+
+    @staticmethod
+    def make_key(keyword: str, mode: str, start: int):
+        return " ".join((keyword or "").split()), mode, int(start)
+
+    def _fresh(self, fetched_at) -> bool:
+        return not self.ttl or time.time() - fetched_at <= self.ttl
+
+    def _get_locked(self, key):
+        hit = self._mem.get(key)
+        if hit is None and self._conn is not None:
+            row = self._conn.execute(
+                "SELECT state, links, fetched_at FROM search_pages WHERE keyword=? AND mode=? AND start=?", key
+            ).fetchone()
+            if row is not None:
+                hit = (row[0], json.loads(row[1]), row[2])
+                self._mem[key] = hit
+        if hit is None or not self._fresh(hit[2]):
+            return None
+        return hit[0], list(hit[1])
+
+    def get(self, keyword: str, mode: str, start: int):
+        """(state, links) を返す。無い / 期限切れなら None"""
+        with self._lock:
+            return self._get_locked(self.make_key(keyword, mode, start))
+
+    def put(self, keyword: str, mode: str, start: int, state: str, links):
+        if state not in self.CACHEABLE_STATES:
+            return
+        key = self.make_key(keyword, mode, start)
+        now = time.time()
+        with self._lock:
+            self._mem[key] = (state, list(links), now)
+            if self._conn is not None:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO search_pages (keyword, mode, start, state, links, fetched_at)"
+                    " VALUES (?, ?, ?, ?, ?, ?)", key + (state, json.dumps(list(links)), now)
+                )
+
+    def _claim(self, key):
+        """(cached, future, owner)。owner=True なら呼び出し側が取得して _finish すること"""
+        with self._lock:
+            cached = self._get_locked(key)
+            if cached is not None:
+                self.hits += 1
+                return cached, None, False
+            fut = self._inflight.get(key)
+            if fut is not None:
+                self.joined += 1
+                return None, fut, False
+            self.misses += 1
+            fut = self._inflight[key] = concurrent.futures.Future()
+            return None, fut, True
+
+    def _finish(self, key, fut, result=None, exc=None):
+        if exc is None:
+            self.put(*key, *result)
+        with self._lock:
+            self._inflight.pop(key, None)
+        if not fut.done():
+            if exc is None:
+                fut.set_result(result)
+            else:
+                fut.set_exception(exc)
+
+    def get_or_load(self, keyword: str, mode: str, start: int, loader):
+        """キャッシュに無ければ loader() → (state, links) を 1 回だけ実行して結果を共有する"""
+        key = self.make_key(keyword, mode, start)
+        while True:
+            cached, fut, owner = self._claim(key)
+            if cached is not None:
+                return cached
+            if owner:
+                try:
+                    result = loader()
+                except BaseException as e:
+                    self._finish(key, fut, exc=e)
+                    raise
+                self._finish(key, fut, result)
+                return result
+            try:
+                return fut.result()
+            except BaseException:
+                continue   # 取得元が失敗 / 取り消し → 自分で取り直す
+
+    async def get_or_load_async(self, keyword: str, mode: str, start: int, loader):
+        """get_or_load のコルーチン版。loader はコルーチン関数"""
+        key = self.make_key(keyword, mode, start)
+        while True:
+            cached, fut, owner = self._claim(key)
+            if cached is not None:
+                return cached
+            if owner:
+                try:
+                    result = await loader()
+                except BaseException as e:
+                    self._finish(key, fut, exc=e)
+                    raise
+                self._finish(key, fut, result)
+                return result
+            try:
+                # shield: 待っている側が取り消されても共有 Future は取り消さない
+                return await asyncio.shield(asyncio.wrap_future(fut))
+            except asyncio.CancelledError:
+                # 取得元が取り消された場合だけ取り直す（自分が取り消されたならそのまま抜ける）
+                if not fut.done() or fut.cancelled() or fut.exception() is None:
+                    raise
+                continue
+            except Exception:
+                continue
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._mem),
+                "hits": self.hits,
+                "misses": self.misses,
+                "joined": self.joined,
+                "hit_rate": (self.hits / total) if total else 0.0,
+            }
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                try:
+                    self._conn.close()
+                except Exception:
+                    pass
+                self._conn = None
+
+_search_page_cache = None
+_search_page_cache_lock = threading.Lock()
+
+def get_search_page_cache() -> SearchPageCache:
+    """プロセス共通の SearchPageCache を返す（永続化できなければメモリのみで動く）"""
+    global _search_page_cache
+    with _search_page_cache_lock:
+        if _search_page_cache is None:
+            _search_page_cache = SearchPageCache()
+        return _search_page_cache
+
 # End of Part1
 # jw_search_app_v12_edge_fixed10.py — Part2/4
 # === JW.org 公式検索（rel/date）URL収集ロジック ===
 
 # ----------------------------
-# Manual collector: user does one search manually, then this collects from current page
+# Selenium 操作もレート制御を通す
 # ----------------------------
-class JWManualCollector:
-    def __init__(self, headed=True):
-        # Start Edge using the robust factory (uses EDGE_USER_DATA_DIR)
-        self.driver = make_edge_driver(headed=headed)
-        # small safety
+def page_is_challenge(driver) -> bool:
+    """page_source を転送せずに、今のページがチャレンジページか判定する"""
+    try:
+        return bool(driver.execute_script("return !!document.querySelector(arguments[0])", CHALLENGE_SELECTOR))
+    except Exception:
+        return False
+
+# 遷移前の旧ドキュメントに印を付け、印の無い新ドキュメントが DOMContentLoaded に達したら true
+MARK_OLD_DOCUMENT_JS = "window.__rlgOld = true;"
+NEW_DOCUMENT_READY_JS = "return !window.__rlgOld && document.readyState !== 'loading';"
+
+def _wait_document_ready(driver, url: str, cancel=None, timeout=FAST_PAGE_LOAD_TIMEOUT) -> bool:
+    """
+    driver.get 後、新しいドキュメントの DOMContentLoaded を 0.1 秒ごとに確認する
+    （page_load_strategy="none" ではここが読み込み待ち。eager / normal なら即座に戻る）。
+    cancel がセットされたら window.stop() で読み込みを止めて False。
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        if cancel is not None and cancel.is_set():
+            try:
+                driver.execute_script("window.stop()")
+            except Exception:
+                pass
+            return False
         try:
-            self.driver.set_window_size(1200, 900)
+            if driver.execute_script(NEW_DOCUMENT_READY_JS):
+                return True
+        except WebDriverException:
+            pass  # ドキュメントの切り替わり中
+        if time.monotonic() >= deadline:
+            try:
+                driver.execute_script("window.stop()")
+            except Exception:
+                pass
+            raise TimeoutException(f"page load timeout: {url}")
+        if cancel is not None:
+            cancel.wait(0.1)
+        else:
+            time.sleep(0.1)
+
+def rate_limited_get(driver, url: str, cancel=None) -> bool:
+    """
+    driver.get を共有レート制御の下で行い、応答時間とチャレンジ有無を feedback する。
+    cancel（threading.Event）がセットされたら送信待ち・読み込み中でも止めて False を返す
+    （読み込み中に止められるのは page_load_strategy="none" の fast プロファイル）。
+    """
+    rate = get_rate_controller()
+    if cancel is None:
+        rate.acquire(url)
+    else:
+        wait = rate.reserve(url)
+        if wait > 0 and cancel.wait(wait):
+            return False
+    t0 = time.monotonic()
+    try:
+        try:
+            driver.execute_script(MARK_OLD_DOCUMENT_JS)
         except Exception:
             pass
-        print("JWManualCollector: Edge 起動完了")
+        driver.get(url)
+        if not _wait_document_ready(driver, url, cancel):
+            return False
+    except Exception:
+        rate.feedback(url, 0, time.monotonic() - t0)
+        raise
+    rate.feedback(url, 200, time.monotonic() - t0, challenge=page_is_challenge(driver))
+    return True
+
+def rate_limited_click(driver, el):
+    """
+    ページ遷移を伴うクリック。固定 sleep の代わりに
+    レート制御で送信間隔を取り、遷移完了（URL 変化 or 旧 DOM の破棄）まで待つ。
+    """
+    rate = get_rate_controller()
+    old_url = driver.current_url
+    old_root = driver.find_element(By.TAG_NAME, "html")
+    rate.acquire(old_url)
+    t0 = time.monotonic()
+    el.click()
+    try:
+        WebDriverWait(driver, SELENIUM_PAGE_TIMEOUT).until(
+            lambda d: d.current_url != old_url or EC.staleness_of(old_root)(d)
+        )
+    except Exception:
+        rate.feedback(old_url, 0, time.monotonic() - t0)
+        return
+    rate.feedback(driver.current_url, 200, time.monotonic() - t0, challenge=page_is_challenge(driver))
+
+# ----------------------------
+# 遷移後の readiness 待ち（固定 sleep の代わり）
+# ----------------------------
+# 各 JS は「準備完了なら状態名、まだなら null」を返す。WebDriverWait は null の間だけ再試行する。
+SEARCH_READY_JS = """
+const [sels, generic, markers, challengeSel, articleRe] = arguments;
+if (document.querySelector(challengeSel)) return 'challenge';
+const text = document.body ? document.body.textContent : '';
+if (markers.some(m => text.includes(m))) return 'no_results';
+const re = new RegExp(articleRe);
+const complete = document.readyState === 'complete';
+for (const s of sels) {
+    const el = document.querySelector(s);
+    if (!el) continue;
+    // main 等の汎用コンテナはナビのリンクも拾うので、読み込み完了後だけ見る
+    if (generic.includes(s) && !complete) continue;
+    for (const a of el.querySelectorAll('a[href]')) {
+        if (re.test(a.href)) return 'results';
+    }
+}
+return null;
+"""
+
+ARTICLE_READY_JS = """
+const [challengeSel, minChars] = arguments;
+if (document.querySelector(challengeSel)) return 'challenge';
+const el = document.querySelector('article') || document.querySelector('main');
+if (el && (el.textContent || '').trim().length >= minChars) return 'article';
+if (document.readyState === 'complete') return 'complete';
+return null;
+"""
+
+class WaitTimings:
+    """readiness 待ちの所要時間を名前毎に集計する（metrics 用）"""
+    def __init__(self):
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def record(self, name, elapsed, state):
+        with self._lock:
+            d = self._data.setdefault(name, {"count": 0, "total": 0.0, "max": 0.0, "states": {}})
+            d["count"] += 1
+            d["total"] += elapsed
+            d["max"] = max(d["max"], elapsed)
+            d["states"][state] = d["states"].get(state, 0) + 1
+
+    def summary(self) -> dict:
+        with self._lock:
+            return {name: {"count": d["count"], "avg": round(d["total"] / d["count"], 3),
+                           "max": round(d["max"], 3), "states": dict(d["states"])}
+                    for name, d in self._data.items()}
+
+wait_timings = WaitTimings()
+
+def wait_for_state(driver, name: str, script: str, *args, timeout=SELENIUM_PAGE_TIMEOUT, cancel=None):
+    """
+    script が null 以外を返した瞬間に戻り、その状態名を返す（時間切れは "timeout"）。
+    cancel（threading.Event）がセットされたら読み込みを止めて "cancelled" を返す。
+    """
+    t0 = time.monotonic()
+    try:
+        state = WebDriverWait(driver, timeout, poll_frequency=0.1).until(
+            lambda d: "cancelled" if cancel is not None and cancel.is_set() else d.execute_script(script, *args)
+        )
+    except Exception:
+        state = "timeout"
+    if state == "cancelled":
+        try:
+            driver.execute_script("window.stop()")
+        except Exception:
+            pass
+    wait_timings.record(name, time.monotonic() - t0, state)
+    return state
+
+def wait_for_search_results(driver, timeout=SELENIUM_PAGE_TIMEOUT, cancel=None):
+    """検索結果が並んだ / 「該当なし」表示 / チャレンジページ のいずれか → "results" / "no_results" / "challenge" """
+    return wait_for_state(driver, "search_results", SEARCH_READY_JS,
+                          list(SEARCH_RESULTS_CONTAINER_SELECTORS + SEARCH_READY_FALLBACK_SELECTORS),
+                          list(SEARCH_READY_FALLBACK_SELECTORS), list(NO_RESULTS_MARKERS),
+                          CHALLENGE_SELECTOR, r"/d/\d{6,}|/\d{6,}/?$", timeout=timeout, cancel=cancel)
+
+def wait_for_article(driver, timeout=SELENIUM_PAGE_TIMEOUT):
+    """本文コンテナに十分なテキスト / 読み込み完了 / チャレンジページ → "article" / "complete" / "challenge" """
+    return wait_for_state(driver, "article", ARTICLE_READY_JS,
+                          CHALLENGE_SELECTOR, ARTICLE_READY_MIN_CHARS, timeout=timeout)
+
+# ----------------------------
+# Manual collector: user does one search manually, then this collects from current page
+# ----------------------------
+class JWManualCollector:
+    def __init__(self, headed=True):
+        # Lease a (pre-warmed) Edge from the shared pool for the whole manual session
+        self.pool = get_driver_pool(headed)
+        self.driver = self.pool.acquire()
+        print("JWManualCollector: Edge 準備完了")
 
     def open_jw_home(self):
         """Open JW.org Japanese home so user can type search terms manually."""
         try:
-            self.driver.get(BASE_DOMAIN + "/ja/")
-            # wait a little for page to load and cookie banner
-            time.sleep(1.0)
+            rate_limited_get(self.driver, BASE_DOMAIN + "/ja/")
             return True
         except Exception as e:
             print("open_jw_home failed:", e)
@@ -276,49 +1104,31 @@ class JWManualCollector:
         mode: 'relevance' or 'date'  -- this method assumes user already chose sort on the site
         """
         collected = []
-        seen = set()
+        seen = ArticleUrlSet()
         # safety limit to avoid infinite loop
         page_count = 0
         while len(collected) < max_items and page_count < 20:
             page_count += 1
-            try:
-                # ensure DOM ready
-                WebDriverWait(self.driver, SELENIUM_PAGE_TIMEOUT).until(
-                    EC.presence_of_element_located((By.CSS_SELECTOR, "main, body"))
-                )
-            except Exception:
-                time.sleep(0.6)
+            # wait until results (or "no results" / a challenge) are actually on the page
+            state = wait_for_search_results(self.driver)
+            if state == "challenge":
+                print("チャレンジページが表示されています。ブラウザで解除してから再実行してください。")
+                break
 
-            html = self.driver.page_source
+            # one round trip: result-container links + "no results" check
+            page = extract_links_bulk(self.driver)
             # quick check for "お探しのページが見つかりません"
-            if "お探しのページが見つかりません" in html or "該当する結果は見つかりません" in html:
+            if page["no_results"]:
                 print("検索ページが見つかりません（手動検索を確認してください）")
                 break
 
-            # collect anchors that look like article links
-            anchors = self.driver.find_elements(By.CSS_SELECTOR, "a[href]")
-            for a in anchors:
-                try:
-                    href = a.get_attribute("href") or ""
-                except Exception:
-                    continue
-                if not href:
-                    continue
-                href = href.split("#")[0].rstrip("/")
-                if href in seen:
-                    continue
-                # consider only /ja/ pages
-                if not href.startswith(BASE_DOMAIN + "/ja/"):
-                    continue
-                # exclude obvious index/category pages
-                if any(x in href for x in ["/topics/", "/languages/", "/library/", "/search?", "/collections/", "/live/"]):
-                    continue
-                # prefer pages that carry a numeric docid or /d/
-                if extract_docid_from_url(href) is None:
-                    # Not a clear article url — skip
-                    continue
+            # no results container: the page is not a search results page (or not rendered yet)
+            if not page["in_container"]:
+                print("[manual collect] 検索結果のコンテナが見つかりません。このページからは収集しません")
+                break
 
-                seen.add(href)
+            # collect anchors that look like article links (one URL per docid)
+            for href in seen.merge(article_urls([href for href, _text in page["links"]])):
                 collected.append(href)
                 if len(collected) >= max_items:
                     break
@@ -346,19 +1156,16 @@ class JWManualCollector:
                     if el:
                         try:
                             self.driver.execute_script("arguments[0].scrollIntoView(true);", el)
-                            time.sleep(0.25)
-                            el.click()
+                            rate_limited_click(self.driver, el)
                             next_clicked = True
-                            time.sleep(1.0 + random.random() * 0.8)
                             break
                         except Exception:
                             # try to click via JS as fallback
                             try:
                                 href = el.get_attribute("href")
                                 if href:
-                                    self.driver.get(href)
+                                    rate_limited_get(self.driver, href)
                                     next_clicked = True
-                                    time.sleep(0.9 + random.random() * 0.6)
                                     break
                             except Exception:
                                 pass
@@ -373,10 +1180,9 @@ class JWManualCollector:
         return collected[:max_items]
 
     def close(self):
-        try:
-            self.driver.quit()
-        except Exception:
-            pass
+        if self.driver is not None:
+            self.pool.release(self.driver)
+            self.driver = None
 
 # ----------------------------
 # JWAppGUI: add manual-mode UI controls and actions
@@ -460,8 +1266,7 @@ def start_collection_from_current(self):
                         el = self.manual_collector.driver.find_element(By.CSS_SELECTOR, sel)
                         if el:
                             try:
-                                el.click()
-                                time.sleep(0.8)
+                                rate_limited_click(self.manual_collector.driver, el)
                                 switched = True
                                 break
                             except Exception:
@@ -479,10 +1284,7 @@ def start_collection_from_current(self):
             date_urls = self.manual_collector.collect_from_current_pages("date", date_n)
             print(f"[manual] date collected {len(date_urls)}")
 
-            all_urls = []
-            for u in rel_urls + date_urls:
-                if u not in all_urls:
-                    all_urls.append(u)
+            all_urls = [self.url_index.add(u)[0] for u in ArticleUrlSet(rel_urls + date_urls)]
 
             # populate tree in main thread
             def ui_update():
@@ -495,7 +1297,7 @@ def start_collection_from_current(self):
 
             # start background body fetch
             self.tree_items = all_urls
-            threading.Thread(target=self.fetch_body_background, args=(all_urls,), daemon=True).start()
+            self.master.after(0, self.fetch_body_background, all_urls)
 
         except Exception as e:
             print("start_collection_from_current error:", e)
@@ -504,128 +1306,1289 @@ def start_collection_from_current(self):
 
     threading.Thread(target=do_collect, daemon=True).start()
 
+# ---------------------------------------------------------
+# 検索結果リンクの判定
+# ---------------------------------------------------------
+def is_search_result_article(href: str) -> bool:
+    """検索結果ページのリンクのうち日本語の記事ページだけを True にする（判定は classify_url）"""
+    info = classify_url(href)
+    return info.kind == "article" and info.lang == "ja"
+
+def _results_container(soup):
+    """検索結果コンテナの要素（見つからなければ None）"""
+    for sel in SEARCH_RESULTS_CONTAINER_SELECTORS:
+        el = soup.select_one(sel)
+        if el is not None:
+            return el
+    return None
+
+def extract_search_result_links(html: str, page_url: str = BASE_DOMAIN):
+    """
+    検索結果ページの HTML から結果コンテナ内の記事リンクを出現順（重複なし）で返す。
+    結果コンテナが無ければ空（ナビ・フッタのリンクは拾わない。呼び出し側は「結果なし / JS 描画」として扱う）。
+    """
+    soup = make_soup(html)
+    root = _results_container(soup)
+    if root is None:
+        print(f"[JW.org] 結果コンテナが見つかりません: {page_url}")
+        return []
+    return article_urls([urljoin(page_url, a["href"]) for a in root.find_all("a", href=True)])
+
+# ---------------------------------------------------------
+# ブラウザ上のリンクを一括取得（WebDriver 往復 1 回）
+# ---------------------------------------------------------
+# find_elements + get_attribute はリンク 1 本ごとに WebDriver の HTTP 往復が発生するので、
+# 結果コンテナ内の href / テキスト、コンテナの有無、「該当なし」表示をまとめて JS で返す
+BULK_LINKS_JS = """
+const sels = arguments[0], markers = arguments[1];
+let root = null;
+for (const s of sels) { root = document.querySelector(s); if (root) break; }
+const links = [];
+if (root) {
+    for (const a of root.querySelectorAll('a[href]')) {
+        links.push([a.href, (a.textContent || '').trim().slice(0, 200)]);
+    }
+}
+const text = document.body ? document.body.textContent : '';
+return {links: links, in_container: !!root, no_results: markers.some(m => text.includes(m))};
+"""
+
+def extract_links_bulk(driver):
+    """
+    現在のページの結果コンテナ内のリンクを一括で返す:
+      {"links": [(href, text), ...], "in_container": bool, "no_results": bool}
+    結果コンテナが無ければ in_container=False で links は空（ページ全体のリンクは返さない）。
+    execute_script が失敗したら page_source を 1 回だけ取得してパースする。
+    """
+    try:
+        res = driver.execute_script(BULK_LINKS_JS, list(SEARCH_RESULTS_CONTAINER_SELECTORS),
+                                    list(NO_RESULTS_MARKERS))
+        return {"links": [tuple(x) for x in res["links"]], "in_container": bool(res["in_container"]),
+                "no_results": bool(res["no_results"])}
+    except Exception as e:
+        print("bulk link script failed, parsing page_source:", e)
+    html = driver.page_source
+    base = driver.current_url
+    root = _results_container(make_soup(html))
+    links = [] if root is None else [(urljoin(base, a["href"]), a.get_text(strip=True)[:200])
+                                     for a in root.find_all("a", href=True)]
+    return {"links": links, "in_container": root is not None,
+            "no_results": any(m in html for m in NO_RESULTS_MARKERS)}
+
 # ---------------------------------------------------------
 # JW.org 公式検索：正規の検索URLで rel/date ページを巡回してリンク抽出
 # ---------------------------------------------------------
-def jw_search_collect(driver, keyword: str, mode: str, max_items=50):
-    """JW.org 公式検索ページから正規の検索結果のみ抽出する"""
-    assert mode in ("relevance", "date")
+def selenium_search_page(driver, keyword: str, mode: str, start: int, cancel=None, challenge_wait=0):
+    """
+    検索結果 1 ページを Edge で開いて (state, links) を返す。
+    state: "ok" / "empty"（該当なし）/ "challenge" / "error"（遷移失敗・結果コンテナ無し）/ "cancelled"
+    challenge_wait > 0（表示ありの Edge）なら、チャレンジが手動で解かれるまで最大その秒数待つ。
+    """
     tpl = SEARCH_URL_RELEVANCE_TPL if mode == "relevance" else SEARCH_URL_DATE_TPL
+    search_url = tpl.format(keyword, start)
+
+    # 送信間隔は共有レート制御に任せる（正常なら加速・429/チャレンジで後退）
+    try:
+        if not rate_limited_get(driver, search_url, cancel):
+            return "cancelled", []
+    except Exception:
+        return "error", []
+
+    # 結果が並ぶ / 該当なし / チャレンジ のどれかになった時点で次へ（固定 sleep なし）
+    state = wait_for_search_results(driver, cancel=cancel)
+    if state == "challenge" and challenge_wait:
+        print(f"[JW.org] challenge page: ブラウザで解いてください（最大 {challenge_wait} 秒待ちます）")
+        deadline = time.time() + challenge_wait
+        while state == "challenge" and time.time() < deadline:
+            if cancel is not None:
+                cancel.wait(1.0)
+            else:
+                time.sleep(1.0)
+            state = wait_for_search_results(driver, cancel=cancel)
+    if state == "cancelled":
+        return "cancelled", []
+    if state == "challenge":
+        print(f"[JW.org] challenge page: {search_url}")
+        return "challenge", []
+    if state == "no_results":
+        return "empty", []
+
+    # --- 結果リンク抽出（1 往復） ---
+    page = extract_links_bulk(driver)
+    print(f"[JW.org] {mode} start={start}", page_transfer_stats(driver))
+
+    # 検索結果が "該当なし" のケースを検出
+    if page["no_results"]:
+        return "empty", []
+    # 結果コンテナが無い = まだ描画されていない / 検索結果ページではない。ページ全体のリンクは拾わない
+    # （"error" はキャッシュされないので、次回はこのページを取り直す）
+    if not page["in_container"]:
+        print(f"[JW.org] 結果コンテナが見つかりません: {search_url}")
+        return "error", []
+
+    return "ok", article_urls([href for href, _text in page["links"]])
+
+def jw_search_iter(driver, keyword: str, mode: str, max_items=50, cancel=None, challenge_wait=0):
+    """
+    JW.org 公式検索ページから正規の検索結果のみ抽出し、ページを読み込む毎に
+    そのページで新しく見つかった URL のリストを yield する（ページ単位で SearchPageCache を通す）。
+    cancel（threading.Event）がセットされたら次のページを開かずに終わる。
+    終了時の state（"ok" / "empty" / "challenge" / "cancelled" など）を返す（yield from で受け取れる）。
+    """
+    assert mode in ("relevance", "date")
+    cache = get_search_page_cache()
 
+    total = 0
+    visited_urls = ArticleUrlSet()
+    pages = max(1, (max_items + PAGE_STEP - 1) // PAGE_STEP)
+
+    state = "ok"
+    for idx in range(pages):
+        if cancel is not None and cancel.is_set():
+            return "cancelled"
+        start = idx * PAGE_STEP
+        state, links = cache.get_or_load(keyword, mode, start,
+                                         lambda: selenium_search_page(driver, keyword, mode, start, cancel,
+                                                                      challenge_wait))
+        if state == "error":
+            continue
+        if state != "ok":
+            break
+
+        batch = []
+        for href in links:
+            rep, new = visited_urls.add(href)
+            if not new:
+                continue
+            batch.append(rep)
+            if total + len(batch) >= max_items:
+                break
+        total += len(batch)
+        if batch:
+            yield batch
+        if total >= max_items:
+            return state
+
+        # 次ページが無ければ終了
+        if start > 0 and not batch:
+            # rel=0/date=0 件 → もう出ない
+            break
+    return state
+
+def jw_search_collect(driver, keyword: str, mode: str, max_items=50):
+    """jw_search_iter の結果をまとめてリストで返す"""
+    return [href for batch in jw_search_iter(driver, keyword, mode, max_items) for href in batch]
+
+# ---------------------------------------------------------
+# JW.org 公式検索：requests のみで収集（Selenium 不要の高速経路）
+# ---------------------------------------------------------
+def http_search_page(keyword: str, mode: str, start: int):
+    """
+    検索結果 1 ページを requests で取得して (state, links) を返す（AsyncFetcher._search_page と同じ判定）。
+    state: "ok" / "empty"（該当なし・結果が尽きた）/ "fallback"（チャレンジ・JS描画）/ "error"（2ページ目以降の取得失敗）
+    """
+    url = search_page_url(keyword, mode, start)
+    try:
+        r = get_fetch_client().get(url, timeout=12)
+    except Exception as e:
+        print("search page fetch failed:", e)
+        return ("fallback" if start == 0 else "error"), []
+    html = r.text
+    if r.status_code in (403, 429) or is_challenge_html(html):
+        print(f"[JW.org] challenge page (status={r.status_code}): {url}")
+        return "fallback", []
+    if any(m in html for m in NO_RESULTS_MARKERS):
+        return "empty", []
+    if r.status_code != 200:
+        return ("fallback" if start == 0 else "error"), []
+    links = extract_search_result_links(html, url)
+    if not links:
+        return ("fallback" if start == 0 else "empty"), []
+    return "ok", links
+
+def http_search_collect(keyword: str, mode: str, max_items=50):
+    """
+    検索結果ページを requests で取得してリンクを直接抽出する。
+    チャレンジページ（reCAPTCHA 等）や、1ページ目に結果リンクも「該当なし」表示も無い
+    （= 結果が JS 描画）場合は None を返す → 呼び出し側で Selenium にフォールバックする。
+    """
+    assert mode in ("relevance", "date")
     collected = []
-    visited_urls = set()
+    seen = ArticleUrlSet()
     pages = max(1, (max_items + PAGE_STEP - 1) // PAGE_STEP)
+    cache = get_search_page_cache()
 
     for idx in range(pages):
         start = idx * PAGE_STEP
-        search_url = tpl.format(keyword, start)
+        state, links = cache.get_or_load(keyword, mode, start,
+                                         lambda: http_search_page(keyword, mode, start))
+        if state == "fallback":
+            return None
+        if state != "ok":
+            break
+        for href in seen.merge(links):
+            collected.append(href)
+            if len(collected) >= max_items:
+                return collected
 
+    return collected[:max_items]
+
+def http_search_collect_parallel(keyword: str, plan: dict):
+    """
+    http_search_collect の並列版。plan の全モード・全ページを AsyncFetcher で同時に投げ、
+    {mode: [url, ...] or None} を返す（None のモードは Selenium にフォールバックすること）。
+    """
+    fetcher = get_async_fetcher()
+    try:
+        return fetcher.run(fetcher.collect_search_results(keyword, plan))
+    except Exception as e:
+        print("parallel search collect failed:", e)
+        return {m: None for m in plan}
+
+# ---------------------------------------------------------
+# 本文抽出（HTML → title, body）
+# ---------------------------------------------------------
+def _article_from_soup(soup):
+    """解析済みの soup からタイトルと本文を返す（title, body）"""
+    # --- タイトル抽出 ---
+    title_el = soup.find("h1")
+    title = title_el.get_text(strip=True) if title_el else ""
+
+    # --- 本文抽出 ---
+    # パターン1: article[data-article-id]
+    body_container = soup.find("article")
+    if not body_container:
+        # パターン2: div class="content" / "body" / "article-body"
+        body_container = soup.find("div", class_=lambda c: c and ("content" in c or "body" in c))
+
+    if not body_container:
+        # パターン3: section 内の p
+        body_container = soup.find("section")
+
+    if not body_container:
+        # fallback: p を全部
+        paragraphs = [p.get_text(" ", strip=True) for p in soup.find_all("p")]
+        return title, "\n".join(paragraphs)
+
+    # 正規本文（p）抽出
+    ps = body_container.find_all("p")
+    body = "\n".join([p.get_text(" ", strip=True) for p in ps if p.get_text(strip=True)])
+
+    return title, body
+
+def parse_article_html_soup(html: str, parser=None):
+    """
+    記事ページの HTML からタイトルと本文を返す（title, body）。
+    まず ARTICLE_STRAINER で h1 / article / section / p だけを解析する。
+    <article> が無いページ（パターン2 以降は div も見る）は全体を解析し直すので、結果は全体解析と同じ。
+    """
+    try:
+        soup = make_soup(html, ARTICLE_STRAINER, parser)
+        if soup.find("article") is None:
+            soup = make_soup(html, parser=parser)
+        return _article_from_soup(soup)
+    except Exception:
+        return "", ""
+
+# ---------------------------------------------------------
+# 1 パス本文抽出（テキスト / リンク密度）
+# ---------------------------------------------------------
+# ページを 1 回トークナイズしながら全要素をボトムアップに採点する。
+# 要素が閉じた時点でテキスト長・リンク内テキスト長・日本語文字数・<p> 数を親に足し込み、
+# 各 <p> は段落スコアを親と祖父に加える。最もスコアの高いコンテナを本文とする。
+_SKIP_TAGS = frozenset(["script", "style", "noscript", "template", "svg", "iframe"])
+_VOID_TAGS = frozenset(["area", "base", "br", "col", "embed", "hr", "img", "input",
+                        "link", "meta", "param", "source", "track", "wbr"])
+_BLOCK_TAGS = frozenset(["address", "article", "aside", "blockquote", "dd", "div", "dl", "dt",
+                         "figcaption", "figure", "footer", "form", "h1", "h2", "h3", "h4", "h5",
+                         "h6", "header", "li", "main", "nav", "ol", "p", "pre", "section",
+                         "table", "td", "th", "tr", "ul"])
+_CANDIDATE_TAGS = frozenset(["article", "main", "section", "div", "td", "blockquote"])
+_POSITIVE_HINT_RE = re.compile(r"article|body|content|entry|main|post|text", re.IGNORECASE)
+_NEGATIVE_HINT_RE = re.compile(r"banner|breadcrumb|comment|footer|menu|nav|promo|related|share|sidebar|social",
+                               re.IGNORECASE)
+# フッター / 規約系の行は本文から落とす
+BOILERPLATE_LINE_RE = re.compile(r"privacy|cookie|terms|copyright|利用規約", re.IGNORECASE)
+_INLINE_SPACE_RE = re.compile(r"[ \t\r\f\v　\xa0]+")
+# <meta name/property> → 返す meta dict のキー
+ARTICLE_META_KEYS = {
+    "description": "description",
+    "og:title": "og_title",
+    "og:description": "og_description",
+    "og:url": "url",
+    "og:type": "type",
+    "og:site_name": "site_name",
+    "article:published_time": "published",
+    "article:modified_time": "modified",
+}
+
+# 開いている要素: [タグ, 先頭チャンク, テキスト長, リンク内テキスト長, 日本語文字数, <p> 数, 段落スコア, class/id ヒント]
+_TAG, _START, _TEXT, _LINK, _JP, _PARAS, _SCORE, _HINT = range(8)
+
+
+class _DensityScanner(HTMLParser):
+    """
+    全要素を 1 パスで採点する。html.parser（feed）でも lxml のパーサターゲット（start / end / data）でも
+    動くので、処理量はページサイズに比例する。
+    """
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.chunks = []
+        self.stack = [["#root", 0, 0, 0, 0, 0, 0.0, 0]]
+        self.candidates = []   # (スコア, 予備スコア, 先頭チャンク, 末尾チャンク)
+        self.meta = {}
+        self.skip = 0
+        self.skip_tag = None   # 読み飛ばし中の要素名（script / svg など）。同名の入れ子だけ数える
+        self.links = 0
+        self.in_title = False
+        self.title_parts = []
+        self.h1_parts = None
+        self.h1_text = ""
+
+    # ---- html.parser のコールバック ----
+    def handle_starttag(self, tag, attrs):
+        self.start(tag, dict(attrs))
+
+    def handle_startendtag(self, tag, attrs):
+        self.start(tag, dict(attrs))
+        self.end(tag)
+
+    def handle_endtag(self, tag):
+        self.end(tag)
+
+    def handle_data(self, data):
+        self.data(data)
+
+    # ---- パーサイベント（lxml のターゲットインターフェースも兼ねる） ----
+    def start(self, tag, attrs):
+        if self.skip:
+            if tag == self.skip_tag:
+                self.skip += 1
+            return
+        if tag in _SKIP_TAGS:
+            self.skip = 1
+            self.skip_tag = tag
+            return
+        if tag == "meta":
+            key = (attrs.get("property") or attrs.get("name") or "").lower()
+            name = ARTICLE_META_KEYS.get(key)
+            if name and name not in self.meta:
+                self.meta[name] = (attrs.get("content") or "").strip()
+            return
+        if tag == "br":
+            self.chunks.append("\n")
+            return
+        if tag in _VOID_TAGS:
+            return
+        if tag == "html" and attrs.get("lang"):
+            self.meta["lang"] = attrs.get("lang")
+        elif tag == "title":
+            self.in_title = True
+        elif tag == "a":
+            self.links += 1
+        elif tag == "h1" and self.h1_parts is None and not self.h1_text:
+            self.h1_parts = []
+        if tag in _BLOCK_TAGS:
+            # html.parser は <p> を暗黙に閉じない
+            if self.stack[-1][_TAG] == "p":
+                self._close()
+            self.chunks.append("\n")
+        hint = 0
+        if tag in _CANDIDATE_TAGS:
+            names = (attrs.get("class") or "") + " " + (attrs.get("id") or "")
+            if _POSITIVE_HINT_RE.search(names):
+                hint += 25
+            if _NEGATIVE_HINT_RE.search(names):
+                hint -= 25
+        self.stack.append([tag, len(self.chunks), 0, 0, 0, 0, 0.0, hint])
+
+    def end(self, tag):
+        if self.skip:
+            # 閉じられていない子要素（<svg> 内の <path> など）があっても、対応する終了タグで抜ける
+            if tag == self.skip_tag:
+                self.skip -= 1
+            return
+        stack = self.stack
+        for i in range(len(stack) - 1, 0, -1):
+            if stack[i][_TAG] == tag:
+                while len(stack) > i:
+                    self._close()
+                return
+
+    def data(self, text):
+        if self.skip:
+            return
+        if self.in_title:
+            self.title_parts.append(text)
+            return
+        self.chunks.append(text)
+        if self.h1_parts is not None:
+            self.h1_parts.append(text)
+        n = len(text.strip())
+        if n:
+            node = self.stack[-1]
+            node[_TEXT] += n
+            if self.links:
+                node[_LINK] += n
+            node[_JP] += jp_char_count(text)
+
+    def close(self):
+        super().close()
+        while len(self.stack) > 1:
+            self._close()
+
+    def _close(self):
+        node = self.stack.pop()
+        parent = self.stack[-1]
+        tag = node[_TAG]
+        if tag == "title":
+            self.in_title = False
+        elif tag == "a":
+            self.links = max(self.links - 1, 0)
+        elif tag == "h1" and self.h1_parts is not None:
+            self.h1_text = _INLINE_SPACE_RE.sub(" ", "".join(self.h1_parts)).strip()
+            self.h1_parts = None
+        if tag in _BLOCK_TAGS:
+            self.chunks.append("\n")
+        text, link, jp = node[_TEXT], node[_LINK], node[_JP]
+        if tag == "p":
+            node[_PARAS] += 1
+            if text >= 25:
+                para = (1 + min(text / 100.0, 3)) * (0.5 + jp / text) * (1 - link / text)
+                parent[_SCORE] += para
+                if len(self.stack) > 1:
+                    self.stack[-2][_SCORE] += para / 2
+        if tag in _CANDIDATE_TAGS and text:
+            density = 1 - link / text
+            score = (node[_SCORE] + node[_HINT]) * density if node[_SCORE] else 0.0
+            fallback = (text - link) * (0.5 + jp / text)
+            self.candidates.append((score, fallback, node[_START], len(self.chunks)))
+        parent[_TEXT] += text
+        parent[_LINK] += link
+        parent[_JP] += jp
+        parent[_PARAS] += node[_PARAS]
+
+    def result(self) -> dict:
+        if self.candidates:
+            best = max(self.candidates, key=lambda c: (c[0], c[1]))
+            raw = "".join(self.chunks[best[2]:best[3]])
+        else:
+            raw = "".join(self.chunks)
+        lines = []
+        for ln in raw.split("\n"):
+            ln = _INLINE_SPACE_RE.sub(" ", ln).strip()
+            if len(ln) >= 2 and not BOILERPLATE_LINE_RE.search(ln):
+                lines.append(ln)
+        title = (self.h1_text or _INLINE_SPACE_RE.sub(" ", "".join(self.title_parts)).strip()
+                 or self.meta.get("og_title", ""))
+        return {"title": title, "body": "\n".join(lines), "meta": self.meta}
+
+
+def extract_article_density(html: str, parser=None) -> dict:
+    """
+    記事ページを 1 回だけ走査して {"title", "body", "meta"} を返す。
+    parser が "lxml"（HTML_PARSER="auto" で lxml あり）なら lxml のトークナイザで、それ以外は html.parser で走査する。
+    """
+    scanner = _DensityScanner()
+    if (parser or html_parser_name()) == "lxml" and lxml_etree is not None:
         try:
-            driver.get(search_url)
+            target = lxml_etree.HTMLParser(target=scanner)
+            target.feed(html)
+            target.close()
+            return scanner.result()
         except Exception:
-            continue
+            scanner = _DensityScanner()
+    scanner.feed(html)
+    scanner.close()
+    return scanner.result()
+
+
+def parse_article_html(html: str, parser=None):
+    """
+    記事ページの HTML からタイトルと本文を返す（title, body）。
+    ARTICLE_EXTRACTOR="soup" なら parse_article_html_soup（BeautifulSoup 版）を使う。
+    """
+    if ARTICLE_EXTRACTOR == "soup":
+        return parse_article_html_soup(html, parser)
+    try:
+        art = extract_article_density(html, parser)
+        return art["title"], art["body"]
+    except Exception:
+        return "", ""
+
+def synthetic_article_pages(n: int = 6, seed: int = 0) -> list:
+    """
+    ベンチマーク用の記事ページ（seed が同じなら毎回同じ HTML）。長いナビゲーション、深い div の入れ子、
+    script / 閉じていない子を持つ svg / noscript、本文（article）、関連記事とフッタを含む。
+    """
+    rnd = random.Random(seed)
+    sentence = "神は愛です。聖書はわたしたちに希望を与えます、そして平和について教えています。"
+    pages = []
+    for i in range(n):
+        nav = "".join(f'<li><a href="/ja/n{j}/">メニュー項目{j}</a></li>' for j in range(rnd.randrange(120, 200)))
+        paras = "".join(f"<p id='p{j}'>{sentence * rnd.randrange(2, 7)} <a href='/x'>参照</a> 聖句{j}</p>"
+                        for j in range(rnd.randrange(15, 30)))
+        related = "".join(f'<li><a href="/ja/d/{rnd.randrange(10 ** 8, 10 ** 9)}/">関連記事 {j}</a></li>'
+                          for j in range(40))
+        depth = rnd.randrange(10, 40)
+        pages.append(
+            f'<!DOCTYPE html><html lang="ja"><head><title>記事{i} — JW.ORG</title>'
+            f'<meta property="og:title" content="記事{i}"><meta name="description" content="説明{i}">'
+            f'<meta property="article:published_time" content="2024-01-0{i % 9 + 1}">'
+            f'<script>var x = "<div>not real</div>"; {"x" * 4000}</script><style>p{{color:red}}</style></head>'
+            f'<body><header><nav><ul>{nav}</ul></nav>'
+            '<svg viewBox="0 0 10 10"><g><path d="M0 0L10 10"><circle r="1"></g></svg></header>'
+            + "<div class='wrap'>" * depth
+            + f'<main><article id="article" class="article"><h1>見出し {i} の記事</h1>'
+            f'<noscript><p>JavaScript を有効にしてください</p></noscript><div class="bodyTxt">{paras}</div></article>'
+            f'<aside class="related"><ul>{related}</ul></aside></main>'
+            + "</div>" * depth
+            + '<footer><p>Copyright © 2024 Watch Tower</p></footer></body></html>')
+    return pages
+
+def benchmark_parsers(pages=None, repeat=5) -> dict:
+    """
+    パーサ毎の 1 ページあたり解析時間（ms）を返す。pages は HTML 文字列のリスト。
+    "<parser>/full" は全体解析、"<parser>/partial" は parse_article_html_soup の部分解析、
+    "<parser>/density" は extract_article_density の 1 パス抽出。
+    pages を省略すると synthetic_article_pages() を使う（保存ページが無くても同じ条件で再現できる）。
+    例: python jw_search_app_v12_edge_fixed10.py --bench-parse [saved1.html saved2.html ...]
+    """
+    if not pages:
+        pages = synthetic_article_pages()
+    parsers = ["html.parser"] + (["lxml"] if lxml is not None else [])
+    results = {}
+    for parser in parsers:
+        runs = (("full", lambda h: _article_from_soup(make_soup(h, parser=parser))),
+                ("partial", lambda h: parse_article_html_soup(h, parser)),
+                ("density", lambda h: extract_article_density(h, parser)))
+        for label, func in runs:
+            t0 = time.perf_counter()
+            for _ in range(repeat):
+                for html in pages:
+                    func(html)
+            elapsed = time.perf_counter() - t0
+            results[f"{parser}/{label}"] = round(elapsed * 1000 / (repeat * max(len(pages), 1)), 2)
+    return results
 
-        # ページ読み込み待機
+# ---------------------------------------------------------
+# asyncio 取得コア（検索結果ページ / 記事本文）
+# ---------------------------------------------------------
+def search_page_url(keyword: str, mode: str, start: int) -> str:
+    tpl = SEARCH_URL_RELEVANCE_TPL if mode == "relevance" else SEARCH_URL_DATE_TPL
+    return tpl.format(quote(keyword), start)
+
+
+class AsyncFetcher:
+    """
+    専用スレッドで asyncio イベントループを回し、取得をコルーチンで多重化する。
+    - 同時 in-flight 数は Semaphore で concurrency 件まで（OS スレッドは増えない）。実際の同時数は
+      in_flight / max_in_flight に出る（ホスト毎の接続数 pool_size とレート制御でも頭打ちになる）
+    - 各リクエストは asyncio.wait_for でタイムアウト
+    - submit() が返す Future を cancel() すれば実行中の取得も取り消される
+    aiohttp があればそれを使い、無ければ共有 FetchClient を executor で実行する。
+    永続キャッシュ（SQLite）の読み書きも executor で行い、ループのスレッドでは待たない。
+    URL はそのまま取得するので、ローカルの HTTP サーバ（serve_article_pages）で試験できる（--bench-fetch）。
+    """
+    def __init__(self, concurrency=ASYNC_FETCH_CONCURRENCY, timeout=ASYNC_FETCH_TIMEOUT,
+                 pool_size=HTTP_POOL_SIZE):
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.pool_size = pool_size
+        self._loop = None
+        self._sem = None
+        self._session = None
+        self._lock = threading.Lock()
+        self.in_flight = 0        # ループのスレッドでだけ増減する
+        self.max_in_flight = 0
+
+    # ---- event loop ----
+    def _ensure_loop(self):
+        with self._lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name="async-fetch", daemon=True).start()
+                self._loop = loop
+            return self._loop
+
+    async def _get_session(self):
+        if self._session is None and aiohttp is not None:
+            connector = aiohttp.TCPConnector(limit=self.concurrency, limit_per_host=self.pool_size,
+                                             ttl_dns_cache=300)
+            self._session = aiohttp.ClientSession(headers=HEADERS, connector=connector)
+        return self._session
+
+    async def _request(self, url, headers=None):
+        session = await self._get_session()
+        if session is None:
+            loop = asyncio.get_running_loop()
+            r = await loop.run_in_executor(
+                None, lambda: get_fetch_client().get(url, headers=headers, timeout=self.timeout,
+                                                     rate_limit=False))
+            return r.status_code, r.text, r.headers
+        async with session.get(url, headers=headers) as r:
+            text = "" if r.status == 304 else await r.text(errors="replace")
+            return r.status, text, r.headers
+
+    # ---- coroutines ----
+    async def fetch_response(self, url: str, headers=None, timeout=None):
+        """(status, text, response_headers) を返す。タイムアウト・接続エラーは (0, "", {})"""
+        if self._sem is None:
+            self._sem = asyncio.Semaphore(self.concurrency)
+        rate = get_rate_controller()
+        # レート待ちは semaphore の外で行う（待機中に同時実行枠を占有しない）
+        await rate.acquire_async(url)
+        async with self._sem:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            t0 = time.monotonic()
+            try:
+                status, text, resp_headers = await asyncio.wait_for(self._request(url, headers),
+                                                                    timeout or self.timeout)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                rate.feedback(url, 0, time.monotonic() - t0)
+                return 0, "", {}
+            finally:
+                self.in_flight -= 1
+            rate.feedback(url, status, time.monotonic() - t0,
+                          challenge=status == 200 and is_challenge_html(text))
+            return status, text, resp_headers
+
+    async def fetch_text(self, url: str, timeout=None):
+        """(status, text) を返す。タイムアウト・接続エラーは (0, "")"""
+        status, text, _ = await self.fetch_response(url, timeout=timeout)
+        return status, text
+
+    async def _cache_call(self, func, *args):
+        """ArticleDiskCache の同期メソッド（SQLite）を executor で呼ぶ（ループを止めない）"""
+        return await asyncio.get_running_loop().run_in_executor(None, func, *args)
+
+    async def fetch_conditional(self, url: str, cache=None, entry=None):
+        """
+        記事ページの条件付き GET（entry は cache.get_entry の行。検証子があれば If-None-Match /
+        If-Modified-Since を付ける）。304 ならエントリの鮮度を更新する。返り値:
+        ("not_modified", title, body) / ("html", html, etag, last_modified) / ("failed", "", "")
+        """
+        status, html, resp_headers = await self.fetch_response(url, headers=conditional_headers(entry))
+        if status == 304 and entry:
+            await self._cache_call(cache.mark_fresh, entry["url"])
+            return "not_modified", entry["title"], entry["body"]
+        if status != 200:
+            return "failed", "", ""
+        return "html", html, resp_headers.get("ETag"), resp_headers.get("Last-Modified")
+
+    async def fetch_cached(self, url: str, cache=None):
+        """
+        本文取得の前段（BodyPipeline の取得ステージ）。期限内の永続キャッシュにあれば
+        ("cache_hit", title, body)、無ければ fetch_conditional の結果を返す（解析はしない）。
+        """
+        entry = None
+        if cache is not None:
+            hit = await self._cache_call(cache.get, url)
+            if hit is not None:
+                return ("cache_hit",) + tuple(hit)
+            entry = await self._cache_call(cache.get_entry, url)
+        return await self.fetch_conditional(url, cache, entry)
+
+    async def _fetch_and_store(self, url, cache, entry):
+        """(title, body, state) を返す。state: "not_modified" / "updated" / "failed" """
+        # キャッシュ済みなら条件付き GET（304 なら本文の再取得・再パース不要）
+        item = await self.fetch_conditional(url, cache, entry)
+        if item[0] != "html":
+            return item[1], item[2], item[0]
+        _, html, etag, last_modified = item
+        # パースは CPU 処理なのでループを止めないよう executor で行う
+        title, body = await self._cache_call(parse_article_html, html)
+        if body and cache is not None:
+            await self._cache_call(lambda: cache.put(url, title, body, etag=etag, last_modified=last_modified))
+        return title, body, ("updated" if body else "failed")
+
+    async def refresh_articles(self, urls, cache=None):
+        """
+        保存済みキーワードの定期更新用。TTL 内でも必ず再検証し
+        {"not_modified": n, "updated": n, "failed": n} を返す（cache を省略すると共有の永続キャッシュ）。
+        """
+        if cache is None:
+            cache = get_article_disk_cache()
+        counts = {"not_modified": 0, "updated": 0, "failed": 0}
+
+        async def one(u):
+            entry = await self._cache_call(cache.get_entry, u) if cache is not None else None
+            _, _, state = await self._fetch_and_store(u, cache, entry)
+            counts[state] += 1
+
+        await asyncio.gather(*[one(u) for u in urls])
+        return counts
+
+    async def _search_page(self, keyword, mode, start):
+        """検索結果 1 ページ → (state, links)。state: "ok" / "empty" / "fallback"（チャレンジ・JS描画）/ "error" """
+        url = search_page_url(keyword, mode, start)
+        status, html = await self.fetch_text(url)
+        if status in (403, 429) or is_challenge_html(html):
+            return "fallback", []
+        if any(m in html for m in NO_RESULTS_MARKERS):
+            return "empty", []
+        if status != 200:
+            return ("fallback" if start == 0 else "error"), []
+        loop = asyncio.get_running_loop()
+        links = await loop.run_in_executor(None, extract_search_result_links, html, url)
+        if not links:
+            return ("fallback" if start == 0 else "empty"), []
+        return "ok", links
+
+    async def cached_search_page(self, keyword, mode, start):
+        """SearchPageCache 経由の _search_page（キャッシュ済み / 取得中のページは通信しない）"""
+        return await get_search_page_cache().get_or_load_async(
+            keyword, mode, start, lambda: self._search_page(keyword, mode, start))
+
+    async def _collect_mode(self, keyword, mode, max_items):
+        pages = max(1, (max_items + PAGE_STEP - 1) // PAGE_STEP)
+        tasks = [asyncio.create_task(self.cached_search_page(keyword, mode, i * PAGE_STEP))
+                 for i in range(pages)]
+        index = {t: i for i, t in enumerate(tasks)}
+        page_links = [[] for _ in tasks]
+        cutoff = len(tasks)
+        pending = set(tasks)
         try:
-            WebDriverWait(driver, SELENIUM_PAGE_TIMEOUT).until(
-                EC.presence_of_element_located((By.CSS_SELECTOR, "main, body"))
-            )
-        except Exception:
-            time.sleep(1.2)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for t in done:
+                    if t.cancelled():
+                        continue
+                    i = index[t]
+                    state, links = t.result()
+                    if state == "fallback":
+                        return None
+                    page_links[i] = links
+                    if state in ("empty", "error") and i < cutoff:
+                        # 空ページ以降は結果が無いので、後続ページの取得を取り消す
+                        cutoff = i
+                        for later in [p for p in pending if index[p] > i]:
+                            later.cancel()
+                            pending.discard(later)
+        finally:
+            for t in pending:
+                t.cancel()
+
+        # 順位順にマージ（ページ順 → ページ内順）
+        seen = ArticleUrlSet()
+        collected = [href for links in page_links[:cutoff] for href in seen.merge(links)]
+        return collected[:max_items]
 
-        time.sleep(1.0 + random.uniform(0.3, 0.8))
+    async def collect_search_results(self, keyword: str, plan: dict):
+        """
+        plan = {"relevance": n, "date": m} の全結果ページを同時に取得する。
+        返り値: {mode: [url, ...]}。チャレンジ / JS 描画で取れなかったモードは None。
+        """
+        modes = list(plan.items())
+        results = await asyncio.gather(*[self._collect_mode(keyword, m, n) for m, n in modes])
+        return {m: urls for (m, _), urls in zip(modes, results)}
 
-        # 検索結果が "該当なし" のケースを検出
-        html = driver.page_source
-        if "該当する結果は見つかりません" in html or "お探しのページが見つかりません" in html:
-            break
+    # ---- sync facade ----
+    def submit(self, coro) -> concurrent.futures.Future:
+        """コルーチンをループに投入し concurrent.futures.Future を返す（Tk / スレッドから利用）"""
+        return asyncio.run_coroutine_threadsafe(coro, self._ensure_loop())
 
-        # --- 結果リンク抽出 ---
-        anchors = driver.find_elements(By.CSS_SELECTOR, "a[href]")
-        for a in anchors:
+    def run(self, coro, timeout=None):
+        fut = self.submit(coro)
+        try:
+            return fut.result(timeout)
+        except concurrent.futures.TimeoutError:
+            fut.cancel()
+            raise
+
+    def close(self):
+        with self._lock:
+            loop, self._loop = self._loop, None
+        if loop is None:
+            return
+        session, self._session = self._session, None
+        if session is not None:
             try:
-                href = a.get_attribute("href")
+                asyncio.run_coroutine_threadsafe(session.close(), loop).result(5)
             except Exception:
-                continue
-            if not href:
-                continue
-            if href in visited_urls:
-                continue
-            visited_urls.add(href)
+                pass
+        loop.call_soon_threadsafe(loop.stop)
 
-            # JW.org 内部のみ
-            if not href.startswith(BASE_DOMAIN + "/ja/"):
-                continue
+_async_fetcher = None
+_async_fetcher_lock = threading.Lock()
 
-            # カテゴリページなどは除外
-            if any(x in href for x in [
-                "/search/?", "/topics/", "/languages/", "/bible/", "/library/",
-                "/study-tools/", "/bible-teachings/", "/videos/", "/news/",
-                "/whats-new/"
-            ]):
-                continue
+def get_async_fetcher() -> AsyncFetcher:
+    """プロセス共通の AsyncFetcher を返す（初回呼び出し時に生成）"""
+    global _async_fetcher
+    with _async_fetcher_lock:
+        if _async_fetcher is None:
+            _async_fetcher = AsyncFetcher()
+        return _async_fetcher
 
-            # 記事 URL 判定
-            # パターン： /d/123456789, /YYYYMM とか
-            if extract_docid_from_url(href) is None:
-                # docid が取れないページは本文が記事ではないのでスキップ
-                continue
+# ---------------------------------------------------------
+# ローカルの代替サーバ（jw.org の代わりに取得系を試す）
+# ---------------------------------------------------------
+def serve_article_pages(pages, port=0):
+    """
+    pages（HTML 文字列のリスト）を http://127.0.0.1:<port>/ja/d/<番号>/ で返すローカル HTTP サーバを
+    別スレッドで起動し (server, base_url) を返す。番号 % len(pages) 番目のページを ETag 付きで返し、
+    If-None-Match が一致すれば 304 を返す。server.max_active はサーバ側で見えた最大の同時処理数。
+    止めるときは server.shutdown()。
+    """
+    lock = threading.Lock()
 
-            collected.append(href)
-            if len(collected) >= max_items:
-                return collected
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            with lock:
+                self.server.active += 1
+                self.server.max_active = max(self.server.max_active, self.server.active)
+            try:
+                self._respond()
+            finally:
+                with lock:
+                    self.server.active -= 1
+
+        def _respond(self):
+            m = re.match(r"/ja/d/(\d+)/?$", self.path)
+            if not m:
+                self.send_error(404)
+                return
+            data = pages[int(m.group(1)) % len(pages)].encode("utf-8")
+            etag = f'"{zlib.crc32(data):08x}"'
+            if self.headers.get("If-None-Match") == etag:
+                self.send_response(304)
+                self.send_header("ETag", etag)
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(data)))
+            self.send_header("ETag", etag)
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *args):
+            pass
 
-        # 次ページが無ければ終了
-        if start > 0 and len(collected) == 0:
-            # rel=0/date=0 件 → もう出ない
-            break
+    server = ThreadingHTTPServer(("127.0.0.1", port), Handler, bind_and_activate=False)
+    # listen の backlog（既定 5）が小さいと、数百件を同時に投げたときに接続が落ちる
+    server.request_queue_size = ASYNC_FETCH_CONCURRENCY
+    server.server_bind()
+    server.server_activate()
+    server.active = server.max_active = 0
+    threading.Thread(target=server.serve_forever, name="stand-in-server", daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
 
-    return collected[:max_items]
+def benchmark_async_fetch(n: int = 30) -> dict:
+    """
+    serve_article_pages（synthetic_article_pages）に対して AsyncFetcher.refresh_articles を 2 回走らせる。
+    1 回目は取得・解析・保存で "updated"、2 回目は条件付き GET で "not_modified" になるはず。
+    loop_lag_ms は取得中のイベントループの最大の遅れ（SQLite や解析がループで走ると大きくなる）。
+    max_in_flight は AsyncFetcher 側、server_max_active は代替サーバ側で見えた実際の同時数
+    （ループバックはレート制御の対象外なので、semaphore（ASYNC_FETCH_CONCURRENCY）か n で頭打ちになる）。
+    例: python jw_search_app_v12_edge_fixed10.py --bench-fetch 300
+    """
+    server, base = serve_article_pages(synthetic_article_pages())
+    urls = [f"{base}/ja/d/{100000000 + i}/" for i in range(n)]
+    # 代替サーバは 1 ホストなので、ホスト毎の接続数も semaphore と同じにする
+    fetcher = AsyncFetcher(pool_size=ASYNC_FETCH_CONCURRENCY)
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = ArticleDiskCache(os.path.join(tmp, "bench_cache.sqlite3"))
+
+        async def one_pass():
+            lag = [0.0]
+
+            async def ticker():
+                while True:
+                    t = time.perf_counter()
+                    await asyncio.sleep(0.005)
+                    lag[0] = max(lag[0], time.perf_counter() - t - 0.005)
+
+            tick = asyncio.create_task(ticker())
+            fetcher.max_in_flight = server.max_active = 0
+            t0 = time.perf_counter()
+            try:
+                counts = await fetcher.refresh_articles(urls, cache)
+            finally:
+                tick.cancel()
+            return {**counts, "seconds": round(time.perf_counter() - t0, 2), "loop_lag_ms": round(lag[0] * 1000, 1),
+                    "max_in_flight": fetcher.max_in_flight, "server_max_active": server.max_active}
+
+        try:
+            return {"first": fetcher.run(one_pass()), "revalidate": fetcher.run(one_pass()),
+                    "cache": cache.stats()}
+        finally:
+            fetcher.close()
+            cache.close()
+            server.shutdown()
 
 # ---------------------------------------------------------
-# 本文抽出（requests版）
+# 本文の先読みパイプライン（収集 → 取得 → 解析）
 # ---------------------------------------------------------
-def extract_article_body(url: str):
-    """JW.org 記事ページの本文を正確に抽出する。カテゴリページは除外される"""
-    try:
-        r = requests.get(url, headers=HEADERS, timeout=12)
-        if r.status_code != 200:
-            return "", ""
-        soup = BeautifulSoup(r.text, "html.parser")
+class BodyPipeline:
+    """
+    検索結果の収集と本文の取得・解析を重ねて走らせる producer/consumer パイプライン。
+      feed() / request()（収集側・GUI） → URL キュー → 取得ワーカー → 解析キュー → 解析ワーカー
+    - どちらのキューも優先度順（BODY_PRIORITY_*）。ダブルクリック > 表示中・選択中の行 > 裏の先読み
+    - 同じ URL への要求は 1 本の取得を共有する（single-flight）。request() は共有 Future を返し、
+      キュー待ちのものはより高い優先度で積み直す
+    - 先読み（feed）は URL キューに最大 url_queue_size 件まで。満杯なら収集側が待つ。
+      優先要求はこの枠を使わないので待たされない。解析キューも有限（満杯なら取得側が待つ）
+    - 取得ステージは AsyncFetcher のイベントループ上のコルーチン（同時 fetch_workers 件まで）。
+      ディスパッチャのスレッドが URL キューから優先度順に取り出して投入する。解析ステージはスレッド
+    - 永続キャッシュにある記事は取得ステージで即完了、期限切れは条件付き GET（304 なら解析不要）
+    - new_run() で世代を進めると、前の世代の未処理分は捨てられる
+    - on_done(url, title, body) はワーカースレッドから完了順に呼ばれるので、
+      GUI 側は master.after で Tk スレッドに戻すこと
+    送信ペースは FetchClient 内の共有 AdaptiveRateController が制御する。
+    """
+    def __init__(self, fetch_workers=BODY_FETCH_WORKERS, parse_workers=BODY_PARSE_WORKERS,
+                 url_queue_size=BODY_URL_QUEUE_SIZE, parse_queue_size=BODY_PARSE_QUEUE_SIZE):
+        self.url_q = queue.PriorityQueue()
+        self.parse_q = queue.PriorityQueue(maxsize=parse_queue_size)
+        self._slots = threading.Semaphore(url_queue_size)   # 先読み分の URL キュー枠
+        self._inflight = threading.Semaphore(fetch_workers)  # 取得中のコルーチン数
+        self._seq = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._gen = 0
+        self._on_done = None
+        self._jobs = {}       # url -> {"future", "priority", "state": queued/running/done}
+        self._reset_counters()
+        self._threads = [
+            threading.Thread(target=self._dispatch, name="body-fetch", daemon=True)
+        ] + [
+            threading.Thread(target=self._parse_worker, name=f"body-parse-{i}", daemon=True)
+            for i in range(parse_workers)
+        ]
+        for t in self._threads:
+            t.start()
+
+    def _reset_counters(self):
+        self._t0 = time.monotonic()
+        self._queued = 0
+        self._done = 0
+        self._joined = 0
+        self._promoted = 0
+        self._stage = {name: {"count": 0, "busy": 0.0} for name in ("fetch", "parse")}
+        self._outcomes = {"cache_hit": 0, "not_modified": 0, "parsed": 0, "failed": 0}
+
+    # ---- 収集側 / GUI ----
+    def new_run(self, on_done=None) -> int:
+        """新しい世代を始める（前の世代の未処理 URL / HTML は捨てる）。世代番号を返す"""
+        with self._lock:
+            self._gen += 1
+            self._on_done = on_done
+            self._cancel_jobs()
+            self._reset_counters()
+            gen = self._gen
+        self._drain()
+        return gen
+
+    def feed(self, gen: int, urls) -> int:
+        """
+        先読みする URL を積む（既に積んだ / 取得済みの URL は無視）。URL キューが満杯なら空くまで待つ。
+        世代が変わったら途中で抜ける。積んだ件数を返す。
+        """
+        n = 0
+        for url in urls:
+            with self._lock:
+                if url in self._jobs:
+                    continue
+            if not self._acquire_slot(gen):
+                break
+            with self._lock:
+                if gen != self._gen or url in self._jobs:
+                    self._slots.release()
+                    continue
+                self._add_job(url, BODY_PRIORITY_BACKGROUND, slot=True)
+            n += 1
+        return n
 
-        # --- タイトル抽出 ---
-        title_el = soup.find("h1")
-        title = title_el.get_text(strip=True) if title_el else ""
+    def request(self, url: str, priority=BODY_PRIORITY_INTERACTIVE) -> concurrent.futures.Future:
+        """
+        url の (title, body) を返す Future。取得中・キュー待ちなら同じ Future を共有し、
+        キュー待ちのものは priority まで繰り上げる。成功済みなら完了済みの Future を返す
+        （失敗した URL は新しく取り直す）。
+        """
+        with self._lock:
+            job = self._jobs.get(url)
+            if job is None:
+                return self._add_job(url, priority)["future"]
+            self._joined += 1
+            if job["state"] == "queued" and priority < job["priority"]:
+                # 古いエントリはキューに残るが、取り出した時に state を見て読み飛ばす
+                job["priority"] = priority
+                self._promoted += 1
+                self._enqueue(url, priority, slot=False)
+            return job["future"]
+
+    def prioritize(self, urls, priority=BODY_PRIORITY_VISIBLE):
+        """表示中 / 選択中の行などを先に取得させる（未投入なら投入する）"""
+        for url in urls:
+            self.request(url, priority)
+
+    def _add_job(self, url, priority, slot=False):
+        job = self._jobs[url] = {"future": concurrent.futures.Future(), "priority": priority, "state": "queued"}
+        self._queued += 1
+        self._enqueue(url, priority, slot)
+        return job
+
+    def _enqueue(self, url, priority, slot):
+        self._seq += 1
+        self.url_q.put((priority, self._seq, self._gen, url, slot))
+
+    def _acquire_slot(self, gen) -> bool:
+        while not self._stop.is_set() and gen == self._gen:
+            if self._slots.acquire(timeout=0.2):
+                return True
+        return False
+
+    async def _put_parse(self, item, gen) -> bool:
+        # 解析キューが満杯なら空くまで待つ（ループのスレッドなのでブロックせずに待つ）
+        while not self._stop.is_set() and gen == self._gen:
+            try:
+                self.parse_q.put_nowait(item)
+                return True
+            except queue.Full:
+                await asyncio.sleep(0.05)
+        return False
+
+    def _cancel_jobs(self):
+        for job in self._jobs.values():
+            job["future"].cancel()
+        self._jobs = {}
+
+    def _drain(self):
+        while True:
+            try:
+                item = self.url_q.get_nowait()
+            except queue.Empty:
+                break
+            if item[4]:
+                self._slots.release()
+        while True:
+            try:
+                self.parse_q.get_nowait()
+            except queue.Empty:
+                break
 
-        # --- 本文抽出 ---
-        # パターン1: article[data-article-id]
-        body_container = soup.find("article")
-        if not body_container:
-            # パターン2: div class="content" / "body" / "article-body"
-            body_container = soup.find("div", class_=lambda c: c and ("content" in c or "body" in c))
+    # ---- ステージ ----
+    def _dispatch(self):
+        """URL キューから優先度順に取り出し、取得コルーチンを AsyncFetcher のループに投入する"""
+        fetcher = get_async_fetcher()
+        while not self._stop.is_set():
+            if not self._inflight.acquire(timeout=0.2):
+                continue
+            try:
+                priority, _seq, gen, url, slot = self.url_q.get(timeout=0.2)
+            except queue.Empty:
+                self._inflight.release()
+                continue
+            if slot:
+                self._slots.release()
+            with self._lock:
+                job = self._jobs.get(url) if gen == self._gen else None
+                if job is not None and job["state"] == "queued":
+                    job["state"] = "running"
+                else:
+                    job = None   # 古い世代 / 繰り上げ済みの重複エントリ
+            if job is None:
+                self._inflight.release()
+                continue
+            fetcher.submit(self._fetch(fetcher, gen, url, job))
 
-        if not body_container:
-            # パターン3: section 内の p
-            body_container = soup.find("section")
+    async def _fetch(self, fetcher, gen, url, job):
+        """取得ステージ 1 件: キャッシュ / 304 ならそのまま完了、HTML なら解析キューへ"""
+        t0 = time.monotonic()
+        try:
+            try:
+                item = await fetcher.fetch_cached(url, get_article_disk_cache())
+            except Exception as e:
+                print("body fetch failed:", url, e)
+                item = ("failed", "", "")
+            self._account("fetch", time.monotonic() - t0)
+            if item[0] == "html":
+                with self._lock:
+                    self._seq += 1
+                    key = (job["priority"], self._seq)
+                if not await self._put_parse(key + (gen, url) + item[1:], gen):
+                    job["future"].cancel()
+            else:
+                # on_done（GUI 側のメモリキャッシュ更新など）はループの外で呼ぶ
+                await asyncio.get_running_loop().run_in_executor(None, self._finish, gen, url, *item)
+        finally:
+            self._inflight.release()
 
-        if not body_container:
-            # fallback: p を全部
-            paragraphs = [p.get_text(" ", strip=True) for p in soup.find_all("p")]
-            return title, "\n".join(paragraphs)
+    def _parse_worker(self):
+        while not self._stop.is_set():
+            try:
+                _priority, _seq, gen, url, html, etag, last_modified = self.parse_q.get(timeout=0.2)
+            except queue.Empty:
+                continue
+            if gen != self._gen:
+                continue
+            t0 = time.monotonic()
+            title, body = parse_article_html(html)
+            cache = get_article_disk_cache()
+            if body and cache is not None:
+                cache.put(url, title, body, etag=etag, last_modified=last_modified)
+            self._account("parse", time.monotonic() - t0)
+            self._finish(gen, url, "parsed" if body else "failed", title, body)
+
+    def _account(self, stage, elapsed):
+        with self._lock:
+            self._stage[stage]["count"] += 1
+            self._stage[stage]["busy"] += elapsed
 
-        # 正規本文（p）抽出
-        ps = body_container.find_all("p")
-        body = "\n".join([p.get_text(" ", strip=True) for p in ps if p.get_text(strip=True)])
+    def _finish(self, gen, url, outcome, title, body):
+        with self._lock:
+            if gen != self._gen:
+                return
+            job = self._jobs.get(url)
+            if job is not None:
+                job["state"] = "done"
+                if not body:
+                    # 失敗した URL は覚えない → 次の request() / feed() で取り直す
+                    del self._jobs[url]
+            self._done += 1
+            self._outcomes[outcome] += 1
+            on_done = self._on_done
+        if job is not None and not job["future"].done():
+            job["future"].set_result((title, body))
+        if on_done:
+            try:
+                on_done(url, title, body)
+            except Exception as e:
+                print("pipeline callback error:", e)
 
-        return title, body
+    # ---- 観測 ----
+    def progress(self):
+        """今の世代の (完了件数, 投入件数)"""
+        with self._lock:
+            return self._done, self._queued
 
-    except Exception:
-        return "", ""
+    def stats(self) -> dict:
+        with self._lock:
+            elapsed = max(time.monotonic() - self._t0, 1e-6)
+            return {
+                "url_queue": self.url_q.qsize(),
+                "parse_queue": self.parse_q.qsize(),
+                "queued": self._queued,
+                "done": self._done,
+                "joined": self._joined,
+                "promoted": self._promoted,
+                **{f"{name}_per_s": round(st["count"] / elapsed, 2) for name, st in self._stage.items()},
+                **{f"{name}_busy_s": round(st["busy"], 2) for name, st in self._stage.items()},
+                **self._outcomes,
+            }
+
+    def cancel_pending(self):
+        """未処理の URL / HTML を捨てる（実行中の取得・解析は完了まで走るが結果は捨てる）"""
+        with self._lock:
+            self._gen += 1
+            self._cancel_jobs()
+        self._drain()
+
+    def shutdown(self):
+        self._stop.set()
+        with self._lock:
+            self._cancel_jobs()
+        self._drain()
 
 # End of Part2
 # jw_search_app_v12_edge_fixed10.py — Part3/4
 # === GUI + 検索処理 + 本文キャッシュ + 要約API入力欄 ===
 
+# ---------------------------------------------------------
+# バックグラウンドジョブ（Tk を止めない / 取り消し可能 / 最新優先）
+# ---------------------------------------------------------
+class Job:
+    """JobScheduler が返すハンドル。ワーカー側は cancel_event / cancelled を見て途中で抜けること"""
+    def __init__(self, job_id: int, kind: str):
+        self.id = job_id
+        self.kind = kind
+        self.cancel_event = threading.Event()
+        self.future = None
+
+    @property
+    def cancelled(self) -> bool:
+        return self.cancel_event.is_set()
+
+    def cancel(self):
+        self.cancel_event.set()
+        if self.future is not None:
+            self.future.cancel()
+
+class JobScheduler:
+    """
+    GUI 用のジョブスケジューラ。
+    - submit(kind, func, ...) で func(job, *args) をワーカースレッドで実行し、Job（連番 ID 付き）を返す
+    - 同じ kind のジョブを submit すると前のジョブは取り消される（最新優先）
+    - 取り消しは協調的: Job.cancel_event をセットし、func 側が見て抜ける
+    - 結果 / 途中経過は post() で master.after 経由で Tk スレッドに戻す。
+      取り消し済みジョブの分は Tk 側で捨てる
+    """
+    def __init__(self, master, max_workers=4):
+        self.master = master
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job")
+        self._latest = {}     # kind -> Job
+        self._next_id = 0
+        self._lock = threading.Lock()
+
+    def submit(self, kind: str, func, *args, on_result=None, on_error=None) -> Job:
+        with self._lock:
+            self._next_id += 1
+            job = Job(self._next_id, kind)
+            old = self._latest.get(kind)
+            self._latest[kind] = job
+        if old is not None:
+            old.cancel()
+            print(f"[job] {kind}#{old.id} superseded by #{job.id}")
+        job.future = self.executor.submit(self._run, job, func, args, on_result, on_error)
+        return job
+
+    def _run(self, job, func, args, on_result, on_error):
+        if job.cancelled:
+            return
+        try:
+            result = func(job, *args)
+        except Exception as e:
+            if job.cancelled:
+                return
+            print(f"[job] {job.kind}#{job.id} failed:", e)
+            if on_error:
+                self.post(job, on_error, e)
+            return
+        if on_result:
+            self.post(job, on_result, result)
+
+    def post(self, job, callback, *args):
+        """ワーカースレッドから callback(*args) を Tk スレッドで実行する（取り消し済みなら実行しない）"""
+        def deliver():
+            if not job.cancelled:
+                callback(*args)
+        try:
+            self.master.after(0, deliver)
+        except RuntimeError:
+            pass   # Tk は終了済み
+
+    def is_current(self, job) -> bool:
+        with self._lock:
+            return self._latest.get(job.kind) is job and not job.cancelled
+
+    def cancel(self, kind: str):
+        with self._lock:
+            job = self._latest.pop(kind, None)
+        if job is not None:
+            job.cancel()
+        return job
+
+    def shutdown(self):
+        with self._lock:
+            jobs, self._latest = list(self._latest.values()), {}
+        for job in jobs:
+            job.cancel()
+        self.executor.shutdown(wait=False)
+
 class JWAppGUI:
     def __init__(self, master):
         self.master = master
@@ -634,11 +2597,33 @@ class JWAppGUI:
 
         # Selenium 検索器（JW.org公式検索を使う）
         self.searcher = JWOrgSearcher()
-        self.cached_body = {}     # URL → (title, body)
+        # フォールバック用の Edge を裏で先に起動しておく
+        self.searcher.pool.prewarm()
+        # URL → (title, body)。バイト数上限付き、追い出した本文は永続キャッシュへ
+        self.article_cache = ArticleMemoryCache(spill=get_article_disk_cache())
         self.current_url = None
-
-        # Excel
-        self.excel = ExcelWriter()
+        # セッション中に見た記事 URL（docid 単位）。別名 URL は最初に見た代表 URL にまとめる
+        self.url_index = ArticleUrlSet()
+        self._summaries = {}     # 記事キー（ArticleUrlSet.key）→ 要約
+        self._exported = set()   # Excel に書いた記事キー
+
+        # 本文の先読みパイプライン（検索結果が届き次第、取得 → 解析を始める）
+        self.pipeline = BodyPipeline()
+        self._fetch_gen = 0
+        self._search_running = False
+        self._body_reported = False
+
+        # 検索はジョブとして裏で走らせる（新しい検索を始めると前の検索は取り消される）
+        self.jobs = JobScheduler(master)
+        self._rows = {}          # URL → Treeview iid（挿入順 = 表示順）
+        self._rel_urls = set()   # 関連度モードで出た URL（先頭側に並べる）
+        self._search_t0 = 0.0
+
+        # Excel（要約生成した記事）と、収集した記事を 1 件ずつ追記する JSONL / CSV
+        self.excel = ExcelWriter(EXCEL_PATH)
+        self.records = open_record_sink(EXPORT_STREAM_BASE)
+        self._streamed = set()   # records に書いた記事キー
+        self._stream_lock = threading.Lock()
 
         # --- UI を構築 ---
         self.build_ui()
@@ -665,6 +2650,7 @@ class JWAppGUI:
         ttk.Entry(top, textvariable=self.var_date, width=6).pack(side="left")
 
         ttk.Button(top, text="検索開始", command=self.start_search).pack(side="left", padx=10)
+        ttk.Button(top, text="検索停止", command=self.cancel_search).pack(side="left")
 
         # 要約API key
         ttk.Label(top, text="要約APIキー:").pack(side="left", padx=8)
@@ -684,12 +2670,19 @@ class JWAppGUI:
         self.tree.heading("url", text="URL（ダブルクリックで本文表示）")
         self.tree.pack(fill="both", expand=True)
         self.tree.bind("<Double-1>", self.on_tree_double_click)
+        # 選択中・表示中の行は裏の先読みより先に取得する
+        self.tree.bind("<<TreeviewSelect>>", self._on_tree_select)
+        for seq in ("<MouseWheel>", "<Button-4>", "<Button-5>", "<KeyRelease>", "<Configure>"):
+            self.tree.bind(seq, self._schedule_visible_prefetch, add="+")
+        self._visible_after = None
 
         # 全選択/解除
         btns = ttk.Frame(left)
         btns.pack(fill="x", pady=5)
         ttk.Button(btns, text="全選択", command=self.select_all).pack(side="left", padx=4)
         ttk.Button(btns, text="全解除", command=self.clear_all).pack(side="left", padx=4)
+        self.lbl_status = ttk.Label(btns, text="")
+        self.lbl_status.pack(side="left", padx=8)
 
         # --- 右側 ---
         right = ttk.Frame(pan, padding=5)
@@ -702,6 +2695,7 @@ class JWAppGUI:
 
         # 要約ボタン
         ttk.Button(right, text="要約生成", command=self.make_summary).pack(pady=5)
+        ttk.Button(right, text="一覧を一括出力（Excel / JSONL / CSV）", command=self.export_all).pack(pady=2)
 
         # 要約表示
         ttk.Label(right, text="要約結果").pack(anchor="w")
@@ -731,47 +2725,160 @@ class JWAppGUI:
         date_n = self.var_date.get()
 
         self.tree.delete(*self.tree.get_children())
-        self.cached_body.clear()
         self.current_url = None
 
-        print("=== 検索開始 ===")
-
-        # JW.org 公式検索で取得
-        rel_urls = self.searcher.collect(kw, "relevance", rel_n)
-        print(f"[JW.org] rel collected {len(rel_urls)}")
+        self._rows = {}
+        self._rel_urls = set()
+        self._search_t0 = time.monotonic()
+        self._search_running = True
+        self.lbl_status.config(text="検索中…")
+        body_gen = self._start_body_run()
 
-        date_urls = self.searcher.collect(kw, "date", date_n)
-        print(f"[JW.org] date collected {len(date_urls)}")
+        # 前の検索がまだ走っていれば JobScheduler が取り消す（最新優先）
+        job = self.jobs.submit("search", self._search_job, kw, {"relevance": rel_n, "date": date_n}, body_gen,
+                               on_result=self._on_search_done, on_error=self._on_search_failed)
+        print(f"=== 検索開始 (job #{job.id}) ===")
 
-        date_urls = self.searcher.collect(kw, "date", date_n)
-        print(f"[JW.org] date collected {len(date_urls)}")
-
-        # 重複排除
-        all_urls = []
-        for u in rel_urls + date_urls:
-            if u not in all_urls:
-                all_urls.append(u)
+    def _search_job(self, job, kw, plan, body_gen):
+        """
+        ワーカースレッドで実行する検索ジョブ。
+        JW.org 公式検索（rel/date の全ページを同時に投げ、届いたページから順に表示）。
+        届いたページの URL はそのまま本文パイプラインにも流す（キューが満杯なら収集側が待つ）。
+        URL は url_index で代表 URL に引き直すので、同じ記事（docid）を別 URL で二度取得しない。
+        """
+        for mode, urls in self.searcher.stream_all(kw, plan, cancel=job.cancel_event):
+            if job.cancelled:
+                break
+            urls = [self.url_index.add(u)[0] for u in urls]
+            self.jobs.post(job, self._on_search_batch, mode, urls)
+            self.pipeline.feed(body_gen, [u for u in urls if u not in self.article_cache])
+
+    def cancel_search(self):
+        """実行中の検索と、その本文取得を止める"""
+        job = self.jobs.cancel("search")
+        if job is None:
+            return
+        self.pipeline.cancel_pending()
+        self._search_running = False
+        print(f"=== 検索停止 (job #{job.id}) ===")
+        self.lbl_status.config(text=f"停止しました（{len(self._rows)} 件）")
 
-        print(f"総取得 URL：{len(all_urls)} 件")
+    def _on_search_failed(self, e):
+        self._search_running = False
+        self.lbl_status.config(text=f"検索に失敗しました: {e}")
 
-        # GUI に表示
-        for url in all_urls:
-            self.tree.insert("", "end", values=(url,))
+    def _on_search_batch(self, mode, urls):
+        """
+        Tk スレッドで 1 ページ分を Treeview に追加する。
+        表示順は従来どおり「関連度の結果 → 新しい順の結果」（重複は先に出た位置のみ）:
+        関連度の行は関連度ブロックの末尾に挿入し、先に新しい順で出ていた URL はそこへ移動する。
+        """
+        if not self._rows:
+            print(f"[JW.org] 最初の結果まで {time.monotonic() - self._search_t0:.2f}s")
+        for url in urls:
+            iid = self._rows.get(url)
+            if mode == "relevance":
+                if url in self._rel_urls:
+                    continue
+                if iid is None:
+                    self._rows[url] = self.tree.insert("", len(self._rel_urls), values=(url,))
+                else:
+                    self.tree.move(iid, "", len(self._rel_urls))
+                self._rel_urls.add(url)
+            elif iid is None:
+                self._rows[url] = self.tree.insert("", "end", values=(url,))
+        self.lbl_status.config(text=f"検索中… {len(self._rows)} 件")
+        self._schedule_visible_prefetch()
 
-        # バックグラウンド本文取得
-        threading.Thread(target=self.fetch_body_background, args=(all_urls,), daemon=True).start()
+    # ---------------------------------------------------------
+    # 表示中 / 選択中の行を優先して先読み
+    # ---------------------------------------------------------
+    def _schedule_visible_prefetch(self, _event=None):
+        # スクロール・リサイズ等が続く間はまとめて 1 回だけ走らせる
+        if self._visible_after is None:
+            self._visible_after = self.master.after(150, self._prefetch_visible)
+
+    def _prefetch_visible(self):
+        self._visible_after = None
+        urls = [url for url, iid in self._rows.items()
+                if url not in self.article_cache and self.tree.bbox(iid)]
+        self.pipeline.prioritize(urls, BODY_PRIORITY_VISIBLE)
+
+    def _on_tree_select(self, _event=None):
+        urls = [self.tree.item(iid, "values")[0] for iid in self.tree.selection()]
+        urls = [u for u in urls if u not in self.article_cache]
+        self.pipeline.prioritize(urls, BODY_PRIORITY_VISIBLE)
+
+    def _on_search_done(self, _result=None):
+        all_urls = [self.tree.item(iid, "values")[0] for iid in self.tree.get_children()]
+        print(f"[JW.org] rel collected {len(self._rel_urls)}")
+        print(f"総取得 URL：{len(all_urls)} 件  ({time.monotonic() - self._search_t0:.2f}s)")
+        print("[search cache]", get_search_page_cache().stats())
+        print("[url index]", self.url_index.stats())
+        self._on_feed_finished(self._fetch_gen)
 
     # ---------------------------------------------------------
-    # バックグラウンド本文取得
+    # バックグラウンド本文取得（パイプライン・完了順に反映）
     # ---------------------------------------------------------
-    def fetch_body_background(self, urls):
+    def _start_body_run(self):
+        """本文パイプラインの新しい世代を始める（前回の未処理分は捨てる）"""
+        def on_done(url, title, body):
+            # パイプラインの世代確認と呼び出しの間に次の検索が始まっていたら捨てる
+            if gen != self._fetch_gen:
+                return
+            # 空の本文（取得・抽出の失敗）はキャッシュしない → 開いたときや次の検索で取り直す
+            if body:
+                self.article_cache.put(url, title, body)
+                self._stream_record(url, title, body)
+            self.master.after(0, self._on_body_fetched, gen)
+
+        gen = self.pipeline.new_run(on_done)
+        self._fetch_gen = gen
+        self._body_reported = False
         print("=== 本文バックグラウンド取得開始 ===")
-        for url in urls:
-            if url not in self.cached_body:
-                title, body = extract_article_body(url)
-                self.cached_body[url] = (title, body)
-                time.sleep(0.3)
-        print("=== 本文バックグラウンド取得完了 ===")
+        return gen
+
+    def fetch_body_background(self, urls):
+        """収集済みの URL 一覧をまとめてパイプラインに流す（手動収集から使う）"""
+        todo = [u for u in urls if u not in self.article_cache]
+        self._search_running = True
+        gen = self._start_body_run()
+
+        # キューが満杯だと feed は待つので、Tk スレッドを止めないよう別スレッドで流す
+        def feeder():
+            self.pipeline.feed(gen, todo)
+            self.master.after(0, self._on_feed_finished, gen)
+
+        threading.Thread(target=feeder, daemon=True).start()
+
+    def _on_feed_finished(self, gen):
+        """URL を流し終えた。以降は完了件数が投入件数に追いついた時点で完了とする"""
+        if gen != self._fetch_gen:
+            return
+        self._search_running = False
+        self._on_body_fetched(gen)
+
+    def _on_body_fetched(self, gen):
+        """Tk スレッドで進捗（パイプラインのキュー深さ込み）を表示する"""
+        if gen != self._fetch_gen:
+            return
+        done, queued = self.pipeline.progress()
+        st = self.pipeline.stats()
+        rate = get_rate_controller().current_rate()
+        rate_text = "制限なし" if rate is None else f"{rate:.1f} req/s"
+        self.lbl_status.config(
+            text=f"本文取得 {done}/{queued}  (待ち URL {st['url_queue']} / 解析 {st['parse_queue']}, {rate_text})"
+        )
+        if not self._search_running and done >= queued and not self._body_reported:
+            self._body_reported = True
+            print("=== 本文バックグラウンド取得完了 ===")
+            print("[pipeline]", st)
+            print("[memory cache]", self.article_cache.stats())
+            print("[records]", self.records.stats())
+            cache = get_article_disk_cache()
+            if cache is not None:
+                print("[cache]", cache.stats())
+            print("[rate]", get_rate_controller().metrics())
 
     # ---------------------------------------------------------
     # URL ダブルクリック → 本文表示
@@ -782,13 +2889,40 @@ class JWAppGUI:
             return
         url = self.tree.item(sel[0], "values")[0]
         self.current_url = url
+        self._open_article(url)
 
-        if url not in self.cached_body:
-            title, body = extract_article_body(url)
-            self.cached_body[url] = (title, body)
-        else:
-            title, body = self.cached_body[url]
+    def _open_article(self, url):
+        """
+        取得済みなら即表示。未取得なら最優先で取得を依頼し、届いた時点で表示する（Tk は止めない）。
+        先読みで取得中の URL ならその取得を共有する。
+        """
+        hit = self.article_cache.get(url)
+        if hit is not None:
+            self._show_article(url, *hit)
+            return
+        self.txt_article.delete("1.0", "end")
+        self.txt_article.insert("end", f"【URL】\n{url}\n\n読み込み中…")
+        fut = self.pipeline.request(url, BODY_PRIORITY_INTERACTIVE)
+        fut.add_done_callback(lambda f: self.master.after(0, self._on_article_ready, url, f))
 
+    def _on_article_ready(self, url, fut):
+        if url != self.current_url:
+            return
+        if fut.cancelled():
+            # 新しい検索で世代が変わった → 今の世代で取り直す
+            self._open_article(url)
+            return
+        title, body = fut.result()
+        if not body:
+            # 失敗はキャッシュしないので、もう一度ダブルクリックすれば取り直す
+            self.txt_article.delete("1.0", "end")
+            self.txt_article.insert("end", f"【URL】\n{url}\n\n本文を取得できませんでした（もう一度開くと再取得します）")
+            return
+        self.article_cache.put(url, title, body)
+        self._stream_record(url, title, body)
+        self._show_article(url, title, body)
+
+    def _show_article(self, url, title, body):
         self.txt_article.delete("1.0", "end")
         self.txt_article.insert(
             "end",
@@ -802,17 +2936,21 @@ class JWAppGUI:
         if not self.current_url:
             return
 
-        title, body = self.cached_body.get(self.current_url, ("", ""))
+        title, body = self.article_cache.get(self.current_url) or ("", "")
         if not body:
             return
 
-        lines = body.split("\n")
-        summary = "。".join(lines[:3]) + "。"
-
+        summary = self._summary_for(self.current_url, body)
         self.txt_summary.delete("1.0", "end")
         self.txt_summary.insert("end", summary)
 
-        # Excel 出力
+        # 同じ記事（docid）の Excel 出力はセッション中 1 回だけ
+        key = ArticleUrlSet.key(self.current_url)
+        if key in self._exported:
+            return
+        self._exported.add(key)
+
+        # Excel 出力（ExcelWriter が裏のスレッドでまとめて保存する）
         self.excel.append([
             datetime.now().isoformat(),
             self.current_url,
@@ -821,6 +2959,68 @@ class JWAppGUI:
             body
         ])
 
+    def _stream_record(self, url, title, body):
+        """取得できた記事を逐次出力に 1 件追記する（同じ記事 = docid はセッション中 1 回だけ。どのスレッドからでも可）"""
+        if not body or not self.records.sinks:
+            return
+        key = ArticleUrlSet.key(url)
+        with self._stream_lock:
+            if key in self._streamed:
+                return
+            self._streamed.add(key)
+        self.records.append([datetime.now().isoformat(), url, title, self._summary_for(url, body), body])
+
+    def _summary_for(self, url, body):
+        """url の要約（同じ記事 = docid はセッション中 1 回だけ作る）"""
+        key = ArticleUrlSet.key(url)
+        summary = self._summaries.get(key)
+        if summary is None:
+            lines = body.split("\n")
+            summary = self._summaries[key] = "。".join(lines[:3]) + "。"
+        return summary
+
+    # ---------------------------------------------------------
+    # 一括 Excel 出力
+    # ---------------------------------------------------------
+    def export_all(self):
+        """
+        一覧の記事のうち本文取得済みのものを要約し、選んだファイルへ一括出力する
+        （.xlsx は write_only、.jsonl / .csv（.gz 可）は逐次出力と同じ形式）。
+        """
+        urls = [self.tree.item(iid, "values")[0] for iid in self.tree.get_children()]
+        if not urls:
+            return
+        path = filedialog.asksaveasfilename(defaultextension=".xlsx", filetypes=EXPORT_FILETYPES,
+                                            initialfile=f"jw_export_{datetime.now():%Y%m%d_%H%M%S}.xlsx")
+        if not path:
+            return
+        self.lbl_status.config(text="一括出力中…")
+        self.jobs.submit("export", self._export_job, urls, path,
+                         on_result=self._on_export_done, on_error=self._on_export_failed)
+
+    def _export_job(self, job, urls, path):
+        t0 = time.monotonic()
+
+        def rows():
+            now = datetime.now().isoformat()
+            for url in urls:
+                if job.cancelled:
+                    return
+                title, body = self.article_cache.get(url) or ("", "")
+                if body:
+                    yield [now, url, title, self._summary_for(url, body), body]
+
+        n = export_records(rows(), path)
+        return path, n, time.monotonic() - t0
+
+    def _on_export_done(self, result):
+        path, n, elapsed = result
+        print(f"[export] 一括出力 {n} 件 → {path} ({elapsed:.2f}s)")
+        self.lbl_status.config(text=f"{os.path.basename(path)} に {n} 件出力しました（{elapsed:.1f}s）")
+
+    def _on_export_failed(self, e):
+        self.lbl_status.config(text=f"一括出力に失敗しました: {e}")
+
 # End of Part3
 # jw_search_app_v12_edge_fixed10.py — Part4/4
 # === 起動部（main） ===
@@ -829,6 +3029,26 @@ def main():
     root = tk.Tk()
     app = JWAppGUI(root)
     root.mainloop()
+    app.jobs.shutdown()
+    app.excel.close()
+    app.records.close()
+    app.pipeline.shutdown()
+    get_async_fetcher().close()
+    get_fetch_client().close()
+    close_driver_pools()
+    get_search_page_cache().close()
+    cache = get_article_disk_cache()
+    if cache is not None:
+        cache.close()
 
 if __name__ == "__main__":
-    main()
+    if len(sys.argv) > 1 and sys.argv[1] == "--bench-parse":
+        print(benchmark_parsers([open(p, encoding="utf-8", errors="replace").read() for p in sys.argv[2:]]))
+    elif len(sys.argv) > 1 and sys.argv[1] == "--bench-urls":
+        print(benchmark_url_classifier(int(sys.argv[2]) if len(sys.argv) > 2 else 300000))
+    elif len(sys.argv) > 1 and sys.argv[1] == "--bench-fetch":
+        print(benchmark_async_fetch(int(sys.argv[2]) if len(sys.argv) > 2 else 30))
+    elif len(sys.argv) > 1 and sys.argv[1] == "--bench-excel":
+        print(benchmark_excel(int(sys.argv[2]) if len(sys.argv) > 2 else 10000))
+    else:
+        main()
@@ -8,29 +8,38 @@
 
 import os
 import re
+import sys
 import time
 import random
 import threading
+from html.parser import HTMLParser
 from datetime import datetime
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
 
 import requests
-from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from bs4 import BeautifulSoup, SoupStrainer
 
 from selenium import webdriver
 from selenium.webdriver.edge.service import Service
 from selenium.webdriver.edge.options import Options
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
 
-# Optional Excel support
+from jw_urls import ArticleUrlSet, benchmark_url_classifier, classify_url
+import jw_common
+from jw_common import (ArticleDiskCache, ArticleMemoryCache, ExcelWriter, EXPORT_FILETYPES, benchmark_excel,
+                       conditional_headers, export_records, open_record_sink)
+
+# Optional C-backed HTML parser (falls back to html.parser)
 try:
-    import openpyxl
-    from openpyxl import Workbook
+    import lxml
+    from lxml import etree as lxml_etree
 except Exception:
-    openpyxl = None
+    lxml = None
+    lxml_etree = None
 
 # ----------------------------
 # Configuration (editable)
@@ -44,8 +53,37 @@ HEADERS = {"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/
 MAX_PER_MODE = 50
 PAGE_STEP = 10
 SELENIUM_PAGE_TIMEOUT = 22
+# CSS selector that identifies a captcha / challenge page in the browser
+CHALLENGE_SELECTOR = "iframe[src*='recaptcha'], .g-recaptcha, #challenge-form, #captcha-form"
+ARTICLE_READY_MIN_CHARS = 200    # article/main text length that counts as "loaded"
+# shared export / driver pool / article cache settings (row limits, TTLs, sizes) live in jw_common.py
 EXCEL_PATH = "jw_extracted_fixed9.xlsx"
+# collected articles are appended one record at a time (formats / gzip: jw_common.EXPORT_STREAM_FORMATS / EXPORT_GZIP)
+EXPORT_STREAM_BASE = "jw_extracted_fixed9"   # file name; each format adds its extension
 BACKGROUND_SLEEP = 0.15
+# HTTP connection pool (keep-alive) settings
+HTTP_POOL_SIZE = 16          # connections kept per host
+HTTP_RETRIES = 2             # retries on connect errors / 5xx
+HTTP_RETRY_BACKOFF = 0.4     # retry backoff factor (0.4, 0.8, ... sec)
+# "fast" driver profile (lightweight browser for the Selenium body fallback)
+FAST_PAGE_LOAD_TIMEOUT = 20
+FAST_BLOCKED_URL_PATTERNS = [
+    # images / media
+    "*.jpg", "*.jpeg", "*.png", "*.gif", "*.webp", "*.svg", "*.ico", "*.avif",
+    "*.mp4", "*.m4v", "*.webm", "*.mp3", "*.m4a",
+    # fonts
+    "*.woff", "*.woff2", "*.ttf", "*.otf",
+    # third-party trackers / scripts
+    "*googletagmanager.com*", "*google-analytics.com*", "*doubleclick.net*",
+    "*facebook.net*", "*hotjar.com*", "*newrelic.com*", "*nr-data.net*",
+]
+BODY_FALLBACK_DRIVER_PROFILE = "fast"   # profile for extract_article_body_selenium
+# HTML parser: "auto" (lxml when installed, else html.parser) / "lxml" / "html.parser"
+HTML_PARSER = "auto"
+# Article extractor: "density" (single-pass text / link density scoring) / "selectors" (ARTICLE_SELECTORS_PRIORITY)
+ARTICLE_EXTRACTOR = "density"
+# Persistent article cache (SQLite)
+ARTICLE_CACHE_PATH = "jw_article_cache_fixed9.sqlite3"
 
 # ----------------------------
 # Utilities
@@ -55,70 +93,63 @@ def safe_filename(s: str) -> str:
         return "untitled"
     return re.sub(r'[\\/*?:"<>|]', "_", s)[:120]
 
+JP_CHAR_RE = re.compile(r'[ぁ-んァ-ヴ一-龠々]')
+
 def jp_char_count(s: str) -> int:
-    return len(re.findall(r'[ぁ-んァ-ヴ一-龠々]', s or ''))
-
-def extract_docid_from_url(url: str):
-    if not url:
-        return None
-    # /d/<digits> pattern (common)
-    m = re.search(r'/d/(\d{6,})', url)
-    if m:
-        try:
-            return int(m.group(1))
-        except:
-            return None
-    # trailing numeric segment /12345678/
-    m2 = re.search(r'/(\d{6,})/?$', url)
-    if m2:
-        try:
-            return int(m2.group(1))
-        except:
-            return None
-    # any long numeric
-    m3 = re.search(r'(\d{7,})', url)
-    if m3:
-        try:
-            return int(m3.group(1))
-        except:
-            return None
-    return None
+    return len(JP_CHAR_RE.findall(s or ''))
 
-# ----------------------------
-# Excel writer (thread-safe)
-# ----------------------------
-class ExcelWriter:
-    def __init__(self, path=EXCEL_PATH):
-        self.path = path
-        self._lock = threading.Lock()
-        if openpyxl is None:
-            return
-        if not os.path.exists(self.path):
-            wb = Workbook()
-            ws = wb.active
-            ws.title = "data"
-            ws.append(["timestamp", "url", "title", "summary", "body"])
-            wb.save(self.path)
-
-    def append(self, row):
-        if openpyxl is None:
-            print("openpyxl not installed: skipping excel save")
-            return
-        with self._lock:
-            try:
-                wb = openpyxl.load_workbook(self.path)
-                ws = wb["data"]
-                ws.append(row)
-                wb.save(self.path)
-            except Exception as e:
-                print("Excel write error:", e)
+def html_parser_name() -> str:
+    """Parser name passed to BeautifulSoup (from HTML_PARSER and whether lxml is installed)."""
+    if HTML_PARSER == "auto" or (HTML_PARSER == "lxml" and lxml is None):
+        return "lxml" if lxml is not None else "html.parser"
+    return HTML_PARSER
+
+def make_soup(html: str, parse_only=None, parser=None):
+    """BeautifulSoup with the selected parser; parse_only (SoupStrainer) builds only matching tags."""
+    return BeautifulSoup(html, parser or html_parser_name(), parse_only=parse_only)
 
 # ----------------------------
 # make_edge_driver: stronger anti-detection + no-temp-profile fallback
 # ----------------------------
-def make_edge_driver(headed=True, driver_path=EDGE_DRIVER_PATH, user_data_dir=EDGE_USER_DATA_DIR):
+def _apply_fast_profile(driver):
+    """Block images, media, fonts and third-party scripts via CDP and shorten the timeout."""
+    try:
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": FAST_BLOCKED_URL_PATTERNS})
+    except Exception as e:
+        print("fast profile: CDP blocking failed:", e)
+    driver.set_page_load_timeout(FAST_PAGE_LOAD_TIMEOUT)
+
+def page_transfer_stats(driver) -> dict:
+    """Load time (to DOMContentLoaded) and bytes transferred for the last navigation."""
+    try:
+        return driver.execute_script(
+            "const n = performance.getEntriesByType('navigation')[0];"
+            "const r = performance.getEntriesByType('resource');"
+            "let bytes = n ? n.transferSize : 0;"
+            "for (const e of r) bytes += e.transferSize || 0;"
+            "return {load_ms: n ? Math.round(n.domContentLoadedEventEnd - n.startTime) : null,"
+            " bytes: bytes, resources: r.length};"
+        )
+    except Exception:
+        return {}
+
+def make_edge_driver(headed=True, driver_path=EDGE_DRIVER_PATH, user_data_dir=EDGE_USER_DATA_DIR,
+                     profile="default"):
+    """
+    profile="default": regular Edge (loads every resource)
+    profile="fast": lightweight profile for search pages / the Selenium body fallback
+      - page_load_strategy="eager" (returns at DOMContentLoaded)
+      - headless with rendering features disabled, disk cache enabled
+      - images, media, fonts and third-party scripts blocked via CDP Network.setBlockedURLs
+    """
+    fast = profile == "fast"
+    if fast:
+        headed = False
     opts = Options()
     opts.use_chromium = True
+    if fast:
+        opts.page_load_strategy = "eager"
 
     # Anti-detection flags
     opts.add_experimental_option("excludeSwitches", ["enable-automation"])
@@ -126,9 +157,10 @@ def make_edge_driver(headed=True, driver_path=EDGE_DRIVER_PATH, user_data_dir=ED
     # disable automation controlled blink feature
     opts.add_argument("--disable-blink-features=AutomationControlled")
 
-    # Reduce cache / profile issues
-    opts.add_argument("--disable-application-cache")
-    opts.add_argument("--disk-cache-size=0")
+    # Reduce cache / profile issues (fast profile keeps the disk cache for repeat assets)
+    if not fast:
+        opts.add_argument("--disable-application-cache")
+        opts.add_argument("--disk-cache-size=0")
     opts.add_argument("--disable-gpu-shader-disk-cache")
     opts.add_argument("--disable-dev-shm-usage")
     opts.add_argument("--no-sandbox")
@@ -161,6 +193,14 @@ def make_edge_driver(headed=True, driver_path=EDGE_DRIVER_PATH, user_data_dir=ED
     else:
         opts.add_argument("--start-maximized")
 
+    if fast:
+        # rendering features off
+        opts.add_argument("--blink-settings=imagesEnabled=false")
+        opts.add_argument("--disable-remote-fonts")
+        opts.add_argument("--mute-audio")
+        opts.add_argument("--disable-software-rasterizer")
+        opts.add_argument("--disable-smooth-scrolling")
+
     # set a common user agent (not the selenium one)
     # HEADERS constant also used for requests; keep them aligned
     opts.add_argument(f'--user-agent={HEADERS["User-Agent"]}')
@@ -180,6 +220,8 @@ def make_edge_driver(headed=True, driver_path=EDGE_DRIVER_PATH, user_data_dir=ED
         except Exception:
             pass
         driver.set_page_load_timeout(40)
+        if fast:
+            _apply_fast_profile(driver)
         return driver
     except Exception as e:
         # Last-resort fallback: try without user-data-dir (may create temp profile)
@@ -187,8 +229,12 @@ def make_edge_driver(headed=True, driver_path=EDGE_DRIVER_PATH, user_data_dir=ED
             print("Primary driver start failed, retrying without user-data-dir —", e)
             opts_fallback = Options()
             opts_fallback.use_chromium = True
-            opts_fallback.add_argument("--disable-application-cache")
-            opts_fallback.add_argument("--disk-cache-size=0")
+            if fast:
+                opts_fallback.page_load_strategy = "eager"
+                opts_fallback.add_argument("--blink-settings=imagesEnabled=false")
+            else:
+                opts_fallback.add_argument("--disable-application-cache")
+                opts_fallback.add_argument("--disk-cache-size=0")
             opts_fallback.add_argument("--disable-gpu-shader-disk-cache")
             opts_fallback.add_argument("--disable-dev-shm-usage")
             opts_fallback.add_argument("--no-sandbox")
@@ -210,16 +256,193 @@ def make_edge_driver(headed=True, driver_path=EDGE_DRIVER_PATH, user_data_dir=ED
             except Exception:
                 pass
             driver2.set_page_load_timeout(40)
+            if fast:
+                _apply_fast_profile(driver2)
             return driver2
         except Exception as e2:
             print("Fallback driver start failed:", e2)
             raise
 
+# ----------------------------
+# Edge WebDriver pool (leasing / health checks live in jw_common.EdgeDriverPool)
+# ----------------------------
+class EdgeDriverPool(jw_common.EdgeDriverPool):
+    """Pool with fixed9's Edge startup and challenge selector."""
+    challenge_selector = CHALLENGE_SELECTOR
+
+    def _default_factory(self, slot):
+        if self.profile == "fast":
+            # Edge cannot share a user-data-dir between instances: one per slot
+            user_data_dir = f"{EDGE_USER_DATA_DIR}_fast" + (f"_{slot}" if slot else "")
+            driver = make_edge_driver(headed=False, user_data_dir=user_data_dir, profile="fast")
+            print(f"EdgeDriver (fast) 起動 OK (slot {slot})")
+            return driver
+        # same startup JWSearcher used before the pool existed (headless when the pool is not headed)
+        service = Service(EDGE_DRIVER_PATH)
+        opts = Options()
+        opts.use_chromium = True
+        if not self.headed:
+            opts.add_argument("--headless=new")
+        driver = webdriver.Edge(service=service, options=opts)
+        driver.set_window_size(1300, 1000)
+        print(f"EdgeDriver 起動 OK (slot {slot}, {'headed' if self.headed else 'headless'})")
+        return driver
+
+_driver_pools = {}
+_driver_pool_lock = threading.Lock()
+
+def get_driver_pool(headed=True, profile="default") -> EdgeDriverPool:
+    """Return the process-wide pool for a profile and headed / headless (fast is always headless)."""
+    if profile == "fast":
+        headed = False
+    key = (headed, profile)
+    with _driver_pool_lock:
+        pool = _driver_pools.get(key)
+        if pool is None:
+            pool = _driver_pools[key] = EdgeDriverPool(headed=headed, profile=profile)
+        return pool
+
+def close_driver_pools():
+    with _driver_pool_lock:
+        pools = list(_driver_pools.values())
+    for pool in pools:
+        pool.close()
+
+# ----------------------------
+# Shared HTTP client: keep-alive session with per-host pool + retry adapter
+# ----------------------------
+class FetchClient:
+    """
+    Shares one requests.Session so TCP/TLS connections to www.jw.org are reused.
+    Keeps up to pool_size keep-alive connections per host; connect errors and 5xx
+    are retried by the urllib3 Retry adapter. Safe to call get() from several threads.
+    """
+    def __init__(self, pool_size=HTTP_POOL_SIZE, retries=HTTP_RETRIES, backoff=HTTP_RETRY_BACKOFF):
+        self.pool_size = pool_size
+        self.session = requests.Session()
+        self.session.headers.update(HEADERS)
+        retry = Retry(
+            total=retries,
+            connect=retries,
+            read=retries,
+            backoff_factor=backoff,
+            status_forcelist=(500, 502, 503, 504),
+            allowed_methods=frozenset(["GET", "HEAD"]),
+            raise_on_status=False,
+        )
+        # pool_block=True: extra concurrent requests wait for a free connection
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size,
+                              max_retries=retry, pool_block=True)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def get(self, url, timeout=12, **kwargs):
+        return self.session.get(url, timeout=timeout, **kwargs)
+
+    def close(self):
+        try:
+            self.session.close()
+        except Exception:
+            pass
+
+_fetch_client = None
+_fetch_client_lock = threading.Lock()
+
+def get_fetch_client() -> FetchClient:
+    """Return the process-wide FetchClient (created lazily)."""
+    global _fetch_client
+    with _fetch_client_lock:
+        if _fetch_client is None:
+            _fetch_client = FetchClient()
+        return _fetch_client
+
+# ----------------------------
+# Persistent article cache (the cache itself is jw_common.ArticleDiskCache)
+# ----------------------------
+_article_disk_cache = None
+_article_disk_cache_lock = threading.Lock()
+
+def get_article_disk_cache():
+    """Return the process-wide ArticleDiskCache, or None if it cannot be opened."""
+    global _article_disk_cache
+    with _article_disk_cache_lock:
+        if _article_disk_cache is None:
+            try:
+                _article_disk_cache = ArticleDiskCache(ARTICLE_CACHE_PATH)
+            except Exception as e:
+                print("article cache open failed:", e)
+                return None
+        return _article_disk_cache
+
 # End of Part1
 # -------------------------------------------------------------
 # Part 2/4 — Google 検索収集 / 記事判定 / 本文抽出（requests → Selenium fallback）
 # -------------------------------------------------------------
 
+# ----------------------------
+# 遷移後の readiness 待ち（固定 sleep の代わり）
+# ----------------------------
+# Each script returns a state name once the page is ready, or null to keep polling.
+GOOGLE_READY_JS = """
+const challengeSel = arguments[0];
+if (document.querySelector(challengeSel)) return 'challenge';
+if (document.querySelector('#rso a[href], #search a[href]')) return 'results';
+if (document.readyState === 'complete') return 'complete';
+return null;
+"""
+
+ARTICLE_READY_JS = """
+const [challengeSel, minChars] = arguments;
+if (document.querySelector(challengeSel)) return 'challenge';
+const el = document.querySelector('article') || document.querySelector('main');
+if (el && (el.textContent || '').trim().length >= minChars) return 'article';
+if (document.readyState === 'complete') return 'complete';
+return null;
+"""
+
+class WaitTimings:
+    """Per-wait elapsed time / outcome counters (printed as metrics)."""
+    def __init__(self):
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def record(self, name, elapsed, state):
+        with self._lock:
+            d = self._data.setdefault(name, {"count": 0, "total": 0.0, "max": 0.0, "states": {}})
+            d["count"] += 1
+            d["total"] += elapsed
+            d["max"] = max(d["max"], elapsed)
+            d["states"][state] = d["states"].get(state, 0) + 1
+
+    def summary(self) -> dict:
+        with self._lock:
+            return {name: {"count": d["count"], "avg": round(d["total"] / d["count"], 3),
+                           "max": round(d["max"], 3), "states": dict(d["states"])}
+                    for name, d in self._data.items()}
+
+wait_timings = WaitTimings()
+
+def wait_for_state(driver, name: str, script: str, *args, timeout=SELENIUM_PAGE_TIMEOUT):
+    """Return as soon as script yields a non-null state ("timeout" if it never does)."""
+    t0 = time.monotonic()
+    try:
+        state = WebDriverWait(driver, timeout, poll_frequency=0.1).until(
+            lambda d: d.execute_script(script, *args)
+        )
+    except Exception:
+        state = "timeout"
+    wait_timings.record(name, time.monotonic() - t0, state)
+    return state
+
+def wait_for_google_results(driver, timeout=SELENIUM_PAGE_TIMEOUT):
+    """"results" / "complete" (loaded, no result links) / "challenge" (Google captcha)"""
+    return wait_for_state(driver, "google_results", GOOGLE_READY_JS, CHALLENGE_SELECTOR, timeout=timeout)
+
+def wait_for_article(driver, timeout=SELENIUM_PAGE_TIMEOUT):
+    """"article" (enough body text) / "complete" / "challenge" """
+    return wait_for_state(driver, "article", ARTICLE_READY_JS,
+                          CHALLENGE_SELECTOR, ARTICLE_READY_MIN_CHARS, timeout=timeout)
+
 # ----------------------------
 # Google検索で jw.org の結果を集める
 # ----------------------------
@@ -230,7 +453,7 @@ def google_collect_urls(driver, keyword: str, max_items=MAX_PER_MODE):
     ページは num=10、start=0,10,20,... 最大5ページ（50件）。
     """
     results = []
-    seen = set()
+    seen = ArticleUrlSet()   # one URL per docid
     pages = min((max_items + PAGE_STEP - 1) // PAGE_STEP, 5)
 
     for p in range(pages):
@@ -244,8 +467,11 @@ def google_collect_urls(driver, keyword: str, max_items=MAX_PER_MODE):
             time.sleep(1.0)
             continue
 
-        # small randomized wait to mimic human
-        time.sleep(0.9 + random.random() * 0.6)
+        # wait for the result list itself instead of a fixed sleep
+        state = wait_for_google_results(driver)
+        if state == "challenge":
+            print("Google captcha detected — solve it in the browser and search again.")
+            break
 
         # collect anchor hrefs
         try:
@@ -265,19 +491,15 @@ def google_collect_urls(driver, keyword: str, max_items=MAX_PER_MODE):
                     href = requests.utils.unquote(m.group(1))
                 else:
                     continue
-            # ignore non-jw links
-            if BASE_DOMAIN not in href:
+            # keep only Japanese jw.org article URLs, in canonical form (classify_url is memoized)
+            if not is_article_url(href):
                 continue
-            # normalize (remove fragments)
-            href = href.split('#')[0].rstrip('/')
-            if href in seen:
+            rep, new = seen.add(classify_url(href).url)
+            if not new:
                 continue
-            seen.add(href)
-            # keep only likely article URLs; is_article_url will be conservative
-            if is_article_url(href):
-                results.append(href)
-                if len(results) >= max_items:
-                    return results[:max_items]
+            results.append(rep)
+            if len(results) >= max_items:
+                return results[:max_items]
         # small delay between pages
         time.sleep(0.4 + random.random() * 0.6)
 
@@ -289,39 +511,14 @@ def google_collect_urls(driver, keyword: str, max_items=MAX_PER_MODE):
 # ----------------------------
 def is_article_url(url: str) -> bool:
     """
-    jw.org の記事ページを保守的に判定。
-    条件例：
-      - BASE_DOMAIN を含む
-      - /ja/ を含む（日本語ページ）
-      - '/d/' を含む（ドキュメントIDを持つ正式記事）
-      - または長い数値を含む末尾セグメント
-    除外：
-      - /topics/, /languages/, /library/ (一般目次)、/collections/ などの一覧系
+    jw.org の記事ページを保守的に判定（jw_urls.classify_url に委譲。fixed10 と同じ規則）。
+    条件：BASE_DOMAIN の /ja/ 配下で docid（/d/<数字> または末尾の数字）を持つ正式記事、
+          またはパスに号数などの長い数字を持つ記事。
+    除外：jw_urls.ARTICLE_EXCLUDE_PATHS の一覧系、検索ページ、PDF などのファイル。
+    wol.jw.org や finder?docid= のリンクは正規化・重複除去には使うが、ここでは記事にしない。
     """
-    if not url or BASE_DOMAIN not in url:
-        return False
-    u = url.lower()
-    # prefer Japanese pages
-    if "/ja/" not in u:
-        return False
-    # exclude list/index pages
-    exclude_patterns = [
-        "/topics/", "/languages/", "/collections/", "/library/", "/languages/", "/search?", "/sitemap", "/about/"
-    ]
-    for ex in exclude_patterns:
-        if ex in u:
-            return False
-    if u.endswith(".pdf"):
-        return False
-    # accept if contains /d/<digits>
-    if re.search(r'/d/\d{6,}', u):
-        return True
-    # accept if trailing numeric id
-    if re.search(r'/\d{6,}/?$', u):
-        return True
-    # otherwise conservative: reject
-    return False
-
+    info = classify_url(url)
+    return info.kind == "article" and info.url.startswith(BASE_DOMAIN + "/ja/")
 
 # ----------------------------
 # HTML -> タイトル, 本文 抽出ロジック（改良版）
@@ -336,6 +533,9 @@ ARTICLE_SELECTORS_PRIORITY = [
     'section'
 ]
 
+# footer / legal lines dropped from article bodies
+BOILERPLATE_LINE_RE = re.compile(r'privacy|cookie|terms|copyright|利用規約', re.IGNORECASE)
+
 def clean_text_block(text: str) -> str:
     if not text:
         return ''
@@ -346,8 +546,7 @@ def clean_text_block(text: str) -> str:
         if not ln:
             out.append('')
             continue
-        low = ln.lower()
-        if any(k in low for k in ['privacy', 'cookie', 'terms', 'copyright', '利用規約']):
+        if BOILERPLATE_LINE_RE.search(ln):
             continue
         if len(ln) < 2:
             continue
@@ -360,20 +559,13 @@ def clean_text_block(text: str) -> str:
         final.append(ln)
     return '\n'.join(final).strip()
 
-def parse_article_html(html: str):
-    """
-    HTML文字列からタイトルと本文を返す（title, body）
-    本文は優先セレクタ順で長いブロックを採用し、日本語文字数フィルタあり
-    """
-    soup = BeautifulSoup(html, 'html.parser')
-    # title
-    title = ''
-    h1 = soup.find('h1')
-    if h1:
-        title = h1.get_text(strip=True)
-    elif soup.title:
-        title = soup.title.get_text(strip=True)
+# Partial parse for article pages: the title and the ARTICLE_SELECTORS_PRIORITY containers
+# (article / main / section, with the divs inside them). Pages without any of these are
+# parsed again in full for the div / <p> fallbacks.
+ARTICLE_STRAINER = SoupStrainer(['title', 'h1', 'article', 'main', 'section'])
 
+def _selector_candidates(soup) -> list:
+    """Texts (over 200 chars) of the ARTICLE_SELECTORS_PRIORITY matches, in priority order."""
     candidates = []
     for sel in ARTICLE_SELECTORS_PRIORITY:
         try:
@@ -384,6 +576,27 @@ def parse_article_html(html: str):
             txt = el.get_text('\n', strip=True)
             if len(txt) > 200:
                 candidates.append(txt)
+    return candidates
+
+def parse_article_html_selectors(html: str, parser=None, partial=True):
+    """
+    HTML文字列からタイトルと本文を返す（title, body）
+    本文は優先セレクタ順で長いブロックを採用し、日本語文字数フィルタあり
+    partial=True は ARTICLE_STRAINER の部分解析から始め、候補が無ければ全体を解析し直す。
+    """
+    soup = make_soup(html, ARTICLE_STRAINER if partial else None, parser)
+    candidates = _selector_candidates(soup)
+    if partial and not candidates:
+        # no container in the strained tree: the div / <p> fallbacks need the whole page
+        soup = make_soup(html, None, parser)
+        candidates = _selector_candidates(soup)
+    # title
+    title = ''
+    h1 = soup.find('h1')
+    if h1:
+        title = h1.get_text(strip=True)
+    elif soup.title:
+        title = soup.title.get_text(strip=True)
 
     # fallback: large divs with many <p>
     if not candidates:
@@ -412,23 +625,343 @@ def parse_article_html(html: str):
     return title or '', clean_text_block(body)
 
 
+def benchmark_parsers(pages=None, repeat=5) -> dict:
+    """
+    Per-page parse time (ms) for each parser backend; pages is a list of HTML strings.
+    "<parser>/full" parses the whole page, "<parser>/partial" uses ARTICLE_STRAINER.
+    Without pages, synthetic_article_pages() is used.
+    e.g. python jw_search_app_v12_edge_fixed9.py --bench-parse [saved1.html saved2.html ...]
+    """
+    if not pages:
+        pages = synthetic_article_pages()
+    parsers = ['html.parser'] + (['lxml'] if lxml is not None else [])
+    results = {}
+    for parser in parsers:
+        for label, partial in (('full', False), ('partial', True)):
+            t0 = time.perf_counter()
+            for _ in range(repeat):
+                for html in pages:
+                    parse_article_html_selectors(html, parser, partial)
+            elapsed = time.perf_counter() - t0
+            results[f'{parser}/{label}'] = round(elapsed * 1000 / (repeat * max(len(pages), 1)), 2)
+    return results
+
+
+# ----------------------------
+# Single-pass article extractor (text / link density)
+# ----------------------------
+# Instead of one select_one + get_text per selector, every element is scored bottom-up
+# while the page is tokenised once: text length, link text length, Japanese characters
+# and <p> count are summed into the parent when an element closes, and each <p> adds a
+# paragraph score to its parent and grandparent. The best-scoring container is the body.
+_SKIP_TAGS = frozenset(['script', 'style', 'noscript', 'template', 'svg', 'iframe'])
+_VOID_TAGS = frozenset(['area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input',
+                        'link', 'meta', 'param', 'source', 'track', 'wbr'])
+_BLOCK_TAGS = frozenset(['address', 'article', 'aside', 'blockquote', 'dd', 'div', 'dl', 'dt',
+                         'figcaption', 'figure', 'footer', 'form', 'h1', 'h2', 'h3', 'h4', 'h5',
+                         'h6', 'header', 'li', 'main', 'nav', 'ol', 'p', 'pre', 'section',
+                         'table', 'td', 'th', 'tr', 'ul'])
+_CANDIDATE_TAGS = frozenset(['article', 'main', 'section', 'div', 'td', 'blockquote'])
+_POSITIVE_HINT_RE = re.compile(r'article|body|content|entry|main|post|text', re.IGNORECASE)
+_NEGATIVE_HINT_RE = re.compile(r'banner|breadcrumb|comment|footer|menu|nav|promo|related|share|sidebar|social',
+                               re.IGNORECASE)
+_INLINE_SPACE_RE = re.compile(r'[ \t\r\f\v　\xa0]+')
+# <meta name/property> -> key in the returned meta dict
+ARTICLE_META_KEYS = {
+    'description': 'description',
+    'og:title': 'og_title',
+    'og:description': 'og_description',
+    'og:url': 'url',
+    'og:type': 'type',
+    'og:site_name': 'site_name',
+    'article:published_time': 'published',
+    'article:modified_time': 'modified',
+}
+
+# open element: [tag, first chunk, text, link text, jp chars, <p> count, paragraph score, class/id hint]
+_TAG, _START, _TEXT, _LINK, _JP, _PARAS, _SCORE, _HINT = range(8)
+
+
+class _DensityScanner(HTMLParser):
+    """
+    Scores every element in one pass. Driven either by html.parser (feed) or as an
+    lxml parser target (start / end / data), so the work is linear in the page size.
+    """
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.chunks = []
+        self.stack = [['#root', 0, 0, 0, 0, 0, 0.0, 0]]
+        self.candidates = []   # (score, fallback score, first chunk, end chunk)
+        self.meta = {}
+        self.skip = 0
+        self.skip_tag = None   # element being skipped (script / svg ...); only same-name nesting is counted
+        self.links = 0
+        self.in_title = False
+        self.title_parts = []
+        self.h1_parts = None
+        self.h1_text = ''
+
+    # ---- html.parser callbacks ----
+    def handle_starttag(self, tag, attrs):
+        self.start(tag, dict(attrs))
+
+    def handle_startendtag(self, tag, attrs):
+        self.start(tag, dict(attrs))
+        self.end(tag)
+
+    def handle_endtag(self, tag):
+        self.end(tag)
+
+    def handle_data(self, data):
+        self.data(data)
+
+    # ---- parser events (also the lxml target interface) ----
+    def start(self, tag, attrs):
+        if self.skip:
+            if tag == self.skip_tag:
+                self.skip += 1
+            return
+        if tag in _SKIP_TAGS:
+            self.skip = 1
+            self.skip_tag = tag
+            return
+        if tag == 'meta':
+            key = (attrs.get('property') or attrs.get('name') or '').lower()
+            name = ARTICLE_META_KEYS.get(key)
+            if name and name not in self.meta:
+                self.meta[name] = (attrs.get('content') or '').strip()
+            return
+        if tag == 'br':
+            self.chunks.append('\n')
+            return
+        if tag in _VOID_TAGS:
+            return
+        if tag == 'html' and attrs.get('lang'):
+            self.meta['lang'] = attrs.get('lang')
+        elif tag == 'title':
+            self.in_title = True
+        elif tag == 'a':
+            self.links += 1
+        elif tag == 'h1' and self.h1_parts is None and not self.h1_text:
+            self.h1_parts = []
+        if tag in _BLOCK_TAGS:
+            # html.parser does not close <p> implicitly
+            if self.stack[-1][_TAG] == 'p':
+                self._close()
+            self.chunks.append('\n')
+        hint = 0
+        if tag in _CANDIDATE_TAGS:
+            names = (attrs.get('class') or '') + ' ' + (attrs.get('id') or '')
+            if _POSITIVE_HINT_RE.search(names):
+                hint += 25
+            if _NEGATIVE_HINT_RE.search(names):
+                hint -= 25
+        self.stack.append([tag, len(self.chunks), 0, 0, 0, 0, 0.0, hint])
+
+    def end(self, tag):
+        if self.skip:
+            # leave on the matching end tag, even if children were left unclosed (<path> in <svg> ...)
+            if tag == self.skip_tag:
+                self.skip -= 1
+            return
+        stack = self.stack
+        for i in range(len(stack) - 1, 0, -1):
+            if stack[i][_TAG] == tag:
+                while len(stack) > i:
+                    self._close()
+                return
+
+    def data(self, text):
+        if self.skip:
+            return
+        if self.in_title:
+            self.title_parts.append(text)
+            return
+        self.chunks.append(text)
+        if self.h1_parts is not None:
+            self.h1_parts.append(text)
+        n = len(text.strip())
+        if n:
+            node = self.stack[-1]
+            node[_TEXT] += n
+            if self.links:
+                node[_LINK] += n
+            node[_JP] += jp_char_count(text)
+
+    def close(self):
+        super().close()
+        while len(self.stack) > 1:
+            self._close()
+
+    def _close(self):
+        node = self.stack.pop()
+        parent = self.stack[-1]
+        tag = node[_TAG]
+        if tag == 'title':
+            self.in_title = False
+        elif tag == 'a':
+            self.links = max(self.links - 1, 0)
+        elif tag == 'h1' and self.h1_parts is not None:
+            self.h1_text = _INLINE_SPACE_RE.sub(' ', ''.join(self.h1_parts)).strip()
+            self.h1_parts = None
+        if tag in _BLOCK_TAGS:
+            self.chunks.append('\n')
+        text, link, jp = node[_TEXT], node[_LINK], node[_JP]
+        if tag == 'p':
+            node[_PARAS] += 1
+            if text >= 25:
+                para = (1 + min(text / 100.0, 3)) * (0.5 + jp / text) * (1 - link / text)
+                parent[_SCORE] += para
+                if len(self.stack) > 1:
+                    self.stack[-2][_SCORE] += para / 2
+        if tag in _CANDIDATE_TAGS and text:
+            density = 1 - link / text
+            score = (node[_SCORE] + node[_HINT]) * density if node[_SCORE] else 0.0
+            fallback = (text - link) * (0.5 + jp / text)
+            self.candidates.append((score, fallback, node[_START], len(self.chunks)))
+        parent[_TEXT] += text
+        parent[_LINK] += link
+        parent[_JP] += jp
+        parent[_PARAS] += node[_PARAS]
+
+    def result(self) -> dict:
+        if self.candidates:
+            best = max(self.candidates, key=lambda c: (c[0], c[1]))
+            raw = ''.join(self.chunks[best[2]:best[3]])
+        else:
+            raw = ''.join(self.chunks)
+        lines = []
+        for ln in raw.split('\n'):
+            ln = _INLINE_SPACE_RE.sub(' ', ln).strip()
+            if len(ln) >= 2 and not BOILERPLATE_LINE_RE.search(ln):
+                lines.append(ln)
+        title = (self.h1_text or _INLINE_SPACE_RE.sub(' ', ''.join(self.title_parts)).strip()
+                 or self.meta.get('og_title', ''))
+        return {'title': title, 'body': '\n'.join(lines), 'meta': self.meta}
+
+
+def extract_article_density(html: str, parser=None) -> dict:
+    """
+    記事ページを 1 回だけ走査して {'title', 'body', 'meta'} を返す。
+    parser が "lxml"（HTML_PARSER="auto" で lxml あり）なら lxml のトークナイザで、それ以外は html.parser で走査する。
+    """
+    scanner = _DensityScanner()
+    if (parser or html_parser_name()) == 'lxml' and lxml_etree is not None:
+        try:
+            target = lxml_etree.HTMLParser(target=scanner)
+            target.feed(html)
+            target.close()
+            return scanner.result()
+        except Exception:
+            scanner = _DensityScanner()
+    scanner.feed(html)
+    scanner.close()
+    return scanner.result()
+
+
+def parse_article_html(html: str, parser=None):
+    """
+    HTML文字列からタイトルと本文を返す（title, body）
+    ARTICLE_EXTRACTOR="selectors" なら従来の parse_article_html_selectors を使う
+    """
+    if ARTICLE_EXTRACTOR == 'selectors':
+        return parse_article_html_selectors(html, parser)
+    try:
+        art = extract_article_density(html, parser)
+    except Exception:
+        return '', ''
+    if jp_char_count(art['body']) < 15:
+        return art['title'], ''
+    return art['title'], art['body']
+
+
+def synthetic_article_pages(n: int = 6, seed: int = 0) -> list:
+    """
+    Benchmark article pages (same seed, same HTML): a long nav menu, deeply nested divs,
+    script / an svg with unclosed children / noscript, the article, related links and a footer.
+    """
+    rnd = random.Random(seed)
+    sentence = "神は愛です。聖書はわたしたちに希望を与えます、そして平和について教えています。"
+    pages = []
+    for i in range(n):
+        nav = "".join(f'<li><a href="/ja/n{j}/">メニュー項目{j}</a></li>' for j in range(rnd.randrange(120, 200)))
+        paras = "".join(f"<p id='p{j}'>{sentence * rnd.randrange(2, 7)} <a href='/x'>参照</a> 聖句{j}</p>"
+                        for j in range(rnd.randrange(15, 30)))
+        related = "".join(f'<li><a href="/ja/d/{rnd.randrange(10 ** 8, 10 ** 9)}/">関連記事 {j}</a></li>'
+                          for j in range(40))
+        depth = rnd.randrange(10, 40)
+        pages.append(
+            f'<!DOCTYPE html><html lang="ja"><head><title>記事{i} — JW.ORG</title>'
+            f'<meta property="og:title" content="記事{i}"><meta name="description" content="説明{i}">'
+            f'<meta property="article:published_time" content="2024-01-0{i % 9 + 1}">'
+            f'<script>var x = "<div>not real</div>"; {"x" * 4000}</script><style>p{{color:red}}</style></head>'
+            f'<body><header><nav><ul>{nav}</ul></nav>'
+            '<svg viewBox="0 0 10 10"><g><path d="M0 0L10 10"><circle r="1"></g></svg></header>'
+            + "<div class='wrap'>" * depth
+            + f'<main><article id="article" class="article"><h1>見出し {i} の記事</h1>'
+            f'<noscript><p>JavaScript を有効にしてください</p></noscript><div class="bodyTxt">{paras}</div></article>'
+            f'<aside class="related"><ul>{related}</ul></aside></main>'
+            + "</div>" * depth
+            + '<footer><p>Copyright © 2024 Watch Tower</p></footer></body></html>')
+    return pages
+
+def benchmark_extractors(pages=None, repeat=5) -> dict:
+    """
+    Per-page extraction time (ms): "selectors" (parse_article_html_selectors, full and
+    partial parse) against the single-pass "density" extractor, for each parser backend.
+    Without pages, synthetic_article_pages() is used so the numbers are reproducible.
+    e.g. python jw_search_app_v12_edge_fixed9.py --bench-extract [saved1.html saved2.html ...]
+    """
+    if not pages:
+        pages = synthetic_article_pages()
+    parsers = ['html.parser'] + (['lxml'] if lxml is not None else [])
+    results = {}
+    for parser in parsers:
+        runs = (('selectors/full', lambda h: parse_article_html_selectors(h, parser, False)),
+                ('selectors/partial', lambda h: parse_article_html_selectors(h, parser, True)),
+                ('density', lambda h: extract_article_density(h, parser)))
+        for label, func in runs:
+            t0 = time.perf_counter()
+            for _ in range(repeat):
+                for html in pages:
+                    func(html)
+            elapsed = time.perf_counter() - t0
+            results[f'{parser}/{label}'] = round(elapsed * 1000 / (repeat * max(len(pages), 1)), 2)
+    return results
+
+
 # ----------------------------
 # requestsベース取得（高速） + selenium fallback
 # ----------------------------
 def extract_article_body_requests(url: str):
+    """
+    If the article is already in the persistent cache, revalidate with
+    If-None-Match / If-Modified-Since: a 304 returns the cached (title, body)
+    without downloading or parsing the page again.
+    """
     try:
-        r = requests.get(url, headers=HEADERS, timeout=12)
+        cache = get_article_disk_cache()
+        entry = cache.get_entry(url) if cache is not None else None
+        r = get_fetch_client().get(url, headers=conditional_headers(entry), timeout=12)
+        if r.status_code == 304 and entry:
+            cache.mark_fresh(entry["url"])
+            return entry["title"], entry["body"]
         if r.status_code != 200:
             return '', ''
-        return parse_article_html(r.text)
+        title, body = parse_article_html(r.text)
+        if body and cache is not None:
+            cache.put(url, title, body,
+                      etag=r.headers.get("ETag"), last_modified=r.headers.get("Last-Modified"))
+        return title, body
     except Exception:
         return '', ''
 
 def extract_article_body_selenium(driver, url: str):
     try:
         driver.get(url)
-        WebDriverWait(driver, SELENIUM_PAGE_TIMEOUT).until(EC.presence_of_element_located((By.CSS_SELECTOR, 'body')))
-        time.sleep(0.5 + random.random() * 0.6)
+        if wait_for_article(driver) == "challenge":
+            print("Selenium article fetch hit a challenge page:", url)
+            return '', ''
         html = driver.page_source
         return parse_article_html(html)
     except Exception as e:
@@ -440,28 +973,14 @@ def extract_article_body_selenium(driver, url: str):
 # Part 3/4 — GUI ロジック（検索、バックグラウンド本文取得、Tree操作）
 # -------------------------------------------------------------
 
-class ArticleCache:
-    """URL → (title, body) を保持"""
-    def __init__(self):
-        self.data = {}
-
-    def put(self, url, title, body):
-        self.data[url] = (title, body)
-
-    def get(self, url):
-        return self.data.get(url, ("", ""))
-
-    def has(self, url):
-        return url in self.data
-
-
 class JWSearcher:
     """Google検索を使って記事URLを収集し、必要に応じて Selenium で補完"""
     def __init__(self):
-        service = Service(EDGE_DRIVER_PATH)
-        self.driver = webdriver.Edge(service=service)
-        self.driver.set_window_size(1300, 1000)
-        print("EdgeDriver 起動 OK")
+        # Edge は共有プールから必要な間だけ借りる（起動はプロセスで 1 回）
+        # Google 検索は通常の Edge、本文フォールバックは軽量な fast プロファイル
+        self.pool = get_driver_pool()
+        self.pool.prewarm()
+        self.body_pool = get_driver_pool(profile=BODY_FALLBACK_DRIVER_PROFILE)
 
     def google_collect(self, keyword, mode, max_items):
         """
@@ -474,14 +993,18 @@ class JWSearcher:
             q = f"site:jw.org/ja {keyword} 2024 OR 2023 OR 2022 OR 2021"
 
         print(f"[Google] mode={mode} keyword='{keyword}' → start collecting…")
-        urls = google_collect_urls(self.driver, q, max_items=max_items)
+        with self.pool.lease() as driver:
+            urls = google_collect_urls(driver, q, max_items=max_items)
         print(f"[Google] collected {len(urls)} items")
+        print("[driver pool]", self.pool.metrics())
+        print("[waits]", wait_timings.summary())
         return urls
 
-    def fetch_body(self, url, cache: ArticleCache):
+    def fetch_body(self, url, cache: ArticleMemoryCache):
         """cache に無ければ取得（requests → selenium fallback）"""
-        if cache.has(url):
-            return cache.get(url)
+        hit = cache.get(url)
+        if hit is not None:
+            return hit
 
         # try requests
         title, body = extract_article_body_requests(url)
@@ -491,9 +1014,11 @@ class JWSearcher:
 
         # fallback: selenium
         print("requests failed → Selenium fallback:", url)
-        title, body = extract_article_body_selenium(self.driver, url)
+        with self.body_pool.lease() as driver:
+            title, body = extract_article_body_selenium(driver, url)
         if title and body:
-            cache.put(url, title, body)
+            # requests 経路と違って永続キャッシュに未保存なので、すぐ書いておく
+            cache.put(url, title, body, persist=True)
         return title, body
 
 class JWAppGUI:
@@ -504,11 +1029,21 @@ class JWAppGUI:
         self.root.geometry("1350x900")
 
         self.searcher = JWSearcher()
-        self.cache = ArticleCache()
-        self.excel = ExcelWriter()
+        # one byte-bounded cache for the whole session (evictions spill to the SQLite cache)
+        self.cache = ArticleMemoryCache(spill=get_article_disk_cache())
+        self.excel = ExcelWriter(EXCEL_PATH)
+        # every fetched article is also appended to the JSONL / CSV stream (once per docid)
+        self.records = open_record_sink(EXPORT_STREAM_BASE)
+        self._streamed = set()
+        self._stream_lock = threading.Lock()
+        # every article URL seen this session, per docid (aliases resolve to the first URL seen)
+        self.url_index = ArticleUrlSet()
+        self._summaries = {}     # article key (ArticleUrlSet.key) -> summary
+        self._exported = set()   # article keys already written to Excel
 
         self.current_url = None
         self.tree_items = []  # list of URLs に対応
+        self._fetch_gen = 0   # bumped per search; a running background fetch stops when it changes
 
         self._build_ui()
 
@@ -568,6 +1103,7 @@ class JWAppGUI:
 
         # 要約ボタン
         ttk.Button(right, text="要約生成", command=self.make_summary).pack(pady=3)
+        ttk.Button(right, text="一覧を一括出力（Excel / JSONL / CSV）", command=self.export_all).pack(pady=2)
 
         # 要約表示
         self.txt_summary = tk.Text(right, wrap="word", height=8)
@@ -584,7 +1120,6 @@ class JWAppGUI:
 
         # clear UI
         self.tree.delete(*self.tree.get_children())
-        self.cache = ArticleCache()
         self.txt_body.delete("1.0", "end")
         self.txt_summary.delete("1.0", "end")
         self.tree_items = []
@@ -597,8 +1132,8 @@ class JWAppGUI:
         date_n = self.var_date.get()
         date_urls = self.searcher.google_collect(kw, "date", date_n)
 
-        # combine
-        all_urls = rel_urls + [u for u in date_urls if u not in rel_urls]
+        # combine (per docid; an article already seen this session keeps its first URL)
+        all_urls = [self.url_index.add(u)[0] for u in ArticleUrlSet(rel_urls + date_urls)]
         print(f"総取得 URL：{len(all_urls)} 件")
 
         # add to tree
@@ -606,20 +1141,28 @@ class JWAppGUI:
             iid = self.tree.insert("", "end", values=(u,))
             self.tree_items.append(u)
 
-        # background fetch
-        threading.Thread(target=self._background_fetch_bodies, daemon=True).start()
+        # background fetch (the previous search's thread stops at its next URL)
+        self._fetch_gen += 1
+        threading.Thread(target=self._background_fetch_bodies,
+                         args=(self._fetch_gen, list(self.tree_items)), daemon=True).start()
 
     # -----------------------------------------------------
-    def _background_fetch_bodies(self):
+    def _background_fetch_bodies(self, gen, urls):
         print("=== 本文バックグラウンド取得開始 ===")
-        for u in self.tree_items:
-            if not self.cache.has(u):
+        for u in urls:
+            if gen != self._fetch_gen:
+                print("=== 本文バックグラウンド取得中止（新しい検索） ===")
+                return
+            if u not in self.cache:
                 title, body = self.searcher.fetch_body(u, self.cache)
                 if title and body:
                     print(f"[OK] {title[:20]}…")
+                    self._stream_record(u, title, body)
                 else:
                     print(f"[NG] 本文なし：{u}")
         print("=== 本文バックグラウンド取得完了 ===")
+        print("[memory cache]", self.cache.stats())
+        print("[records]", self.records.stats())
 
     # -----------------------------------------------------
     def on_tree_dblclick(self, event):
@@ -629,10 +1172,11 @@ class JWAppGUI:
         url = self.tree.item(sel[0], "values")[0]
         self.current_url = url
 
-        title, body = self.cache.get(url)
+        title, body = self.cache.get(url) or ("", "")
         if not body:
             print("cacheなし → 取得中…")
             title, body = self.searcher.fetch_body(url, self.cache)
+            self._stream_record(url, title, body)
 
         self.txt_body.delete("1.0", "end")
         self.txt_body.insert("end", f"【タイトル】\n{title}\n\n【URL】\n{url}\n\n【本文】\n{body}")
@@ -667,24 +1211,27 @@ class JWAppGUI:
             messagebox.showwarning("警告", "URLが選択されていません。")
             return
 
-        title, body = self.cache.get(self.current_url)
+        title, body = self.cache.get(self.current_url) or ("", "")
         if not body:
             title, body = self.searcher.fetch_body(self.current_url, self.cache)
             if not body:
                 messagebox.showwarning("警告", "本文が取得できませんでした。")
                 return
+            self._stream_record(self.current_url, title, body)
 
-        # 要約（3段落の先頭部分）
-        lines = [ln for ln in body.split("\n") if ln.strip()]
-        if not lines:
-            summary = ""
-        else:
-            summary = "。".join(lines[:3]) + "。"
+        summary = self._summary_for(self.current_url, body)
 
         # 表示
         self.txt_summary.delete("1.0", "end")
         self.txt_summary.insert("end", summary)
 
+        # 同じ記事（docid）はセッション中 1 回だけ保存する
+        key = ArticleUrlSet.key(self.current_url)
+        if key in self._exported:
+            print("[Excel] 保存済みの記事です:", self.current_url)
+            return
+        self._exported.add(key)
+
         # Excel 保存
         row = [
             datetime.now().isoformat(),
@@ -693,9 +1240,67 @@ class JWAppGUI:
             summary,
             body
         ]
-        self.excel.append(row)
+        self.excel.append(row)   # saved in batches by the writer thread
         print("[Excel] 保存しました:", self.current_url)
 
+    def _stream_record(self, url, title, body):
+        """Append a fetched article to the streaming export (once per docid per session; any thread)."""
+        if not body or not self.records.sinks:
+            return
+        key = ArticleUrlSet.key(url)
+        with self._stream_lock:
+            if key in self._streamed:
+                return
+            self._streamed.add(key)
+        self.records.append([datetime.now().isoformat(), url, title, self._summary_for(url, body), body])
+
+    def _summary_for(self, url, body):
+        """要約（3段落の先頭部分）。同じ記事（docid）はセッション中 1 回だけ作る"""
+        key = ArticleUrlSet.key(url)
+        summary = self._summaries.get(key)
+        if summary is None:
+            lines = [ln for ln in body.split("\n") if ln.strip()]
+            if not lines:
+                summary = ""
+            else:
+                summary = "。".join(lines[:3]) + "。"
+            self._summaries[key] = summary
+        return summary
+
+    # -----------------------------------------------------
+    def export_all(self):
+        """
+        一覧の記事のうち本文取得済みのものを要約し、選んだファイルへ一括出力する
+        （.xlsx は write_only、.jsonl / .csv（.gz 可）は逐次出力と同じ形式）。
+        """
+        urls = list(self.tree_items)
+        if not urls:
+            return
+        path = filedialog.asksaveasfilename(defaultextension=".xlsx", filetypes=EXPORT_FILETYPES,
+                                            initialfile=f"jw_export_{datetime.now():%Y%m%d_%H%M%S}.xlsx")
+        if not path:
+            return
+
+        def rows():
+            now = datetime.now().isoformat()
+            for u in urls:
+                title, body = self.cache.get(u) or ("", "")
+                if body:
+                    yield [now, u, title, self._summary_for(u, body), body]
+
+        def run():
+            t0 = time.monotonic()
+            try:
+                n = export_records(rows(), path)
+            except Exception as e:
+                print("export error:", e)
+                self.root.after(0, messagebox.showerror, "エラー", f"一括出力に失敗しました: {e}")
+                return
+            print(f"[export] 一括出力 {n} 件 → {path} ({time.monotonic() - t0:.2f}s)")
+            self.root.after(0, messagebox.showinfo, "完了", f"{os.path.basename(path)} に {n} 件出力しました。")
+
+        threading.Thread(target=run, daemon=True).start()
+
 
 # -------------------------------------------------------------
 # main
@@ -704,8 +1309,24 @@ def main():
     root = tk.Tk()
     app = JWAppGUI(root)
     root.mainloop()
+    app.excel.close()
+    app.records.close()
+    get_fetch_client().close()
+    close_driver_pools()
+    cache = get_article_disk_cache()
+    if cache is not None:
+        cache.close()
 
 
 if __name__ == "__main__":
-    main()
+    if len(sys.argv) > 1 and sys.argv[1] == "--bench-parse":
+        print(benchmark_parsers([open(p, encoding="utf-8", errors="replace").read() for p in sys.argv[2:]]))
+    elif len(sys.argv) > 1 and sys.argv[1] == "--bench-extract":
+        print(benchmark_extractors([open(p, encoding="utf-8", errors="replace").read() for p in sys.argv[2:]]))
+    elif len(sys.argv) > 1 and sys.argv[1] == "--bench-urls":
+        print(benchmark_url_classifier(int(sys.argv[2]) if len(sys.argv) > 2 else 300000))
+    elif len(sys.argv) > 1 and sys.argv[1] == "--bench-excel":
+        print(benchmark_excel(int(sys.argv[2]) if len(sys.argv) > 2 else 10000))
+    else:
+        main()
 
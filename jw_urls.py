@@ -0,0 +1,269 @@
+# jw_urls.py
+# JW.org の URL 正規化と記事判定（fixed9 / fixed10 共通）
+# - 記事 URL の判定はここに集約する（検索結果・Google 結果・手動収集・キャッシュで同じ規則を使う）
+# - パターンは読み込み時にコンパイルし、結果は URL ごとに lru_cache で覚える
+
+import re
+import time
+import random
+import threading
+from collections import OrderedDict, namedtuple
+from functools import lru_cache
+from urllib.parse import urlsplit, urlunsplit
+
+BASE_DOMAIN = "https://www.jw.org"
+URL_CLASSIFY_CACHE_SIZE = 100000   # classify_url のメモ化件数
+# 記事ではない一覧・カテゴリ系（docid 付きでも一覧として扱う）
+ARTICLE_EXCLUDE_PATHS = ("/search/?", "/search?", "/topics/", "/languages/", "/bible/", "/library/",
+                         "/study-tools/", "/bible-teachings/", "/videos/", "/news/", "/whats-new/",
+                         "/collections/", "/live/", "/sitemap", "/about/")
+
+# docid の取り出し方（上から順に試す）: finder の docid=（クエリ）、/d/<数字>、wol の /lp-j/<数字>、
+# パス末尾の数字（パスのパターンはクエリを外したパスに当てる）。
+# パス途中の任意の長い数字（/wp20160101/ などの号数）は docid とみなさない（別記事が 1 件にまとまるため）
+DOCID_QUERY_RE = re.compile(r'(?:^|&)docid=(\d{6,})')
+DOCID_PATH_PATTERNS = (re.compile(r'/d/(\d{6,})'), re.compile(r'/lp-[a-z]+/(\d{6,})'), re.compile(r'/(\d{6,})/?$'))
+
+def extract_docid_from_url(url: str):
+    """url（相対パスでもよい）の docid。無ければ None"""
+    parts = _canonical_parts(url)
+    return _docid(parts[2], parts[3]) if parts else None
+
+def _docid(path: str, query: str):
+    if query:
+        m = DOCID_QUERY_RE.search(query)
+        if m:
+            return int(m.group(1))
+    for pattern in DOCID_PATH_PATTERNS:
+        m = pattern.search(path)
+        if m:
+            return int(m.group(1))
+    return None
+
+# ----------------------------
+# URL の正規化と分類（記事 / 一覧 / 検索 / 外部 ...）
+# ----------------------------
+UrlInfo = namedtuple("UrlInfo", "url kind docid lang")
+
+JW_HOSTS = {"www.jw.org": "www.jw.org", "jw.org": "www.jw.org", "wol.jw.org": "wol.jw.org"}
+# 記事と無関係なクエリ（計測用など）。これ以外のクエリは順序を保って残す
+URL_NOISE_PARAMS = frozenset(["fbclid", "gclid", "srcid", "mc_cid", "mc_eid"])
+_ASSET_EXT_RE = re.compile(r"\.(?:pdf|epub|jwpub|mp3|mp4|m4v|zip|jpe?g|png|gif|svg)$", re.IGNORECASE)
+_EXCLUDE_PATH_RE = re.compile("|".join(re.escape(x) for x in ARTICLE_EXCLUDE_PATHS))
+_WOL_LANG_RE = re.compile(r"/lp-([a-z]+)(?:/|$)")
+_PATH_LANG_RE = re.compile(r"^/([a-z]{2,3}(?:-[a-z]+)?)/", re.IGNORECASE)
+_WOL_LANGS = {"j": "ja", "e": "en"}
+# 検索結果の記事には docid の無いもの（/wp20160101/ の雑誌記事など）もあるので、パスに 7 桁以上の
+# 数字があれば記事として扱う。docid は付けないので重複除去は正規化 URL で行う
+_NUMBERED_PATH_RE = re.compile(r"\d{7,}")
+# www.jw.org で末尾 "/" を付けないパス（finder はクエリで記事を指す）
+_NO_SLASH_PATHS = frozenset(["/finder"])
+# 絶対 URL の分解（urlsplit より速い）。合わなければ urlsplit に任せる
+_URL_PARTS_RE = re.compile(r"([A-Za-z][A-Za-z0-9+.-]*)://([^/?#]*)([^?#]*)(?:\?([^#]*))?")
+
+def _canonical_parts(url: str):
+    """canonicalize_url の本体。(scheme, host, path, query) を返す（空 URL は None）"""
+    url = (url or "").strip().split("#", 1)[0]
+    if not url:
+        return None
+    m = _URL_PARTS_RE.fullmatch(url)
+    if m:
+        scheme, host, path, query = m.groups()
+        query = query or ""
+    else:
+        p = urlsplit(url)
+        scheme, host, path, query = p.scheme, p.netloc, p.path, p.query
+    host = host.lower()
+    host = JW_HOSTS.get(host, host)
+    scheme = scheme.lower()
+    if scheme == "http" and host in JW_HOSTS:
+        scheme = "https"
+    path = path or "/"
+    if query:
+        query = "&".join(kv for kv in query.split("&")
+                         if kv and not (kv.split("=", 1)[0] in URL_NOISE_PARAMS or kv.startswith("utm_")))
+    if host == "www.jw.org":
+        if not path.endswith("/") and path not in _NO_SLASH_PATHS and "." not in path.rsplit("/", 1)[-1]:
+            path += "/"
+    elif len(path) > 1:
+        path = path.rstrip("/")
+    return scheme, host, path, query
+
+def canonicalize_url(url: str) -> str:
+    """
+    URL を比較用の正規形にする: 前後空白と fragment を落とし、scheme を https、ホストを小文字
+    （jw.org は www.jw.org）に揃え、計測用クエリを除く。末尾 "/" はクエリの有無によらず
+    www.jw.org では付け（拡張子の無いパス。/finder は除く）、wol.jw.org などでは外す
+    （どちらもサイト側の URL の形に合わせる）。
+    """
+    parts = _canonical_parts(url)
+    return _join_parts(parts) if parts else ""
+
+def _join_parts(parts) -> str:
+    scheme, host, path, query = parts
+    if not (scheme and host):
+        return urlunsplit(parts + ("",))
+    return f"{scheme}://{host}{path}?{query}" if query else f"{scheme}://{host}{path}"
+
+def _url_lang(host: str, path: str, query: str):
+    if host == "wol.jw.org":
+        m = _WOL_LANG_RE.search(path)
+        if m:
+            return _WOL_LANGS.get(m.group(1), m.group(1))
+    m = _PATH_LANG_RE.match(path)
+    if m:
+        return m.group(1).lower()
+    if "wtlocale=J" in query:
+        return "ja"
+    return None
+
+@lru_cache(maxsize=URL_CLASSIFY_CACHE_SIZE)
+def classify_url(url: str) -> UrlInfo:
+    """
+    URL を正規化して UrlInfo(url, kind, docid, lang) を返す（URL ごとにメモ化）。
+    kind: "article"（docid を持つ記事、またはパスに号数などの長い数字を持つ記事）/ "index"（一覧・カテゴリ）/
+          "search" / "asset"（PDF・画像など）/ "external"（jw.org 以外）/ "other"（それ以外の jw.org ページ）
+    docid は DOCID_QUERY_RE / DOCID_PATH_PATTERNS で取れたときだけ入る（パス途中の数字は docid にしない）。
+    """
+    parts = _canonical_parts(url)
+    if not parts:
+        return UrlInfo("", "other", None, None)
+    _scheme, host, path, query = parts
+    canon = _join_parts(parts)
+    if host not in JW_HOSTS:
+        return UrlInfo(canon, "external", None, None)
+    lang = _url_lang(host, path, query)
+    if "/search/" in path or path.endswith("/search"):
+        kind = "search"
+    elif _ASSET_EXT_RE.search(path):
+        kind = "asset"
+    elif _EXCLUDE_PATH_RE.search(canon):
+        kind = "index"
+    else:
+        docid = _docid(path, query)
+        article = docid is not None or _NUMBERED_PATH_RE.search(path) is not None
+        return UrlInfo(canon, "article" if article else "other", docid, lang)
+    return UrlInfo(canon, kind, None, lang)
+
+def classify_urls(urls) -> list:
+    """classify_url のバッチ版（入力と同じ順序で UrlInfo のリストを返す）"""
+    return [classify_url(u) for u in urls]
+
+def article_urls(urls, lang: str = "ja") -> list:
+    """urls のうち lang の記事だけを正規形で、出現順・重複なしで返す"""
+    out = []
+    seen = set()
+    for info in classify_urls(urls):
+        if info.kind == "article" and info.lang == lang and info.url not in seen:
+            seen.add(info.url)
+            out.append(info.url)
+    return out
+
+class ArticleUrlSet:
+    """
+    記事 URL の順序付き集合（docid 単位で重複を除く）。
+    キーは docid（classify_url で取れるものだけ。取れなければ正規化 URL）で、最初に見た URL の
+    正規形をその記事の代表 URL にする。号数入りのパス（/wp20160101/...）のように docid の無い記事は URL 単位になる。
+    以降に見た別名（/d/<id> 形式・末尾数字形式・計測用クエリ付きなど）は alias マップで代表 URL に引き直す。
+    追加・参照は O(1)。複数スレッドから使ってよい。
+    """
+    def __init__(self, urls=()):
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()   # key → 代表 URL（追加順）
+        self._alias = {}                # 見た URL → key
+        self.merge(urls)
+
+    @staticmethod
+    def key(url: str):
+        """記事を同一視するキー（/d/・docid=・/lp-j/・末尾の docid、無ければ正規化 URL）"""
+        info = classify_url(url)
+        return info.docid if info.docid is not None else info.url
+
+    def add(self, url: str):
+        """url を加えて (代表 URL, 新しい記事なら True) を返す"""
+        with self._lock:
+            key = self._alias.get(url)
+            if key is None:
+                key = self._alias[url] = self.key(url)
+            rep = self._entries.get(key)
+            if rep is not None:
+                return rep, False
+            rep = self._entries[key] = classify_url(url).url
+            self._alias[rep] = key
+            return rep, True
+
+    def merge(self, urls) -> list:
+        """urls を順に加え、新しく加わった記事の代表 URL を順に返す"""
+        added = []
+        for url in urls:
+            if url:
+                rep, new = self.add(url)
+                if new:
+                    added.append(rep)
+        return added
+
+    def resolve(self, url: str):
+        """url（別名でもよい）の代表 URL。まだ無い記事なら None"""
+        with self._lock:
+            key = self._alias.get(url)
+        if key is None:
+            key = self.key(url)
+        with self._lock:
+            return self._entries.get(key)
+
+    def __contains__(self, url) -> bool:
+        return self.resolve(url) is not None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __iter__(self):
+        with self._lock:
+            return iter(list(self._entries.values()))
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"articles": len(self._entries), "aliases": len(self._alias)}
+
+_LEGACY_DOCID_RE = re.compile(r"/d/\d{6,}|/\d{6,}/?$")
+
+def benchmark_url_classifier(n: int = 300000, distinct: int = 20000) -> dict:
+    """
+    n 件（異なる URL は distinct 件）を分類して 1 件あたりの時間（µs）を返す。
+    "legacy" は以前のインライン判定、"cold" はメモ化なし（初回）、"warm" はメモ化済み、"batch" は article_urls 一括。
+    例: python jw_search_app_v12_edge_fixed10.py --bench-urls 300000
+    """
+    rnd = random.Random(0)
+    shapes = (BASE_DOMAIN + "/ja/ライブラリ/雑誌/g{0}/記事-{0}/",
+              BASE_DOMAIN + "/ja/d/{0:09d}/#p3",
+              BASE_DOMAIN + "/ja/ニュース/{0}/?utm_source=x",
+              BASE_DOMAIN + "/ja/聖書の教え/質問/q-{0}/",
+              "https://wol.jw.org/ja/wol/d/r7/lp-j/{0:010d}",
+              "HTTP://JW.ORG/finder?wtlocale=J&docid={0:09d}&srcid=share",
+              BASE_DOMAIN + "/ja/topics/{0}/",
+              BASE_DOMAIN + "/ja/files/{0}.pdf",
+              "https://example.com/{0}")
+    pool = [rnd.choice(shapes).format(rnd.randrange(10 ** 6, 10 ** 9)) for _ in range(distinct)]
+    urls = [rnd.choice(pool) for _ in range(n)]
+    results = {}
+    # 以前の判定（startswith + 除外リストの部分一致 + docid 正規表現）を毎回実行した場合
+    t0 = time.perf_counter()
+    for u in urls:
+        (u.split("#")[0].startswith(BASE_DOMAIN + "/ja/") and not any(x in u for x in ARTICLE_EXCLUDE_PATHS)
+         and (_LEGACY_DOCID_RE.search(u) is not None or _NUMBERED_PATH_RE.search(u) is not None))
+    results["legacy_us"] = round((time.perf_counter() - t0) * 1e6 / n, 3)
+    classify_url.cache_clear()
+    t0 = time.perf_counter()
+    for u in pool:
+        classify_url(u)
+    results["cold_us"] = round((time.perf_counter() - t0) * 1e6 / len(pool), 3)
+    t0 = time.perf_counter()
+    for u in urls:
+        classify_url(u)
+    results["warm_us"] = round((time.perf_counter() - t0) * 1e6 / n, 3)
+    t0 = time.perf_counter()
+    found = article_urls(urls)
+    results["batch_us"] = round((time.perf_counter() - t0) * 1e6 / n, 3)
+    results["articles"] = len(found)
+    results["cache"] = classify_url.cache_info()._asdict()
+    return results
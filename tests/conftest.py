@@ -0,0 +1,35 @@
+# アプリは単一ファイルのスクリプトなので、リポジトリ直下を import パスに入れて読み込む
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture(scope="session")
+def app():
+    """fixed10 本体（GUI は起動しない）"""
+    import jw_search_app_v12_edge_fixed10
+    yield jw_search_app_v12_edge_fixed10
+    # BodyPipeline が使った共有 AsyncFetcher（aiohttp のセッション）を閉じる
+    if jw_search_app_v12_edge_fixed10._async_fetcher is not None:
+        jw_search_app_v12_edge_fixed10._async_fetcher.close()
+
+
+@pytest.fixture
+def stand_in_server(app):
+    """serve_article_pages（synthetic_article_pages）を起動して base URL を返す"""
+    server, base = app.serve_article_pages(app.synthetic_article_pages())
+    yield base
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def disk_cache(app, tmp_path, monkeypatch):
+    """一時ディレクトリの ArticleDiskCache を共有キャッシュ（get_article_disk_cache）として差し込む"""
+    cache = app.ArticleDiskCache(str(tmp_path / "articles.sqlite3"))
+    monkeypatch.setattr(app, "_article_disk_cache", cache)
+    yield cache
+    cache.close()
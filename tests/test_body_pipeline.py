@@ -0,0 +1,147 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+
+def wait_until(cond, timeout=30.0):
+    deadline = time.monotonic() + timeout
+    while not cond():
+        if time.monotonic() > deadline:
+            raise AssertionError("timed out")
+        time.sleep(0.02)
+
+
+@pytest.fixture
+def pipeline(app, disk_cache):
+    """BodyPipeline を作る（共有の永続キャッシュは一時ディレクトリのもの）"""
+    pipelines = []
+
+    def make(**kwargs):
+        p = app.BodyPipeline(**kwargs)
+        pipelines.append(p)
+        return p
+    yield make
+    for p in pipelines:
+        p.shutdown()
+
+
+@pytest.fixture
+def fake_fetch(app, monkeypatch):
+    """
+    AsyncFetcher.fetch_cached を差し替え、取得順を記録する。gate がセットされるまで最初の取得で止まる。
+    fail に入れた URL は失敗（本文なし）を返す。
+    """
+    calls = []
+    gate = threading.Event()
+    fail = set()
+
+    async def fetch_cached(self, url, cache=None):
+        calls.append(url)
+        while not gate.is_set():
+            await asyncio.sleep(0.01)
+        if url in fail:
+            return ("failed", "", "")
+        return ("cache_hit", f"title {url}", f"body {url}")
+    monkeypatch.setattr(app.AsyncFetcher, "fetch_cached", fetch_cached)
+    return calls, gate, fail
+
+
+def urls(n):
+    return [f"https://www.jw.org/ja/x/{1102000000 + i}/" for i in range(n)]
+
+
+def test_request_promotes_queued_url(app, pipeline, fake_fetch):
+    calls, gate, _ = fake_fetch
+    p = pipeline(fetch_workers=1)
+    p.new_run()
+    batch = urls(6)
+    p.feed(p._gen, batch)
+    wait_until(lambda: calls)           # 最初の 1 件が取得中（他はキュー待ち）
+    future = p.request(batch[4])
+    gate.set()
+    assert future.result(10) == (f"title {batch[4]}", f"body {batch[4]}")
+    wait_until(lambda: p.progress() == (6, 6))
+    assert calls[:2] == [batch[0], batch[4]]
+    assert p.stats()["promoted"] == 1
+
+
+def test_requests_for_same_url_share_one_fetch(app, pipeline, fake_fetch):
+    calls, gate, _ = fake_fetch
+    p = pipeline()
+    p.new_run()
+    url = urls(1)[0]
+    first = p.request(url)
+    second = p.request(url, app.BODY_PRIORITY_BACKGROUND)
+    assert first is second
+    gate.set()
+    assert first.result(10)[1] == f"body {url}"
+    # 成功済みなら完了済みの Future を返す（取り直さない）
+    assert p.request(url) is first
+    assert calls == [url]
+    assert p.stats()["joined"] == 2
+
+
+def test_failed_fetch_is_retried_on_next_request(app, pipeline, fake_fetch):
+    calls, gate, fail = fake_fetch
+    gate.set()
+    p = pipeline()
+    p.new_run()
+    url = urls(1)[0]
+    fail.add(url)
+    assert p.request(url).result(10) == ("", "")
+    fail.clear()
+    assert p.request(url).result(10) == (f"title {url}", f"body {url}")
+    assert calls == [url, url]
+    assert p.progress() == (2, 2)
+
+
+def test_new_run_drops_previous_generation(app, pipeline, fake_fetch):
+    calls, gate, _ = fake_fetch
+    p = pipeline(fetch_workers=1)
+    p.new_run()
+    p.feed(p._gen, urls(4))
+    wait_until(lambda: calls)
+    done = []
+    gen = p.new_run(lambda url, title, body: done.append(url))
+    gate.set()
+    fresh = urls(6)[4:]
+    p.feed(gen, fresh)
+    wait_until(lambda: p.progress() == (2, 2))
+    assert done == fresh
+
+
+def test_pipeline_against_stand_in_server(app, pipeline, stand_in_server, disk_cache):
+    batch = [f"{stand_in_server}/ja/d/{100000000 + i}/" for i in range(12)]
+    p = pipeline()
+    for expected in ("parsed", "cache_hit", "not_modified"):
+        done = {}
+        gen = p.new_run(lambda url, title, body: done.__setitem__(url, body))
+        p.feed(gen, batch)
+        wait_until(lambda: len(done) == len(batch))
+        assert all(done.values())
+        assert p.stats()[expected] == len(batch)
+        if expected == "cache_hit":
+            disk_cache.ttl = 1e-9       # 期限切れ → ETag で条件付き GET（304）
+
+
+def test_async_fetcher_revalidates_against_stand_in_server(app, stand_in_server, disk_cache):
+    batch = [f"{stand_in_server}/ja/d/{100000000 + i}/" for i in range(20)]
+    fetcher = app.AsyncFetcher(concurrency=8)
+    try:
+        assert fetcher.run(fetcher.refresh_articles(batch, disk_cache), timeout=30) == \
+            {"not_modified": 0, "updated": 20, "failed": 0}
+        assert fetcher.run(fetcher.refresh_articles(batch, disk_cache), timeout=30) == \
+            {"not_modified": 20, "updated": 0, "failed": 0}
+        assert 1 < fetcher.max_in_flight <= 8
+        assert fetcher.run(fetcher.fetch_text(f"{stand_in_server}/missing"), timeout=30)[0] == 404
+    finally:
+        fetcher.close()
+
+
+def test_loopback_is_not_rate_limited(app):
+    rate = app.AdaptiveRateController(burst=1)
+    assert [rate.reserve("http://127.0.0.1:8000/x") for _ in range(5)] == [0.0] * 5
+    assert rate.reserve("https://www.jw.org/a") == 0.0
+    assert rate.reserve("https://www.jw.org/b") > 0.0
@@ -0,0 +1,112 @@
+import sqlite3
+import time
+
+import pytest
+
+from jw_common import ArticleDiskCache, ArticleMemoryCache
+
+URL_A = "https://www.jw.org/ja/x/1102000001/"
+URL_B = "https://www.jw.org/ja/x/1102000002/"
+URL_C = "https://www.jw.org/ja/x/1102000003/"
+
+
+@pytest.fixture
+def cache(tmp_path):
+    c = ArticleDiskCache(str(tmp_path / "articles.sqlite3"))
+    yield c
+    c.close()
+
+
+def test_disk_cache_round_trip_and_aliases(cache):
+    cache.put(URL_A, "題", "本文", etag='"e1"')
+    assert cache.get(URL_A) == ("題", "本文")
+    # 正規化 URL と docid のどちらでも引ける
+    assert cache.get("HTTP://JW.ORG/ja/x/1102000001?utm_source=x") == ("題", "本文")
+    assert cache.get("https://www.jw.org/ja/d/1102000001/") == ("題", "本文")
+    assert cache.get(URL_B) is None
+    assert cache.stats()["hits"] == 3 and cache.stats()["misses"] == 1
+
+
+def test_disk_cache_ttl_expires_but_keeps_entry_for_revalidation(cache):
+    cache.ttl = 60
+    cache.put(URL_A, "題", "本文", etag='"e1"')
+    cache._conn.execute("UPDATE articles SET fetched_at=?", (time.time() - 120,))
+    assert cache.get(URL_A) is None
+    entry = cache.get_entry(URL_A)
+    assert entry["etag"] == '"e1"' and entry["body"] == "本文"
+    cache.mark_fresh(URL_A)
+    assert cache.get(URL_A) == ("題", "本文")
+
+
+def test_disk_cache_evicts_least_recently_used(cache):
+    body = "x" * 1000
+    cache.touch_flush_rows = 1      # ヒット時の accessed_at をすぐ書く
+    cache.max_bytes = 2500
+    cache.put(URL_A, "", body)
+    time.sleep(0.01)
+    cache.put(URL_B, "", body)
+    time.sleep(0.01)
+    assert cache.get(URL_A) is not None     # A を最近使ったことにする
+    time.sleep(0.01)
+    cache.put(URL_C, "", body)
+    assert cache.get(URL_B) is None
+    assert cache.get(URL_A) is not None and cache.get(URL_C) is not None
+    assert cache.stats()["evictions"] == 1
+    assert cache.stats()["bytes"] <= cache.max_bytes
+
+
+def test_disk_cache_migrates_old_keys(tmp_path):
+    path = str(tmp_path / "old.sqlite3")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE articles (url TEXT PRIMARY KEY, docid INTEGER, title TEXT, body TEXT,"
+                 " size INTEGER, fetched_at REAL, accessed_at REAL, etag TEXT, last_modified TEXT)")
+    now = time.time()
+    # version 1 のキー（末尾スラッシュ無し）と新しい形が同じ記事を指している
+    conn.executemany("INSERT INTO articles VALUES (?, ?, ?, ?, 2, ?, ?, NULL, NULL)", [
+        ("https://www.jw.org/ja/x/1102000001", 1102000001, "old", "b1", now - 100, now - 100),
+        ("https://www.jw.org/ja/x/1102000001/", 1102000001, "new", "b2", now, now),
+        ("https://www.jw.org/ja/y/wp20160101/a", 20160101, "wp", "b3", now, now),
+    ])
+    conn.execute("PRAGMA user_version=1")
+    conn.commit()
+    conn.close()
+    cache = ArticleDiskCache(path)
+    try:
+        rows = cache._conn.execute("SELECT url, docid, title FROM articles ORDER BY url").fetchall()
+        assert rows == [("https://www.jw.org/ja/x/1102000001/", 1102000001, "new"),
+                        ("https://www.jw.org/ja/y/wp20160101/a/", None, "wp")]
+        assert cache._conn.execute("PRAGMA user_version").fetchone()[0] == 2
+        assert cache.stats()["bytes"] == 4
+    finally:
+        cache.close()
+
+
+@pytest.mark.parametrize("compression", [None, "zlib", "lzma"])
+def test_memory_cache_round_trip(compression):
+    mem = ArticleMemoryCache(compression=compression)
+    mem.put(URL_A, "題", "本文" * 100)
+    assert mem.get(URL_A) == ("題", "本文" * 100)
+    assert mem.get(URL_B) is None
+    assert URL_A in mem and len(mem) == 1
+
+
+def test_memory_cache_rejects_unknown_compression():
+    with pytest.raises(ValueError):
+        ArticleMemoryCache(compression="brotli")
+
+
+def test_memory_cache_evicts_lru_and_spills_to_disk(cache):
+    body = "本文" * 2000
+    mem = ArticleMemoryCache(spill=cache, compression=None)
+    mem.put(URL_A, "", body)
+    mem.max_bytes = mem.stats()["bytes"] * 2    # 同じ大きさの本文 2 件分
+    mem.put(URL_B, "", body)
+    mem.get(URL_A)                      # A を最近使ったことにする
+    mem.put(URL_C, "", body)            # B が追い出されて永続キャッシュへ
+    assert URL_B not in mem and URL_A in mem and URL_C in mem
+    stats = mem.stats()
+    assert stats["evictions"] == 1 and stats["spilled"] == 1
+    assert cache.get(URL_B) == ("", body)
+    # メモリで外れても永続キャッシュから引き直す
+    assert mem.get(URL_B) == ("", body)
+    assert mem.stats()["spill_hits"] == 1
@@ -0,0 +1,108 @@
+import pytest
+
+from jw_urls import ArticleUrlSet, article_urls, canonicalize_url, classify_url, extract_docid_from_url
+
+
+@pytest.mark.parametrize("url, expected", [
+    # ホスト・scheme の揃え方
+    ("HTTP://JW.ORG/ja/x/1102012345/", "https://www.jw.org/ja/x/1102012345/"),
+    ("  https://www.jw.org/ja/x/1102012345/#p3 ", "https://www.jw.org/ja/x/1102012345/"),
+    # www.jw.org の末尾 "/" はクエリの有無によらず付ける
+    ("https://www.jw.org/ja/x/1102012345", "https://www.jw.org/ja/x/1102012345/"),
+    ("https://www.jw.org/ja/x/1102012345?q=2", "https://www.jw.org/ja/x/1102012345/?q=2"),
+    ("https://www.jw.org/ja/x/1102012345/?q=2", "https://www.jw.org/ja/x/1102012345/?q=2"),
+    # 計測用クエリは落とし、それ以外は順序を保つ
+    ("https://www.jw.org/ja/x/?b=1&utm_source=x&a=2&fbclid=y", "https://www.jw.org/ja/x/?b=1&a=2"),
+    # finder と拡張子付きのパスには "/" を付けない
+    ("https://www.jw.org/finder?wtlocale=J&docid=1102012345&srcid=share",
+     "https://www.jw.org/finder?wtlocale=J&docid=1102012345"),
+    ("https://www.jw.org/ja/files/a.pdf", "https://www.jw.org/ja/files/a.pdf"),
+    # wol.jw.org は末尾 "/" を外す
+    ("https://wol.jw.org/ja/wol/d/r7/lp-j/1102012345/", "https://wol.jw.org/ja/wol/d/r7/lp-j/1102012345"),
+    ("", ""),
+])
+def test_canonicalize_url(url, expected):
+    assert canonicalize_url(url) == expected
+
+
+def test_canonicalize_url_is_idempotent():
+    url = "HTTP://JW.ORG/ja/x/1102012345?utm_source=x&q=2#p1"
+    assert canonicalize_url(canonicalize_url(url)) == canonicalize_url(url)
+
+
+@pytest.mark.parametrize("url, docid", [
+    ("https://www.jw.org/ja/d/1102012345/", 1102012345),
+    ("https://www.jw.org/ja/x/1102012345", 1102012345),
+    ("https://www.jw.org/ja/x/1102012345?q=2", 1102012345),
+    ("https://www.jw.org/finder?wtlocale=J&docid=1102012345", 1102012345),
+    ("https://wol.jw.org/ja/wol/d/r7/lp-j/1102012345", 1102012345),
+    ("/ja/d/1102012345/", 1102012345),
+    # パス途中の号数は docid にしない / 短い数字も docid にしない
+    ("https://www.jw.org/ja/library/magazines/wp20160101/article/", None),
+    ("https://www.jw.org/ja/x/12345/", None),
+    # クエリの中の数字はパスの末尾とみなさない
+    ("https://www.jw.org/ja/x/?page=1102012345", None),
+    ("", None),
+])
+def test_extract_docid_from_url(url, docid):
+    assert extract_docid_from_url(url) == docid
+
+
+@pytest.mark.parametrize("url, kind", [
+    ("https://www.jw.org/ja/x/1102012345/", "article"),
+    ("https://www.jw.org/ja/magazines/wp20160101/article/", "article"),
+    ("https://www.jw.org/ja/search/?q=a", "search"),
+    ("https://www.jw.org/ja/files/a.pdf", "asset"),
+    ("https://www.jw.org/ja/news/1102012345/", "index"),
+    ("https://www.jw.org/ja/bible-teachings/", "index"),
+    ("https://www.jw.org/ja/about-us/", "other"),
+    ("https://example.com/ja/d/1102012345/", "external"),
+])
+def test_classify_url_kind(url, kind):
+    assert classify_url(url).kind == kind
+
+
+def test_classify_url_lang():
+    assert classify_url("https://www.jw.org/ja/x/1102012345/").lang == "ja"
+    assert classify_url("https://wol.jw.org/ja/wol/d/r7/lp-j/1102012345").lang == "ja"
+    assert classify_url("https://www.jw.org/finder?wtlocale=J&docid=1102012345").lang == "ja"
+    assert classify_url("https://www.jw.org/en/x/1102012345/").lang == "en"
+
+
+def test_article_urls_keeps_order_and_drops_duplicates():
+    urls = ["https://www.jw.org/ja/x/1102012345",
+            "https://www.jw.org/ja/search/?q=a",
+            "https://www.jw.org/en/x/1102099999/",
+            "https://www.jw.org/ja/y/1102099999/",
+            "https://www.jw.org/ja/x/1102012345/#top"]
+    assert article_urls(urls) == ["https://www.jw.org/ja/x/1102012345/", "https://www.jw.org/ja/y/1102099999/"]
+
+
+def test_article_url_set_dedups_aliases_by_docid():
+    seen = ArticleUrlSet()
+    added = seen.merge(["https://www.jw.org/ja/x/1102012345/",
+                        "https://www.jw.org/ja/d/1102012345/",
+                        "https://www.jw.org/finder?wtlocale=J&docid=1102012345",
+                        "https://www.jw.org/ja/x/1102012345/?utm_source=share"])
+    assert added == ["https://www.jw.org/ja/x/1102012345/"]
+    assert seen.resolve("https://jw.org/ja/d/1102012345") == "https://www.jw.org/ja/x/1102012345/"
+    assert "https://www.jw.org/ja/z/1102099999/" not in seen
+
+
+def test_article_url_set_keeps_numbered_articles_without_docid_apart():
+    seen = ArticleUrlSet()
+    seen.merge(["https://www.jw.org/ja/magazines/wp20160101/a/",
+                "https://www.jw.org/ja/magazines/wp20160101/b/"])
+    assert len(seen) == 2
+
+
+@pytest.mark.parametrize("first, second", [
+    ("https://www.jw.org/ja/x/1102012345?x=1", "https://www.jw.org/ja/x/1102012345/"),
+    ("https://www.jw.org/ja/x/1102012345/", "https://www.jw.org/ja/x/1102012345?x=1"),
+    ("https://www.jw.org/ja/x/1102012345/?x=1", "https://www.jw.org/ja/x/1102012345"),
+])
+def test_article_url_set_dedups_query_variants(first, second):
+    seen = ArticleUrlSet()
+    assert seen.merge([first, second]) == [canonicalize_url(first)]
+    assert len(seen) == 1
+    assert seen.resolve(second) == canonicalize_url(first)